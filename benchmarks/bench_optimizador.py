@@ -0,0 +1,206 @@
+# benchmarks/bench_optimizador.py
+# Benchmarks del motor de optimización de corte — BVM
+#
+# Uso (desde la raíz del repo):
+#   python benchmarks/bench_optimizador.py
+#
+# Arma obras sintéticas con generar_despiece_bvm hasta llegar a la cantidad
+# de piezas pedida y compara la implementación anterior contra la actual.
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import numpy as np
+import pandas as pd
+from rectpack import newPacker, PackingMode
+from rectpack.maxrects import MaxRectsBssf
+
+from motor.despiece import generar_despiece_batch, generar_despiece_bvm
+from motor.optimizador import (
+    _piezas_desde_df, optimizar_corte, optimizar_lote, _mejorar_busqueda_local,
+    PLACA_ANCHO_DEFAULT, PLACA_ALTO_DEFAULT, KERF_DEFAULT,
+)
+from motor.piezas import cant_piezas, concatenar, dims_enteras, filas
+
+TAMANIOS = (100, 500, 2000)
+
+
+def _modulos_sinteticos(rnd):
+    while True:
+        tipo = rnd.choice(["Bajo Mesada", "Alacena", "Cajonera", "Placard"])
+        yield pd.DataFrame(generar_despiece_bvm(
+            tipo,
+            ancho_m=rnd.choice([400, 600, 800, 900, 1200]),
+            alto_m=2100 if tipo == "Placard" else rnd.choice([700, 720]),
+            prof_m=rnd.choice([350, 560, 600]),
+            esp_real=18, cant_cajones=3, estantes_fijos=1, estantes_moviles=1,
+        ))
+
+
+def obra_sintetica(n_piezas, semilla=0):
+    """Tabla de piezas de cuerpo (formato _piezas_desde_df) con n_piezas,
+    sacada de módulos de cocina/placard aleatorios."""
+    tablas, total = [], 0
+    for df in _modulos_sinteticos(random.Random(semilla)):
+        if total >= n_piezas:
+            break
+        tabla = _piezas_desde_df(df[~df["Tipo"].isin(["Fondo", "Piso"])])
+        tablas.append(tabla)
+        total += cant_piezas(tabla)
+    return filas(concatenar(tablas), range(n_piezas))
+
+
+def planilla_sintetica(n_modulos, semilla=0):
+    """Planilla de corte de un edificio: los despieces de n_modulos módulos
+    concatenados en un solo DataFrame."""
+    rnd = random.Random(semilla)
+    gen = _modulos_sinteticos(rnd)
+    return pd.concat([next(gen) for _ in range(n_modulos)], ignore_index=True)
+
+
+def _cronometrar(fn, repeticiones=3):
+    mejor = float("inf")
+    salida = None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        salida = fn()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, salida
+
+
+def _maxrects_una_placa_por_pieza(piezas):
+    """Implementación anterior: un add_bin por pieza, sin poda por área."""
+    packer = newPacker(mode=PackingMode.Offline, pack_algo=MaxRectsBssf, rotation=True)
+    for i, (w, h) in enumerate(dims_enteras(piezas)):
+        packer.add_rect(w, h, rid=i)
+    for _ in range(cant_piezas(piezas)):
+        packer.add_bin(round(PLACA_ANCHO_DEFAULT), round(PLACA_ALTO_DEFAULT))
+    packer.pack()
+    return sum(1 for b in packer if len(b))
+
+
+def bench_placas_bajo_demanda():
+    print("optimizar_corte — placas bajo demanda vs una placa por pieza")
+    print(f"{'piezas':>8} {'antes (s)':>10} {'ahora (s)':>10} {'speedup':>8} {'placas':>10}")
+    for n in TAMANIOS:
+        piezas = obra_sintetica(n)
+        t_antes, placas_antes = _cronometrar(lambda: _maxrects_una_placa_por_pieza(piezas))
+        t_ahora, res = _cronometrar(lambda: optimizar_corte({"Melamina": piezas}))
+        placas_ahora = res["Melamina"]["cant_placas"]
+        print(f"{n:>8} {t_antes:>10.3f} {t_ahora:>10.3f} {t_antes / t_ahora:>7.1f}x "
+              f"{placas_antes:>4} → {placas_ahora:<4}")
+
+
+def _piezas_desde_df_iterrows(df_corte, kerf=KERF_DEFAULT):
+    """Implementación anterior: iterrows y un dict por unidad de Cant."""
+    piezas = []
+    if df_corte is None or df_corte.empty:
+        return piezas
+    for _, row in df_corte.iterrows():
+        tipo = str(row.get("Tipo", "Cuerpo"))
+        largo = float(row.get("L", 0)) + kerf
+        ancho = float(row.get("A", 0)) + kerf
+        cant  = int(row.get("Cant", 0))
+        nombre = str(row.get("Pieza", "Pieza"))
+        if largo <= 0 or ancho <= 0 or cant <= 0:
+            continue
+        for _ in range(cant):
+            piezas.append({"nombre": nombre, "largo": largo, "ancho": ancho, "tipo": tipo})
+    return piezas
+
+
+def bench_expansion_piezas():
+    print("_piezas_desde_df — iterrows vs expansión columnar")
+    print(f"{'módulos':>8} {'filas':>7} {'piezas':>7} {'antes (s)':>10} {'ahora (s)':>10} {'speedup':>8}")
+    for n_modulos in (30, 300, 3000):
+        df = planilla_sintetica(n_modulos)
+        t_antes, antes = _cronometrar(lambda: _piezas_desde_df_iterrows(df))
+        t_ahora, ahora = _cronometrar(lambda: _piezas_desde_df(df))
+        assert len(antes) == cant_piezas(ahora)
+        print(f"{n_modulos:>8} {len(df):>7} {len(antes):>7} {t_antes:>10.4f} {t_ahora:>10.4f} "
+              f"{t_antes / t_ahora:>7.1f}x")
+
+
+def bench_veta():
+    print("Empaquetado con veta (sin rotar las piezas con veta) vs rotación libre")
+    print(f"{'algoritmo':>16} {'piezas':>7} {'placas libre':>13} {'placas veta':>12} "
+          f"{'libre (s)':>10} {'veta (s)':>9} {'speedup':>8}")
+    for algoritmo in ("maxrects", "guillotina", "skyline_bl"):
+        for n in TAMANIOS[:2]:
+            piezas = obra_sintetica(n)
+            libre = {**piezas, "rotable": np.ones(cant_piezas(piezas), dtype=bool)}
+            veta = {**piezas, "rotable": np.zeros(cant_piezas(piezas), dtype=bool)}
+            t_libre, r_libre = _cronometrar(lambda: optimizar_corte({"m": libre}, algoritmo=algoritmo))
+            t_veta, r_veta = _cronometrar(lambda: optimizar_corte({"m": veta}, algoritmo=algoritmo))
+            print(f"{algoritmo:>16} {n:>7} {r_libre['m']['cant_placas']:>13} {r_veta['m']['cant_placas']:>12} "
+                  f"{t_libre:>10.3f} {t_veta:>9.3f} {t_libre / t_veta:>7.1f}x")
+
+
+def bench_busqueda_local():
+    print("Búsqueda local ruin-and-recreate sobre el layout de una pasada")
+    print(f"{'algoritmo':>12} {'piezas':>7} {'cota':>5} {'placas antes':>13} {'placas después':>15} {'tiempo (s)':>11}")
+    for algoritmo in ("maxrects", "guillotina"):
+        for n in (200, 500):
+            piezas = obra_sintetica(n)
+            data = optimizar_corte({"m": piezas}, algoritmo=algoritmo)["m"]
+            t, mejorado = _cronometrar(lambda: _mejorar_busqueda_local(data, piezas), repeticiones=1)
+            print(f"{algoritmo:>12} {n:>7} {data['cota_inferior']:>5} {data['cant_placas']:>13} "
+                  f"{mejorado['cant_placas']:>15} {t:>11.2f}")
+
+
+def bench_lote():
+    print("Corte semanal: optimizar_lote sobre varias obras juntas")
+    print(f"{'obras':>6} {'piezas':>7} {'placas':>7} {'cota':>5} {'tiempo (s)':>11}")
+    rnd = random.Random(0)
+    gen = _modulos_sinteticos(rnd)
+    for n_obras in (5, 10):
+        obras = {f"obra {i + 1}": [{"df_corte": next(gen), "nombre": f"M{j}",
+                                     "material": rnd.choice(["Melamina Blanca", "Roble Kendal"])}
+                                    for j in range(40)]
+                 for i in range(n_obras)}
+        t, resultado = _cronometrar(lambda: optimizar_lote(obras, usar_cache=False), repeticiones=1)
+        piezas = sum(r["piezas"] for data in resultado.values() for r in data["proyectos"].values())
+        print(f"{n_obras:>6} {piezas:>7} {sum(d['cant_placas'] for d in resultado.values()):>7} "
+              f"{sum(d['cota_inferior'] for d in resultado.values()):>5} {t:>11.2f}")
+
+
+def bench_despiece_batch():
+    print("Despiece de un edificio: un DataFrame por módulo vs generar_despiece_batch "
+          "(los módulos repetidos se despiezan una vez)")
+    print(f"{'módulos':>8} {'distintos':>9} {'filas':>6} {'por módulo (ms)':>16} {'batch (ms)':>11}")
+    rnd = random.Random(0)
+    tipos = ["Bajo Mesada", "Alacena", "Cajonera", "Placard"]
+    for n in (120, 480, 2000):
+        configs = []
+        for _ in range(n):
+            tipo = rnd.choice(tipos)
+            configs.append({
+                "tipo": tipo, "ancho_m": rnd.choice([400, 600, 800, 900, 1200]),
+                "alto_m": 2100 if tipo == "Placard" else rnd.choice([700, 720]),
+                "prof_m": rnd.choice([350, 560, 600]), "esp_real": 18,
+                "cant_cajones": 3, "estantes_fijos": 1, "estantes_moviles": 1,
+            })
+        t_uno, dfs = _cronometrar(lambda: [pd.DataFrame(generar_despiece_bvm(**c)) for c in configs])
+        t_batch, tabla = _cronometrar(lambda: generar_despiece_batch(configs))
+        assert len(tabla["Pieza"]) == sum(len(df) for df in dfs)
+        distintos = len({json.dumps(c, sort_keys=True) for c in configs})
+        print(f"{n:>8} {distintos:>9} {len(tabla['Pieza']):>6} {t_uno * 1000:>16.1f} {t_batch * 1000:>11.1f}")
+
+
+if __name__ == "__main__":
+    bench_placas_bajo_demanda()
+    print()
+    bench_expansion_piezas()
+    print()
+    bench_veta()
+    print()
+    bench_busqueda_local()
+    print()
+    bench_lote()
+    print()
+    bench_despiece_batch()
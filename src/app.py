@@ -28,6 +28,15 @@ from motor import (
     obtener_veta_automatica,
     calcular_medida_frente,
     calcular_ahorro_retazos,
+    es_retazo_util,
+    precio_m2,
+    FORMATOS_DISPONIBLES,
+    catalogo as catalogo_formatos,
+    estimar_placas,
+    CLASE_FONDO,
+    args_despiece as _args_despiece_desde_params,
+    generar_despiece_batch,
+    generar_dxf_patrones,
 )
 try:
     from motor.brs_bks import validar_medidas_brs, validar_herrajes_bks
@@ -39,7 +48,9 @@ except ImportError:
         return []
 
 try:
-    from motor.optimizador import optimizar_obra, generar_svg_placa, PLACA_ANCHO_DEFAULT, PLACA_ALTO_DEFAULT
+    from motor.optimizador import (optimizar_obra, reoptimizar_obra, optimizar_lote, generar_svg_placa, material_fondo,
+                                   PLACA_ANCHO_DEFAULT, PLACA_ALTO_DEFAULT, TIEMPO_EXACTO_DEFAULT, TIEMPO_BUSQUEDA_DEFAULT)
+    from motor.lineal import optimizar_lineal_obra
     _OPTIMIZADOR_DISPONIBLE = True
 except ImportError:
     _OPTIMIZADOR_DISPONIBLE = False
@@ -509,6 +520,27 @@ def registrar_retazo(material, largo, ancho):
             st.error(f"Error: {int(largo)}x{int(ancho)} inferior al mínimo 150x400.")
     except Exception as e:
         st.error(f"Error al registrar: {e}")
+
+def registrar_retazos_lote(material, medidas):
+    """Guarda varios retazos del mismo material en un solo insert.
+    medidas: lista de dicts con "largo" y "ancho" (p. ej. los sobrantes
+    que devuelve el optimizador)."""
+    filas = [
+        {"material": material, "largo": m["largo"], "ancho": m["ancho"],
+         "user_id": _user_id(), "taller_id": _taller_id_actual()}
+        for m in medidas if es_retazo_util(m["largo"], m["ancho"])
+    ]
+    if not filas:
+        return 0
+    try:
+        supabase.table("retazos").insert(filas).execute()
+        _traer_retazos_db.clear()
+        st.toast(f"{len(filas)} retazo(s) guardados en el depósito")
+        return len(filas)
+    except Exception as e:
+        st.error(f"Error al registrar: {e}")
+        return 0
+
 
 
 # ===========================================================================
@@ -1835,51 +1867,6 @@ def _codigo_tipo_pieza(nombre_pieza: str) -> str:
             return codigo
     return "PZ"
 
-def _args_despiece_desde_params(params: dict) -> dict:
-    tipo_modulo = params.get("tipo_modulo", params.get("tipo", "Bajo Mesada"))
-    return {
-        "tipo": tipo_modulo,
-        "ancho_m": _safe_float(params.get("ancho_m", params.get("ancho", 0))),
-        "alto_m": _safe_float(params.get("alto_m", params.get("alto", 0))),
-        "prof_m": _safe_float(params.get("prof_m", params.get("prof", 0))),
-        "esp_real": _safe_float(params.get("esp_real", 18)),
-        "tiene_parante": bool(params.get("tiene_frentin_placard", params.get("tiene_parante", False))) if tipo_modulo == "Placard" else bool(params.get("tiene_parante", False)),
-        "tipo_parante": params.get("tipo_parante", "Corto (100mm)"),
-        "distancia_parante": _safe_float(params.get("distancia_parante", 0)),
-        "cant_cajones": _safe_int(params.get("cant_cajones", 0)),
-        "tipo_tapa": params.get("tipo_tapa", "Superpuesta"),
-        "tipo_base": params.get("tipo_base", "Nada"),
-        "altura_base": _safe_float(params.get("altura_base", 0)),
-        "luz_entre_tapas": _safe_float(params.get("luz_entre_tapas", 3.0)),
-        "luz_perimetral_tapa": _safe_float(params.get("luz_perimetral_tapa", 4.0)),
-        "alto_frentin_emb": _safe_float(params.get("alto_frentin_emb", 0)),
-        "aire_trasero": _safe_float(params.get("aire_trasero", 30)),
-        "esp_corredera": _safe_float(params.get("esp_corredera", 13)),
-        "distribucion_tapas": params.get("distribucion_tapas", "Iguales"),
-        "cant_puertas": _safe_int(params.get("cant_puertas", 2)),
-        "tiene_cenefa": bool(params.get("tiene_cenefa", False)),
-        "alto_cenefa": _safe_float(params.get("alto_cenefa", 0)),
-        "estantes_fijos": _safe_int(params.get("estantes_fijos", 0)),
-        "estantes_moviles": _safe_int(params.get("estantes_moviles", 0)),
-        "tipo_estante_manual": params.get("tipo_estante_manual", "Completo"),
-        "sin_fondo": bool(params.get("sin_fondo", False)),
-        "tiene_parante_medio": bool(params.get("tiene_parante_medio", False)),
-        "division_placard": params.get("division_placard", "Sin division"),
-        "zona_izq": params.get("zona_izq", "Solo estantes"),
-        "zona_der": params.get("zona_der", "Solo estantes"),
-        "zona_unica": params.get("zona_unica", "Solo estantes"),
-        "altura_tubo": _safe_float(params.get("altura_tubo", 1200)),
-        "cant_estantes_izq_fijos": _safe_int(params.get("cant_estantes_izq_fijos", 0)),
-        "cant_estantes_izq_moviles": _safe_int(params.get("cant_estantes_izq_moviles", 0)),
-        "cant_estantes_der_fijos": _safe_int(params.get("cant_estantes_der_fijos", 0)),
-        "cant_estantes_der_moviles": _safe_int(params.get("cant_estantes_der_moviles", 0)),
-        "cant_estantes_unica_fijos": _safe_int(params.get("cant_estantes_unica_fijos", 1)),
-        "cant_estantes_unica_moviles": _safe_int(params.get("cant_estantes_unica_moviles", 0)),
-        "cant_cajones_placard": _safe_int(params.get("cant_cajones_placard", 0)),
-        "cant_paneles": _safe_int(params.get("cant_paneles", 1)),
-        "nota_pieza": params.get("nota_pieza", "") if tipo_modulo == "Pieza Suelta" else "",
-    }
-
 def _generar_orden_produccion(mods):
     filas = []
     for idx_mod, mod in enumerate([m for m in mods if m is not None], start=1):
@@ -1907,13 +1894,17 @@ def _generar_orden_produccion(mods):
             })
     return pd.DataFrame(filas)
 
-def _df_corte_desde_modulo(mod):
+def _df_corte_desde_modulo(mod, piezas=None):
+    """df_corte del módulo, o su despiece normalizado si no lo trae.
+    piezas: despiece ya calculado (p. ej. por generar_despiece_batch); si
+    no viene, se genera con la cache de despieces."""
     df = mod.get("df_corte") if isinstance(mod, dict) else None
     if isinstance(df, pd.DataFrame) and not df.empty:
         return df.copy()
 
-    params = _params_desde_mod(mod)
-    piezas = _generar_despiece_cached(json.dumps(_args_despiece_desde_params(params), sort_keys=True))
+    if piezas is None:
+        params = _params_desde_mod(mod)
+        piezas = _generar_despiece_cached(json.dumps(_args_despiece_desde_params(params), sort_keys=True))
     df = pd.DataFrame(piezas)
     if df.empty:
         return df
@@ -1927,9 +1918,20 @@ def _df_corte_desde_modulo(mod):
     return df
 
 def _modulos_con_df_corte(mods):
+    """Módulos con su df_corte. Los que no lo traen se despiezan todos
+    juntos con generar_despiece_batch (los repetidos se calculan una vez)."""
+    mods = [m for m in mods if m is not None]
+    faltan = [i for i, m in enumerate(mods)
+              if not (isinstance(m, dict) and isinstance(m.get("df_corte"), pd.DataFrame) and not m["df_corte"].empty)]
+    despieces = {i: [] for i in faltan}
+    if faltan:
+        tabla = pd.DataFrame(generar_despiece_batch([_args_despiece_desde_params(_params_desde_mod(mods[i]))
+                                                     for i in faltan]))
+        for k, df in tabla.groupby("modulo", sort=False):
+            despieces[faltan[k]] = df.drop(columns="modulo").reset_index(drop=True)
     salida = []
-    for mod in [m for m in mods if m is not None]:
-        df = _df_corte_desde_modulo(mod)
+    for i, mod in enumerate(mods):
+        df = _df_corte_desde_modulo(mod, despieces.get(i))
         if df is None or df.empty:
             continue
         mod_copia = dict(mod)
@@ -1937,6 +1939,38 @@ def _modulos_con_df_corte(mods):
         salida.append(mod_copia)
     return salida
 
+def _modulos_internos_de_obra(mods):
+    """Módulos guardados de una obra (params["modulos"] de la venta) en el
+    formato interno de obra_modulos, sin df_corte."""
+    salida = []
+    for m in mods:
+        p = _params_desde_mod(m)
+        salida.append({
+            "nombre":    m.get("nombre", p.get("nombre","")),
+            "tipo":      m.get("tipo_modulo", p.get("tipo_modulo","")),
+            "ancho":     _safe_int(m.get("ancho_m", p.get("ancho_m", 0))),
+            "alto":      _safe_int(m.get("alto_m",  p.get("alto_m",  0))),
+            "prof":      _safe_int(m.get("prof_m",  p.get("prof_m",  0))),
+            "material":  m.get("mat_principal", p.get("mat_principal","")),
+            "precio":    m.get("precio", p.get("precio_guardado", 0)),
+            "tipo_tapa": p.get("tipo_tapa","Superpuesta"),
+            "df_corte":  None,
+            "params":    p,
+        })
+    return salida
+
+def _modulos_de_venta(row):
+    """Módulos con df_corte de una venta guardada (fila de Historial), para
+    el corte semanal. Los proyectos que no son obra van como un módulo."""
+    try:
+        params = json.loads(row.get("parametros") or "{}")
+    except (TypeError, ValueError):
+        return []
+    if not isinstance(params, dict) or not params:
+        return []
+    mods = params.get("modulos", []) if params.get("es_obra") else [params]
+    return _modulos_con_df_corte(_modulos_internos_de_obra(mods))
+
 def _csv_orden_produccion(df_prod: pd.DataFrame) -> bytes:
     if df_prod is None or df_prod.empty:
         return b""
@@ -2221,6 +2255,7 @@ if menu == "🪵 Cotizador":
     df_corte = pd.DataFrame()
     costo_madera = costo_fondo = costo_herrajes = precio_final = total_costo = 0.0
     m2_18mm = m2_fondo = costo_operativo = utilidad = 0.0
+    est_placas = None
     tiene_parante       = _v("tiene_parante", False)
     tiene_parante_medio = _v("tiene_parante_medio", False)
     tipo_parante        = _v("tipo_parante", "Corto (100mm)")
@@ -2650,10 +2685,13 @@ Para piezas que no entran en ningún módulo automático:<br>
 
               df_placa  = df_corte[~df_corte["Tipo"].isin(["Fondo","Piso"])]
               m2_18mm   = (df_placa["L"] * df_placa["A"] * df_placa["Cant"]).sum() / 1_000_000
-              costo_madera = m2_18mm * (maderas.get(mat_principal, 0.0) / 5.03)
+              # Placas que consume el módulo según el estimador calibrado con las
+              # corridas del optimizador (el optimizador completo va a pedido)
+              est_placas   = estimar_placas({tipo_modulo: m2_18mm})
+              costo_madera = est_placas["placas"] * maderas.get(mat_principal, 0.0)
               df_fondo_ = df_corte[df_corte["Tipo"].isin(["Fondo","Piso"])]
               m2_fondo  = (df_fondo_["L"] * df_fondo_["A"] * df_fondo_["Cant"]).sum() / 1_000_000 if not df_fondo_.empty else 0.0
-              costo_fondo = 0.0 if sin_fondo else m2_fondo * (fondos.get(mat_fondo_sel, 0.0) / 5.03)
+              costo_fondo = 0.0 if sin_fondo else estimar_placas({CLASE_FONDO: m2_fondo})["placas"] * fondos.get(mat_fondo_sel, 0.0)
               costo_herrajes  = sum(config.get(k, 0.0) * v for k, v in herrajes_extra_sel.items())
               costo_operativo = dias_prod * config.get("gastos_fijos_diarios", 0)
               total_costo     = costo_madera + costo_fondo + costo_herrajes + costo_operativo + costo_base
@@ -2695,6 +2733,9 @@ Para piezas que no entran en ningún módulo automático:<br>
           if precio_a_usar > 0:
               _nota = "guardado" if precio_final == 0 and _precio_guardado > 0 else "calculado"
               st.metric("Valor", f"${precio_a_usar:,.0f}", _nota)
+              if est_placas:
+                  st.caption(f"El precio incluye la madera con {est_placas['desperdicio_pct']:.0f}% de desperdicio estimado "
+                             f"({est_placas['placas']:.2f} placas).")
           else:
               st.metric("Valor", "$0", "faltan medidas")
 
@@ -2704,6 +2745,9 @@ Para piezas que no entran en ningún módulo automático:<br>
               ("Profundidad", f"{prof_m:.0f} mm"),
               ("M² placa", f"{m2_18mm:.2f}"),
           ]
+          if est_placas:
+              _resumen_filas.append(("Placas (estimado)", f"{est_placas['placas']:.2f} · {est_placas['minimo']}–{est_placas['maximo']} enteras"
+                                                         f" · {est_placas['desperdicio_pct']:.0f}% desperdicio"))
           if not es_empleado:
               _resumen_filas.extend([
                   ("Costo real", f"${total_costo_real:,.0f}"),
@@ -3067,28 +3111,167 @@ Para piezas que no entran en ningún módulo automático:<br>
                     col_pa, col_pb = st.columns(2)
                     _placa_w = col_pa.number_input("Ancho de placa estándar (mm)", value=PLACA_ANCHO_DEFAULT, step=10.0, key="opt_placa_w")
                     _placa_h = col_pb.number_input("Alto de placa estándar (mm)", value=PLACA_ALTO_DEFAULT, step=10.0, key="opt_placa_h")
-
-                    if st.button("🧩 Calcular optimización", use_container_width=True, key="btn_optimizar"):
-                        with st.spinner("Calculando la mejor distribución de piezas..."):
+                    _tipos_corte = {
+                        "Seccionadora (solo cortes de lado a lado)": "guillotina",
+                        "Libre (CNC / MaxRects)": "maxrects",
+                    }
+                    _tipo_corte = st.radio("Tipo de corte", list(_tipos_corte), horizontal=True, key="opt_tipo_corte")
+                    col_pc, col_pd = st.columns(2)
+                    _opt_portafolio = col_pc.checkbox("Probar varias estrategias en paralelo", value=True, key="opt_portafolio",
+                                                      help="Corre varios algoritmos y órdenes de piezas en todos los núcleos y se queda con el de menos placas.")
+                    _opt_tiempo = col_pd.number_input("Tiempo máximo (s)", min_value=1.0, max_value=60.0, value=3.0, step=1.0,
+                                                      key="opt_tiempo", disabled=not _opt_portafolio)
+                    _opt_formatos = st.multiselect(
+                        "Formatos de placa para comprar", [f["nombre"] for f in FORMATOS_DISPONIBLES], default=[],
+                        key="opt_formatos",
+                        help="Si elegís formatos, se busca la combinación de placas más barata (con el precio de cada "
+                             "material) en vez de usar la placa de arriba.")
+                    _opt_usar_retazos = st.checkbox("Usar primero los retazos del depósito", value=False, key="opt_usar_retazos",
+                                                    help="Ubica las piezas en los retazos disponibles del mismo material antes de abrir placas nuevas.")
+                    _opt_tiras = st.checkbox("Ripear primero las piezas angostas en tiras", value=False, key="opt_tiras",
+                                             help="Junta travesaños, frentines y laterales de cajón del mismo ancho en tiras a lo largo "
+                                                  "de la placa, como se cortan en la seccionadora, y optimiza en 2D solo el resto.")
+                    _opt_retazos_obj = st.checkbox("Priorizar retazos aprovechables", value=False, key="opt_objetivo_retazos",
+                                                   help="Con la misma cantidad de placas, busca dejar el sobrante en retazos grandes "
+                                                        "que se puedan guardar en vez de tiras finas. Tarda un poco más.")
+                    _opt_mejorar = st.checkbox("Buscar más a fondo la última placa", value=False, key="opt_mejorar",
+                                               help="Después de las estrategias, prueba una búsqueda exacta (obras chicas) y una "
+                                                    "búsqueda local para sacar la placa casi vacía. Usa el mismo tiempo máximo.")
+                    col_sg1, col_sg2 = st.columns(2)
+                    _opt_seg_corte = col_sg1.number_input("Segundos por corte (seccionadora)", min_value=1.0, max_value=120.0,
+                                                          value=12.0, step=1.0, key="opt_seg_corte")
+                    _opt_seg_giro = col_sg2.number_input("Segundos por giro", min_value=0.0, max_value=120.0,
+                                                         value=20.0, step=1.0, key="opt_seg_giro",
+                                                         help="Entre layouts con las mismas placas se elige el que menos tarda en la "
+                                                              "seccionadora (menos cortes y menos giros de 90°).")
+                    _tiempos_sierra = {"corte_s": _opt_seg_corte, "giro_s": _opt_seg_giro}
+
+                    _precios_opt = {_mat_f: maderas.get(_mat_f) or fondos.get(_mat_f, 0.0)
+                                    for _m in _mods_opt for _mat_f in (_m.get("material"), material_fondo(_m)) if _mat_f}
+                    _previo_opt = st.session_state.get("_resultado_optimizacion")
+                    if _previo_opt:
+                        col_pe, col_pf = st.columns(2)
+                        _btn_completo = col_pe.button("🔄 Re-optimizar todo", use_container_width=True, key="btn_optimizar")
+                        if col_pf.button("➕ Actualizar con los cambios de la obra", use_container_width=True, key="btn_optimizar_incremental",
+                                         help="Mantiene las placas ya armadas: ubica las piezas de módulos nuevos en el espacio libre y "
+                                              "solo rehace las placas de módulos quitados."):
                             try:
-                                _resultado_opt = optimizar_obra(_mods_opt, placa_ancho=_placa_w, placa_alto=_placa_h)
-                                st.session_state["_resultado_optimizacion"] = _resultado_opt
+                                st.session_state["_resultado_optimizacion"] = reoptimizar_obra(
+                                    _previo_opt, _mods_opt, algoritmo=_tipos_corte[_tipo_corte], precios=_precios_opt,
+                                    tiempos_sierra=_tiempos_sierra)
+                                st.session_state["_resultado_lineal"] = optimizar_lineal_obra(_mods_opt)
                             except Exception as _e_opt:
-                                st.error(f"No se pudo calcular la optimización: {_e_opt}")
-                                st.session_state["_resultado_optimizacion"] = None
+                                st.error(f"No se pudo actualizar la optimización: {_e_opt}")
+                    else:
+                        _btn_completo = st.button("🧩 Calcular optimización", use_container_width=True, key="btn_optimizar")
+
+                    if _btn_completo:
+                        _barra_opt = st.progress(0.0, text="Calculando la mejor distribución de piezas...")
+                        _estado_opt = st.empty()
+                        _mejores_opt = {}
+
+                        def _mostrar_progreso_opt(ev):
+                            _mejores_opt[ev["material"]] = ev
+                            _texto_fase = "Mejorando layouts" if ev.get("fase") == "mejora" else "Probando estrategias"
+                            _barra_opt.progress(min(1.0, ev["terminadas"] / max(ev["total"], 1)),
+                                                text=f"{_texto_fase}... {ev['transcurrido_s']:.1f} s")
+                            _estado_opt.markdown("  \n".join(
+                                f"**{_m}**: {_e['cant_placas']} placas · {_e['desperdicio_pct']}% desperdicio · "
+                                f"mínimo teórico {_e['cota_inferior']}"
+                                for _m, _e in _mejores_opt.items()
+                            ))
+
+                        try:
+                            _resultado_opt = optimizar_obra(_mods_opt, placa_ancho=_placa_w, placa_alto=_placa_h,
+                                                            algoritmo=_tipos_corte[_tipo_corte],
+                                                            deadline_s=_opt_tiempo if _opt_portafolio else None,
+                                                            on_progreso=_mostrar_progreso_opt,
+                                                            retazos=consultar_retazos_disponibles("Todos") if _opt_usar_retazos else None,
+                                                            formatos={_mat_f: catalogo_formatos(_precio_f, _opt_formatos)
+                                                                      for _mat_f, _precio_f in _precios_opt.items()} if _opt_formatos else None,
+                                                            tiras=_opt_tiras,
+                                                            objetivo="retazos" if _opt_retazos_obj else "placas",
+                                                            precios=_precios_opt,
+                                                            tiempos_sierra=_tiempos_sierra,
+                                                            exacto_s=TIEMPO_EXACTO_DEFAULT if _opt_mejorar else None,
+                                                            busqueda_local_s=TIEMPO_BUSQUEDA_DEFAULT if _opt_mejorar else None)
+                            st.session_state["_resultado_optimizacion"] = _resultado_opt
+                            st.session_state["_resultado_lineal"] = optimizar_lineal_obra(_mods_opt)
+                        except Exception as _e_opt:
+                            st.error(f"No se pudo calcular la optimización: {_e_opt}")
+                            st.session_state["_resultado_optimizacion"] = None
+                        _barra_opt.empty()
+                        _estado_opt.empty()
 
                     _resultado_opt = st.session_state.get("_resultado_optimizacion")
                     if _resultado_opt:
                         for _mat, _data in _resultado_opt.items():
                             st.markdown(f"#### {_mat}")
-                            c_o1, c_o2 = st.columns(2)
+                            c_o1, c_o2, c_o3 = st.columns(3)
                             c_o1.metric("Placas necesarias", f"{_data['cant_placas']}")
                             c_o2.metric("Desperdicio", f"{_data['desperdicio_pct']}%")
-                            for i_p, _layout in enumerate(_data["placas"]):
-                                st.caption(f"Placa {i_p+1} de {_mat} — {len(_layout)} pieza(s)")
-                                _svg_placa = generar_svg_placa(_layout, _data["placa_ancho"], _data["placa_alto"])
+                            c_o3.metric("Gap vs. óptimo", f"{_data['gap_pct']}%", f"mínimo {_data['cota_inferior']} placas",
+                                        delta_color="off", help="0% = no existe un layout con menos placas.")
+                            if "cant_cortes" in _data:
+                                st.caption(f"Layout guillotina: {_data['cant_cortes']} cortes de lado a lado en total.")
+                            if _data.get("tiempo_sierra_s") is not None:
+                                st.caption(f"⏱️ Seccionadora: ~{_data['tiempo_sierra_s'] / 60:.0f} min para las "
+                                           f"{_data['cant_placas'] - _data.get('placas_solo_cnc', 0)} placa(s) guillotina.")
+                            if _data.get("placas_solo_cnc"):
+                                st.warning(f"{_data['placas_solo_cnc']} placa(s) no se pueden cortar de lado a lado: van al CNC.")
+                            if _data.get("tiras"):
+                                st.caption(f"Tiras ripeadas: {len(_data['tiras'])} — " + " · ".join(
+                                    f"{_t['ancho']:g}×{_t['largo']:g} ({len(_t['piezas'])} pzs, placa {_t['placa'] + 1})"
+                                    for _t in _data["tiras"]))
+                            elif _data.get("tiras_descartadas"):
+                                st.caption("Ripear las piezas angostas en tiras usaba más placas: se dejó el layout sin tiras.")
+                            if "costo_total" in _data:
+                                st.caption(f"Compra más barata: ${_data['costo_total']:,.0f} — " + " · ".join(
+                                    f"{_r['cantidad']} × {_r['formato']} (${_r['subtotal']:,.0f})" for _r in _data["resumen_formatos"]))
+                            if _data.get("retazos_usados"):
+                                st.success(f"♻️ Se usan {len(_data['retazos_usados'])} retazo(s) del depósito: "
+                                           + ", ".join(f"#{_r}" for _r in _data["retazos_usados"]))
+                                for _pr in _data["placas_retazo"]:
+                                    st.caption(f"Retazo #{_pr['retazo_id']} ({_pr['largo']}×{_pr['ancho']} mm) — {len(_pr['piezas'])} pieza(s)")
+                                    _svg_retazo = generar_svg_placa(_pr["piezas"], _pr["largo"], _pr["ancho"], max_width_px=400)
+                                    st.markdown(f'<div style="text-align:center;margin-bottom:12px;">{_svg_retazo}</div>', unsafe_allow_html=True)
+                            _sobrantes = _data.get("retazos_sobrantes") or []
+                            if _sobrantes:
+                                c_s1, c_s2 = st.columns([3, 1])
+                                _valor_ret = f" — {_data['area_retazos_m2']:.2f} m² recuperables" + (
+                                    f" (${_data['valor_retazos']:,.0f} a acreditar)" if _data.get("valor_retazos") else "")
+                                c_s1.caption(f"Quedan {len(_sobrantes)} retazo(s) aprovechables: "
+                                             + ", ".join(f"{_s['largo']}×{_s['ancho']}" for _s in _sobrantes) + _valor_ret)
+                                if c_s2.button("♻️ Guardar sobrantes", key=f"btn_sobrantes_{_mat}", use_container_width=True):
+                                    registrar_retazos_lote(_mat, _sobrantes)
+                            for _pat in _data.get("patrones") or []:
+                                _nros = ", ".join(str(i + 1) for i in _pat["placas"])
+                                st.caption(f"Patrón {_pat['patron']} × {_pat['cantidad']} de {_mat} — "
+                                           f"{len(_pat['layout'])} pieza(s) por placa · placa(s) {_nros}")
+                                _sec = _pat.get("secuencia")
+                                if _sec:
+                                    st.caption(f"Secuencia: {_sec['cant_cortes']} cortes · {_sec['cant_giros']} giros · "
+                                               f"~{_sec['tiempo_s'] / 60:.1f} min por placa — " + " → ".join(
+                                                   "giro" if _p["tipo"] == "giro" else f"{_p['tipo']} {_p['corte']}{_p['pos']:g}"
+                                                   for _p in _sec["pasos"]))
+                                _svg_placa = generar_svg_placa(_pat["layout"], _pat["placa_ancho"], _pat["placa_alto"])
                                 st.markdown(f'<div style="text-align:center;margin-bottom:12px;">{_svg_placa}</div>', unsafe_allow_html=True)
                             st.write("---")
+                        _resultado_lin = st.session_state.get("_resultado_lineal")
+                        if _resultado_lin:
+                            st.markdown("#### Barras")
+                            st.dataframe(pd.DataFrame([
+                                {"Stock": _stock, "Barras": _lin["cant_barras"], "Largo barra (mm)": _lin["largo_barra"],
+                                 "Desperdicio": f"{_lin['desperdicio_pct']}%",
+                                 "Cortes": " | ".join(" + ".join(f"{_c['largo']:g}" for _c in _b["cortes"]) for _b in _lin["barras"])}
+                                for _stock, _lin in _resultado_lin.items()
+                            ]), use_container_width=True, hide_index=True)
+                            st.caption("Tubos y demás perfiles se cortan de barras: no entran en las placas. Las piezas angostas de "
+                                       "cuerpo van en tiras con la opción de ripear tiras de arriba.")
+                        if ezdxf is not None:
+                            st.download_button("📐 Descargar DXF de patrones de corte", data=generar_dxf_patrones(_resultado_opt),
+                                               file_name=f"DXF_Patrones_{cliente_obra or 'obra'}.dxf", mime="application/dxf",
+                                               use_container_width=True, key="btn_dxf_patrones")
 
         if st.button("💾 Guardar proyecto", use_container_width=True):
             if not cliente_obra:
@@ -3189,6 +3372,63 @@ elif menu == "📋 Historial":
             c2.metric("🟡 Señas cobradas",  f"${total_senas:,.0f}", f"{len(df_sen)} proyectos")
             c3.metric("🟢 Pagados",         f"${total_pag:,.0f}",   f"{len(df_hist[df_hist['estado']=='Pagado'])} proyectos")
             st.write("---")
+
+            if _OPTIMIZADOR_DISPONIBLE:
+                with st.expander("🗓️ Corte semanal (varios proyectos juntos)", expanded=False):
+                    _df_lote = df_hist.sort_values("fecha", ascending=False) if "fecha" in df_hist.columns else df_hist
+                    _etiquetas_lote = {row_l.get("id"): f"{row_l.get('cliente', 'Sin nombre')} — {row_l.get('mueble', '')} "
+                                                         f"({str(row_l.get('fecha', ''))[:10]})"
+                                       for _, row_l in _df_lote.iterrows() if row_l.get("id") is not None}
+                    _ids_lote = st.multiselect("Proyectos a cortar juntos", list(_etiquetas_lote),
+                                               format_func=lambda i: _etiquetas_lote[i], key="lote_ids",
+                                               help="Se juntan las piezas de todos los proyectos elegidos y se optimizan "
+                                                    "por material en las mismas placas. Cada pieza sigue sabiendo de qué proyecto es.")
+                    col_l1, col_l2 = st.columns(2)
+                    _tiempo_lote = col_l1.number_input("Tiempo máximo (s)", min_value=5.0, max_value=120.0, value=20.0,
+                                                       step=5.0, key="lote_tiempo")
+                    _tipo_lote = col_l2.selectbox("Tipo de corte", ["Seccionadora (guillotina)", "Libre (CNC)"], key="lote_tipo")
+                    _mejorar_lote = st.checkbox("Buscar más a fondo la última placa", value=True, key="lote_mejorar",
+                                                help="Búsqueda exacta y local por material dentro del mismo tiempo máximo.")
+                    if st.button("🧩 Optimizar juntos", use_container_width=True, key="btn_lote", disabled=len(_ids_lote) < 2):
+                        _filas_lote = {row_l.get("id"): row_l for _, row_l in _df_lote.iterrows()}
+                        _obras_lote = {}
+                        with st.spinner("Armando los despieces..."):
+                            for _id_l in _ids_lote:
+                                _mods_l = _modulos_de_venta(_filas_lote[_id_l])
+                                if _mods_l:
+                                    _obras_lote[_id_l] = _mods_l
+                                else:
+                                    st.warning(f"{_etiquetas_lote[_id_l]}: sin módulos para cortar, se omite.")
+                        try:
+                            with st.spinner("Optimizando el corte de la semana..."):
+                                st.session_state["_resultado_lote"] = optimizar_lote(
+                                    _obras_lote, algoritmo="guillotina" if _tipo_lote.startswith("Seccionadora") else "maxrects",
+                                    deadline_s=_tiempo_lote,
+                                    exacto_s=TIEMPO_EXACTO_DEFAULT if _mejorar_lote else None,
+                                    busqueda_local_s=TIEMPO_BUSQUEDA_DEFAULT if _mejorar_lote else None)
+                        except Exception as _e_lote:
+                            st.error(f"No se pudo optimizar el lote: {_e_lote}")
+                            st.session_state["_resultado_lote"] = None
+
+                    _resultado_lote = st.session_state.get("_resultado_lote")
+                    if _resultado_lote:
+                        for _mat_l, _data_l in _resultado_lote.items():
+                            st.markdown(f"#### {_mat_l}")
+                            c_l1, c_l2, c_l3 = st.columns(3)
+                            c_l1.metric("Placas", f"{_data_l['cant_placas']}")
+                            c_l2.metric("Desperdicio", f"{_data_l['desperdicio_pct']}%")
+                            c_l3.metric("Mínimo teórico", f"{_data_l['cota_inferior']}")
+                            st.dataframe(pd.DataFrame([
+                                {"Proyecto": _etiquetas_lote.get(_pr, _pr), "Piezas": _r["piezas"], "m²": _r["area_m2"],
+                                 "Placas": ", ".join(str(i + 1) for i in _r["placas"])}
+                                for _pr, _r in _data_l.get("proyectos", {}).items()
+                            ]), use_container_width=True, hide_index=True)
+                            for _pat in _data_l.get("patrones") or []:
+                                st.caption(f"Patrón {_pat['patron']} × {_pat['cantidad']} — placa(s) "
+                                           + ", ".join(str(i + 1) for i in _pat["placas"]))
+                                st.markdown(f'<div style="text-align:center;margin-bottom:12px;">'
+                                            f'{generar_svg_placa(_pat["layout"], _pat["placa_ancho"], _pat["placa_alto"])}</div>',
+                                            unsafe_allow_html=True)
             col_busq, col_filt = st.columns([2, 3])
             busqueda = col_busq.text_input("🔍 Buscar cliente", placeholder="Nombre del cliente...", label_visibility="collapsed")
             filtro   = col_filt.radio("Mostrar", ["Todos","Pendiente","Señado","Pagado"], horizontal=True)
@@ -3283,21 +3523,7 @@ elif menu == "📋 Historial":
                                 mods      = params.get("modulos", [])
                                 cliente_h = row.get('cliente','')
 
-                                mods_internos = []
-                                for m in mods:
-                                    p = _params_desde_mod(m)
-                                    mods_internos.append({
-                                        "nombre":    m.get("nombre", p.get("nombre","")),
-                                        "tipo":      m.get("tipo_modulo", p.get("tipo_modulo","")),
-                                        "ancho":     _safe_int(m.get("ancho_m", p.get("ancho_m", 0))),
-                                        "alto":      _safe_int(m.get("alto_m",  p.get("alto_m",  0))),
-                                        "prof":      _safe_int(m.get("prof_m",  p.get("prof_m",  0))),
-                                        "material":  m.get("mat_principal", p.get("mat_principal","")),
-                                        "precio":    m.get("precio", p.get("precio_guardado", 0)),
-                                        "tipo_tapa": p.get("tipo_tapa","Superpuesta"),
-                                        "df_corte":  None,
-                                        "params":    p,
-                                    })
+                                mods_internos = _modulos_internos_de_obra(mods)
 
                                 _logistica_guardada = params.get("logistica", {}) if isinstance(params.get("logistica"), dict) else {}
                                 st.session_state["obra_modulos"]            = mods_internos
@@ -3372,7 +3598,7 @@ elif menu == "♻️ Retazos":
         if largo_r > 0 and ancho_r > 0:
             es_util = (largo_r>=400 and ancho_r>=150) or (largo_r>=150 and ancho_r>=400)
             area    = (largo_r * ancho_r) / 1_000_000
-            valor   = area * (maderas.get(mat_r,0) / 5.03)
+            valor   = area * precio_m2(maderas.get(mat_r,0))
             if es_util:
                 st.success(f"Válido — {largo_r}×{ancho_r} mm — {area:.3f} m² — Valor est. ${valor:,.0f}")
             else:
@@ -3405,7 +3631,7 @@ elif menu == "♻️ Retazos":
                     c_i, c_a2, c_d = st.columns([3,2,1])
                     largo = ret.get('largo',0); ancho = ret.get('ancho',0)
                     area  = (largo*ancho)/1_000_000
-                    valor = area * (maderas.get(mat,0)/5.03)
+                    valor = area * precio_m2(maderas.get(mat,0))
                     c_i.markdown(f"**{int(largo)} × {int(ancho)} mm**")
                     c_a2.caption(f"{area:.3f} m² — ${valor:,.0f}")
                     ret_id = ret.get('id')
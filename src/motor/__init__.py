@@ -1,7 +1,11 @@
-from .despiece import generar_despiece_bvm, obtener_veta_automatica, calcular_medida_frente
+from .despiece import (generar_despiece_bvm, generar_despiece_batch, obtener_veta_automatica, calcular_medida_frente,
+                       args_despiece)
 from .retazos import es_retazo_util, pieza_entra_en_retazo, calcular_ahorro_retazos
+from .formatos_placa import FORMATOS_DISPONIBLES, M2_PLACA_REFERENCIA, catalogo, precio_m2
+from .estimador import estimar_placas, CLASE_FONDO
 try:
-    from .exportadores import generar_pdf_presupuesto, generar_dxf_bvm, exportar_para_aspire, generar_link_whatsapp
+    from .exportadores import (generar_pdf_presupuesto, generar_dxf_bvm, exportar_para_aspire,
+                               generar_link_whatsapp, generar_dxf_patrones)
 except ImportError:
     def _exportador_no_disponible(*args, **kwargs):
         raise RuntimeError("Exportadores no disponibles: falta una dependencia opcional.")
@@ -10,6 +14,7 @@ except ImportError:
     generar_dxf_bvm = _exportador_no_disponible
     exportar_para_aspire = _exportador_no_disponible
     generar_link_whatsapp = _exportador_no_disponible
+    generar_dxf_patrones = _exportador_no_disponible
 
 try:
     from .brs_bks import validar_medidas_brs, validar_herrajes_bks
@@ -20,10 +25,22 @@ except ImportError:
     def validar_herrajes_bks(params: dict, config: dict) -> list[str]:
         return []
 
-try:
-    from .optimizador import optimizar_obra, generar_svg_placa, PLACA_ANCHO_DEFAULT, PLACA_ALTO_DEFAULT
-except ImportError:
-    optimizar_obra = None
-    generar_svg_placa = None
-    PLACA_ANCHO_DEFAULT = 2440.0
-    PLACA_ALTO_DEFAULT = 1830.0
+_SIN_OPTIMIZADOR = {
+    "optimizar_obra": None,
+    "generar_svg_placa": None,
+    "PLACA_ANCHO_DEFAULT": 2440.0,
+    "PLACA_ALTO_DEFAULT": 1830.0,
+}
+
+
+def __getattr__(nombre):
+    # El optimizador (y rectpack) se carga recién cuando se usa: el
+    # Cotizador no lo necesita y `python -m motor.optimizador` tiene que
+    # encontrarlo sin importar
+    if nombre not in _SIN_OPTIMIZADOR:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    try:
+        from . import optimizador
+    except ImportError:
+        return _SIN_OPTIMIZADOR[nombre]
+    return getattr(optimizador, nombre)
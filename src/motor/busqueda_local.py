@@ -0,0 +1,155 @@
+# motor/busqueda_local.py
+# Búsqueda local "ruin and recreate" — BVM
+#
+# El layout de una pasada (MaxRects o guillotina) suele terminar con una
+# última placa casi vacía: unas pocas piezas que no entraron en el resto.
+# Esta fase lo mejora sobre el layout ya armado:
+#   1. "ruin": vacía la placa menos llena y, al azar, una o dos más;
+#   2. "recreate": reubica esas piezas en orden aleatorio (de mayor a menor
+#      área con ruido) en el espacio libre de las placas que quedaron, y
+#      abre placas nuevas solo para lo que no entra.
+# Se acepta el cambio si no empeora (menos placas o, con las mismas, el
+# espacio libre más concentrado en pocas placas), y se guarda el mejor.
+#
+# Con objetivo="retazos", entre layouts con las mismas placas se prefiere
+# el que deja más área en retazos aprovechables (es_retazo_util): un
+# sobrante de 600×1200 vale plata, veinte tiras de 30 mm son basura.
+#
+# Es determinística: con la misma semilla y la misma cantidad de
+# iteraciones da el mismo layout, así el resultado se puede cachear. El
+# tiempo límite es solo un tope de seguridad.
+
+import copy
+import random
+import time
+
+from .guillotina import PlacaGuillotina
+from .retazos import rectangulos_disjuntos, es_retazo_util
+
+ITERACIONES_DEFAULT = 200
+TIEMPO_BUSQUEDA_DEFAULT = 5.0   # s — tope por material
+SEMILLA_DEFAULT = 0
+OBJETIVOS = ("placas", "retazos")
+
+
+def area_retazos(layout, ancho, alto):
+    """Área (mm²) de los retazos aprovechables que deja una placa: los
+    rectángulos libres disjuntos que pasan es_retazo_util."""
+    ocupados = [(p["x"], p["y"], p["w"], p["h"]) for p in layout]
+    return sum(w * h for _, _, w, h in rectangulos_disjuntos(ocupados, ancho, alto, es_retazo_util))
+
+
+def _costo(placas, objetivo, ancho, alto, memo):
+    """Menor es mejor: primero menos placas; con objetivo "retazos",
+    después más área en retazos aprovechables; y al final más área en las
+    placas más llenas (suma de llenados al cuadrado, con signo menos).
+    memo guarda el área de retazos por layout, que solo cambia en las
+    placas que recibieron piezas."""
+    llenado = [sum(p["w"] * p["h"] for p in pl["layout"]) for pl in placas]
+    concentracion = -sum(a * a for a in llenado)
+    if objetivo != "retazos":
+        return len(placas), concentracion
+    retazos = 0
+    for pl in placas:
+        clave = id(pl["layout"])
+        if clave not in memo:
+            memo[clave] = (pl["layout"], area_retazos(pl["layout"], ancho, alto))
+        retazos += memo[clave][1]
+    return len(placas), -retazos, concentracion
+
+
+def _hoja_placa(layout, arbol, ancho, alto):
+    """PlacaGuillotina con el espacio libre de una placa armada: las hojas
+    libres del árbol o, sin árbol, huecos disjuntos del layout."""
+    if arbol is not None:
+        return PlacaGuillotina(ancho, alto, arbol=copy.deepcopy(arbol))
+    ocupados = [(p["x"], p["y"], p["w"], p["h"]) for p in layout]
+    libres = [{"x": x, "y": y, "w": w, "h": h} for x, y, w, h in rectangulos_disjuntos(ocupados, ancho, alto)]
+    return PlacaGuillotina(ancho, alto, libres=libres)
+
+
+def _recrear(pool, rota, conservadas, ancho, alto, regla):
+    """Ubica las piezas de `pool` (en ese orden) en el espacio libre de las
+    placas conservadas o en placas nuevas. Las placas conservadas se
+    copian recién cuando reciben una pieza. Devuelve la lista de placas
+    resultante, o None si alguna pieza no entra ni en una placa vacía."""
+    abiertas = [[pl, pl["placa"], []] for pl in conservadas]
+    for k, pieza in enumerate(pool):
+        mejor, destino = None, None
+        for entrada in abiertas:
+            cand = entrada[1].mejor_hoja(pieza["w"], pieza["h"], rota[k], "baf")
+            if cand is not None and (mejor is None or cand[0] < mejor[0]):
+                mejor, destino = cand, entrada
+        if mejor is None:
+            destino = [None, PlacaGuillotina(ancho, alto), []]
+            mejor = destino[1].mejor_hoja(pieza["w"], pieza["h"], rota[k], "baf")
+            if mejor is None:
+                return None
+            abiertas.append(destino)
+        elif destino[0] is not None and destino[1] is destino[0]["placa"]:
+            destino[1] = copy.deepcopy(destino[1])
+        _, i_hoja, w, h = mejor
+        destino[1].colocar(i_hoja, w, h, pieza["nombre"], regla)
+        destino[2].append({**pool[k], "x": destino[1].piezas[-1][1], "y": destino[1].piezas[-1][2],
+                           "w": w, "h": h})
+
+    return [
+        {"layout": (pl["layout"] if pl else []) + agregadas, "placa": placa}
+        for pl, placa, agregadas in abiertas
+    ]
+
+
+def mejorar(layouts, ancho, alto, rotable, arboles=None, regla="slas", semilla=SEMILLA_DEFAULT,
+            iteraciones=ITERACIONES_DEFAULT, tiempo_limite_s=TIEMPO_BUSQUEDA_DEFAULT, objetivo="placas"):
+    """
+    Ruin and recreate sobre un layout armado.
+
+    layouts: lista de placas, cada una lista de piezas {"nombre","x","y","w","h",...}.
+    rotable(pieza): si esa pieza del layout puede girar (según su veta).
+    arboles: árboles de corte por placa si el layout es guillotina; las
+    placas reconstruidas también lo son y traen su árbol.
+    objetivo: "placas" o "retazos" (ver _costo).
+
+    Devuelve (layouts, arboles) del mejor layout encontrado, o None si no
+    mejoró.
+    """
+    if not layouts:
+        return None
+    rnd = random.Random(semilla)
+    limite = time.monotonic() + tiempo_limite_s
+    con_arbol = arboles is not None
+    actual = [{"layout": l, "placa": _hoja_placa(l, arboles[i] if con_arbol else None, ancho, alto)}
+              for i, l in enumerate(layouts)]
+    if objetivo not in OBJETIVOS:
+        raise ValueError(f"Objetivo desconocido: {objetivo}")
+    memo = {}
+    costo_actual = costo_inicial = _costo(actual, objetivo, ancho, alto, memo)
+    mejor = None
+
+    for _ in range(iteraciones):
+        if time.monotonic() > limite:
+            break
+        llenado = [sum(p["w"] * p["h"] for p in pl["layout"]) for pl in actual]
+        menos_llena = min(range(len(actual)), key=lambda i: llenado[i])
+        otras = [i for i in range(len(actual)) if i != menos_llena]
+        ruina = {menos_llena, *rnd.sample(otras, min(len(otras), rnd.randint(1, 2)))}
+
+        pool = [dict(p) for i in sorted(ruina) for p in actual[i]["layout"]]
+        ruido = [rnd.uniform(0.7, 1.3) for _ in pool]
+        orden = sorted(range(len(pool)), key=lambda k: -pool[k]["w"] * pool[k]["h"] * ruido[k])
+        pool = [pool[k] for k in orden]
+        conservadas = [pl for i, pl in enumerate(actual) if i not in ruina]
+        candidato = _recrear(pool, [rotable(p) for p in pool], conservadas, ancho, alto, regla)
+        if candidato is None:
+            continue
+        costo = _costo(candidato, objetivo, ancho, alto, memo)
+        if costo <= costo_actual:
+            actual, costo_actual = candidato, costo
+            if costo < costo_inicial and (mejor is None or costo < mejor[0]):
+                mejor = (costo, candidato)
+
+    if mejor is None:
+        return None
+    placas = mejor[1]
+    return ([pl["layout"] for pl in placas],
+            [pl["placa"].arbol for pl in placas] if con_arbol else None)
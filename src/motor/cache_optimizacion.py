@@ -0,0 +1,102 @@
+# motor/cache_optimizacion.py
+# Cache persistente de optimizaciones — BVM
+#
+# Optimizar el corte de una obra grande lleva segundos, y el resultado
+# depende solo de las piezas de cada material, la placa, el kerf y la
+# estrategia (con el tiempo que tiene cada fase de búsqueda: el portafolio
+# es "anytime" y con más tiempo puede dar menos placas). Se guarda en
+# SQLite bajo un hash de esos datos (las piezas como multiconjunto de
+# medidas, rotación y tipo: ni el orden de los módulos ni los nombres de
+# las piezas cambian la clave), así que reabrir un proyecto guardado, o
+# que otro usuario del taller abra la misma obra, devuelve el layout al
+# instante. Quien lee le pone al layout los nombres de las piezas de la
+# obra actual (ver optimizador._reetiquetar).
+#
+# La cache es un acelerador: si la base (o su carpeta) no se puede abrir
+# o escribir, la optimización sigue igual sin ella.
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+RUTA_CACHE_DEFAULT = os.environ.get(
+    "BVM_CACHE_OPTIMIZACION",
+    str(Path(__file__).resolve().parents[2] / ".cache" / "optimizacion.sqlite3"),
+)
+
+
+def clave_material(piezas, placa_ancho, placa_alto, kerf, estrategia):
+    """Hash SHA-256 del multiconjunto de piezas (largo, ancho, rotable y
+    tipo) de un material junto con la placa, el kerf y la estrategia. Los
+    nombres, módulos y proyectos no entran: no cambian el layout."""
+    filas = sorted(zip(
+        (round(float(l), 1) for l in piezas["largo"]),
+        (round(float(a), 1) for a in piezas["ancho"]),
+        (bool(r) for r in piezas.get("rotable", [True] * len(piezas["largo"]))),
+        (str(t) for t in piezas["tipo"]),
+    ))
+    contenido = json.dumps(
+        [filas, round(float(placa_ancho), 1), round(float(placa_alto), 1), round(float(kerf), 1), estrategia],
+        separators=(",", ":"), ensure_ascii=False,
+    )
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def _conectar(ruta):
+    Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(ruta, timeout=5)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS optimizaciones ("
+        " clave TEXT PRIMARY KEY, resultado TEXT NOT NULL, creado REAL NOT NULL)"
+    )
+    return conn
+
+
+def leer(claves, ruta=None):
+    """claves: {material: clave}. Devuelve {material: resultado} solo con
+    los materiales que ya estaban en la cache."""
+    if not claves:
+        return {}
+    try:
+        conn = _conectar(ruta or RUTA_CACHE_DEFAULT)
+        try:
+            marcas = ",".join("?" * len(claves))
+            filas = conn.execute(
+                f"SELECT clave, resultado FROM optimizaciones WHERE clave IN ({marcas})",
+                list(claves.values()),
+            ).fetchall()
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        return {}
+    por_clave = dict(filas)
+    return {m: json.loads(por_clave[c]) for m, c in claves.items() if c in por_clave}
+
+
+def guardar(resultados, claves, ruta=None):
+    """Guarda {material: resultado} bajo la clave de cada material."""
+    filas = [
+        (claves[m], json.dumps(data, ensure_ascii=False, default=_a_json), time.time())
+        for m, data in resultados.items() if m in claves
+    ]
+    if not filas:
+        return
+    try:
+        conn = _conectar(ruta or RUTA_CACHE_DEFAULT)
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO optimizaciones VALUES (?, ?, ?)", filas)
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def _a_json(valor):
+    # Escalares de NumPy que puedan quedar en los layouts
+    if hasattr(valor, "item"):
+        return valor.item()
+    raise TypeError(f"No serializable: {type(valor).__name__}")
@@ -0,0 +1,127 @@
+# motor/cotas.py
+# Cotas inferiores de placas — BVM
+#
+# Ningún layout puede usar menos placas que estas cotas. Sirven para dos
+# cosas: saber cuándo el optimizador ya llegó al óptimo (y cortar la
+# búsqueda) y reportar el "gap" de optimalidad junto al desperdicio.
+#
+# - cota_area: área total de piezas / área de la placa (cota continua).
+# - cota_l1:   proyección 1D. Dos piezas de más de media placa de ancho no
+#              pueden ir una al lado de la otra, así que en cada placa sus
+#              altos suman como mucho el alto de la placa (y viceversa).
+# - cota_l2:   cota L2 de Martello-Toth sobre esas mismas proyecciones 1D,
+#              que además cuenta las piezas que no pueden compartir placa.
+#
+# Todas contemplan la rotación: una pieza solo cuenta en una proyección si
+# cuenta en TODAS las orientaciones en que entra en la placa.
+
+import math
+from bisect import bisect_left, bisect_right
+
+from .piezas import dims_enteras
+
+
+def _orientaciones(largo, ancho, placa_ancho, placa_alto, rotacion):
+    opciones = [(largo, ancho), (ancho, largo)] if rotacion else [(largo, ancho)]
+    return [(w, h) for w, h in opciones if w <= placa_ancho and h <= placa_alto]
+
+
+def _proyecciones(dims, placa_ancho, placa_alto, rotacion):
+    """Devuelve (altos, anchos): el alto efectivo de cada pieza "ancha"
+    (w > placa_ancho/2) y el ancho efectivo de cada pieza "alta"
+    (h > placa_alto/2). Las piezas que no entran en la placa se ignoran."""
+    altos, anchos = [], []
+    for largo, ancho in dims:
+        orients = _orientaciones(largo, ancho, placa_ancho, placa_alto, rotacion)
+        if not orients:
+            continue
+        alto_ef = min(h if w > placa_ancho / 2 else 0 for w, h in orients)
+        ancho_ef = min(w if h > placa_alto / 2 else 0 for w, h in orients)
+        if alto_ef > 0:
+            altos.append(alto_ef)
+        if ancho_ef > 0:
+            anchos.append(ancho_ef)
+    return altos, anchos
+
+
+def _l2_1d(tamanios, capacidad):
+    """Cota L2 de Martello-Toth para bin packing 1D. Para cada umbral alfa
+    (0 y cada tamaño <= capacidad/2):
+        J1 = {t > C - alfa}, J2 = {C/2 < t <= C - alfa}, J3 = {alfa <= t <= C/2}
+        L(alfa) = |J1| + |J2| + max(0, ceil((sum(J3) - (|J2|·C - sum(J2))) / C))
+    Se resuelve con búsqueda binaria y sumas acumuladas sobre la lista
+    ordenada, así es O(n log n) aunque haya miles de piezas."""
+    if not tamanios:
+        return 0
+    orden = sorted(tamanios)
+    acum = [0]
+    for t in orden:
+        acum.append(acum[-1] + t)
+
+    def _suma(i, j):
+        return acum[j] - acum[i]
+
+    n = len(orden)
+    mitad = capacidad / 2
+    i_mitad = bisect_right(orden, mitad)
+    mejor = math.ceil(acum[-1] / capacidad)
+    for alfa in {0, *orden[:i_mitad]}:
+        i_tope = bisect_right(orden, capacidad - alfa)
+        n_j1 = n - i_tope
+        n_j2 = max(0, i_tope - i_mitad)
+        libre_j2 = n_j2 * capacidad - _suma(i_mitad, i_mitad + n_j2)
+        suma_j3 = _suma(bisect_left(orden, alfa), i_mitad)
+        extra = max(0, math.ceil((suma_j3 - libre_j2) / capacidad))
+        mejor = max(mejor, n_j1 + n_j2 + extra)
+    return mejor
+
+
+def cota_area(dims, placa_ancho, placa_alto):
+    """dims: lista de (largo, ancho) de cada pieza."""
+    area = sum(l * a for l, a in dims)
+    return math.ceil(area / (placa_ancho * placa_alto)) if area > 0 else 0
+
+
+def cota_l1(dims, placa_ancho, placa_alto, rotacion=True):
+    altos, anchos = _proyecciones(dims, placa_ancho, placa_alto, rotacion)
+    return max(math.ceil(sum(altos) / placa_alto), math.ceil(sum(anchos) / placa_ancho))
+
+
+def cota_l2(dims, placa_ancho, placa_alto, rotacion=True):
+    altos, anchos = _proyecciones(dims, placa_ancho, placa_alto, rotacion)
+    return max(_l2_1d(altos, placa_alto), _l2_1d(anchos, placa_ancho))
+
+
+def cota_inferior(dims, placa_ancho, placa_alto, rotacion=True):
+    """La mejor (mayor) de las tres cotas."""
+    if not dims:
+        return 0
+    return max(
+        cota_area(dims, placa_ancho, placa_alto),
+        cota_l1(dims, placa_ancho, placa_alto, rotacion),
+        cota_l2(dims, placa_ancho, placa_alto, rotacion),
+    )
+
+
+def cotas_por_material(piezas_por_material, placa_ancho, placa_alto, rotacion=True):
+    """
+    Recibe el mismo dict {material: piezas} que optimizar_corte (tablas
+    como las arma _piezas_desde_df, con el kerf ya sumado) y devuelve
+    {material: {"area", "l1", "l2", "cota"}}.
+    """
+    salida = {}
+    for material, piezas in piezas_por_material.items():
+        dims = dims_enteras(piezas)
+        w, h = round(placa_ancho), round(placa_alto)
+        c_area = cota_area(dims, w, h)
+        c_l1 = cota_l1(dims, w, h, rotacion)
+        c_l2 = cota_l2(dims, w, h, rotacion)
+        salida[material] = {"area": c_area, "l1": c_l1, "l2": c_l2, "cota": max(c_area, c_l1, c_l2)}
+    return salida
+
+
+def gap_pct(cant_placas, cota):
+    """Distancia relativa entre el layout y la cota (0 = óptimo probado)."""
+    if cota <= 0:
+        return 0.0
+    return round(100 * (cant_placas - cota) / cota, 1)
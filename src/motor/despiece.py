@@ -1,6 +1,12 @@
 # motor/despiece.py
 # Motor de Despiece Geométrico BVM
 
+import json
+import re
+import unicodedata
+
+import numpy as np
+
 CONFIG_TECNICA = {
     "ranura_profundidad": 10.0,
     "ranura_distancia_borde": 10.0,
@@ -9,15 +15,54 @@ CONFIG_TECNICA = {
 }
 
 
+def _sin_acentos(texto: str) -> str:
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+
+
 def obtener_veta_automatica(nombre_pieza: str, material_seleccionado: str) -> str:
-    if "blanco" in material_seleccionado.lower():
+    # Los lisos blancos no tienen veta: la palabra "Blanco" o "Blanca"
+    # ("Melamina Blanca 18mm"), no cualquier nombre que contenga "blanc"
+    if re.search(r"\bblanc[oa]\b", material_seleccionado.lower()):
         return "Libre (Cualquier sentido)"
-    nombre_lower = nombre_pieza.lower()
-    if any(x in nombre_lower for x in ["lateral exterior", "puerta", "tapa de cajon", "fondo"]):
+    nombre_lower = _sin_acentos(nombre_pieza).lower()
+    # Los laterales y parantes del casco ("Lateral" en alacenas y placards)
+    # van con la veta para arriba, como los laterales exteriores; los del
+    # cajón no. "Fondo" es el fondo del mueble; el "Frente/Fondo Interno"
+    # del cajón va como sus laterales
+    if (any(x in nombre_lower for x in ["puerta", "tapa de cajon", "tapa cajon"])
+            or (nombre_lower.startswith(("lateral", "parante", "fondo")) and "cajon" not in nombre_lower)):
         return "Vertical (Hacia Arriba)"
     return "Horizontal (Izquierda a Derecha)"
 
 
+# Piezas que van paradas en el mueble y se anotan con L = alto: su medida
+# horizontal es A
+_PARADAS_L_ALTO = ("lateral", "parante", "puerta", "tapa", "fondo", "frente/fondo")
+# Listones a lo ancho del mueble (frentines, travesaños, zócalos): su medida
+# horizontal es la larga, esté anotada como L o como A
+_LISTONES = ("frentin", "travesano", "zocalo", "cenefa")
+
+
+def eje_veta(nombre_pieza: str, veta: str, largo: float, ancho: float):
+    """Qué medida de la pieza va a lo largo de la veta de la placa: "L",
+    "A", o None si la veta es libre y la pieza puede girar. "Vertical" es
+    a lo largo del alto (L en las piezas paradas); "Horizontal", a lo largo
+    de la medida horizontal de la pieza en el mueble: A en las piezas
+    paradas, la larga en los listones y L en las que van acostadas
+    (bases, techos, estantes)."""
+    veta = str(veta)
+    if veta.startswith("Libre"):
+        return None
+    if not veta.startswith("Horizontal"):
+        return "L"
+    nombre_lower = _sin_acentos(str(nombre_pieza)).lower()
+    if nombre_lower.startswith(_PARADAS_L_ALTO):
+        return "A"
+    if nombre_lower.startswith(_LISTONES):
+        return "L" if largo >= ancho else "A"
+    return "L"
+
+
 def calcular_medida_frente(ancho_hueco, alto_hueco, tipo_montaje="Superpuesto", es_doble=False):
     if tipo_montaje == "Superpuesto":
         return ancho_hueco - 4, alto_hueco - 4
@@ -28,6 +73,71 @@ def calcular_medida_frente(ancho_hueco, alto_hueco, tipo_montaje="Superpuesto",
 
 
 
+def _a_float(valor, defecto=0.0) -> float:
+    try:
+        if valor is None or valor == "": return defecto
+        return float(str(valor).strip())
+    except (ValueError, TypeError):
+        return defecto
+
+
+def _a_int(valor, defecto=0) -> int:
+    try:
+        if valor is None or valor == "": return defecto
+        return int(float(str(valor).strip()))
+    except (ValueError, TypeError):
+        return defecto
+
+
+def args_despiece(params: dict) -> dict:
+    """Argumentos de generar_despiece_bvm a partir de los params de un
+    módulo guardado (el formato plano de ModuloBVM, con alias como "tipo"
+    o "ancho" de los formatos viejos)."""
+    tipo_modulo = params.get("tipo_modulo", params.get("tipo", "Bajo Mesada"))
+    return {
+        "tipo": tipo_modulo,
+        "ancho_m": _a_float(params.get("ancho_m", params.get("ancho", 0))),
+        "alto_m": _a_float(params.get("alto_m", params.get("alto", 0))),
+        "prof_m": _a_float(params.get("prof_m", params.get("prof", 0))),
+        "esp_real": _a_float(params.get("esp_real", 18)),
+        "tiene_parante": bool(params.get("tiene_frentin_placard", params.get("tiene_parante", False))) if tipo_modulo == "Placard" else bool(params.get("tiene_parante", False)),
+        "tipo_parante": params.get("tipo_parante", "Corto (100mm)"),
+        "distancia_parante": _a_float(params.get("distancia_parante", 0)),
+        "cant_cajones": _a_int(params.get("cant_cajones", 0)),
+        "tipo_tapa": params.get("tipo_tapa", "Superpuesta"),
+        "tipo_base": params.get("tipo_base", "Nada"),
+        "altura_base": _a_float(params.get("altura_base", 0)),
+        "luz_entre_tapas": _a_float(params.get("luz_entre_tapas", 3.0)),
+        "luz_perimetral_tapa": _a_float(params.get("luz_perimetral_tapa", 4.0)),
+        "alto_frentin_emb": _a_float(params.get("alto_frentin_emb", 0)),
+        "aire_trasero": _a_float(params.get("aire_trasero", 30)),
+        "esp_corredera": _a_float(params.get("esp_corredera", 13)),
+        "distribucion_tapas": params.get("distribucion_tapas", "Iguales"),
+        "cant_puertas": _a_int(params.get("cant_puertas", 2)),
+        "tiene_cenefa": bool(params.get("tiene_cenefa", False)),
+        "alto_cenefa": _a_float(params.get("alto_cenefa", 0)),
+        "estantes_fijos": _a_int(params.get("estantes_fijos", 0)),
+        "estantes_moviles": _a_int(params.get("estantes_moviles", 0)),
+        "tipo_estante_manual": params.get("tipo_estante_manual", "Completo"),
+        "sin_fondo": bool(params.get("sin_fondo", False)),
+        "tiene_parante_medio": bool(params.get("tiene_parante_medio", False)),
+        "division_placard": params.get("division_placard", "Sin division"),
+        "zona_izq": params.get("zona_izq", "Solo estantes"),
+        "zona_der": params.get("zona_der", "Solo estantes"),
+        "zona_unica": params.get("zona_unica", "Solo estantes"),
+        "altura_tubo": _a_float(params.get("altura_tubo", 1200)),
+        "cant_estantes_izq_fijos": _a_int(params.get("cant_estantes_izq_fijos", 0)),
+        "cant_estantes_izq_moviles": _a_int(params.get("cant_estantes_izq_moviles", 0)),
+        "cant_estantes_der_fijos": _a_int(params.get("cant_estantes_der_fijos", 0)),
+        "cant_estantes_der_moviles": _a_int(params.get("cant_estantes_der_moviles", 0)),
+        "cant_estantes_unica_fijos": _a_int(params.get("cant_estantes_unica_fijos", 1)),
+        "cant_estantes_unica_moviles": _a_int(params.get("cant_estantes_unica_moviles", 0)),
+        "cant_cajones_placard": _a_int(params.get("cant_cajones_placard", 0)),
+        "cant_paneles": _a_int(params.get("cant_paneles", 1)),
+        "nota_pieza": params.get("nota_pieza", "") if tipo_modulo == "Pieza Suelta" else "",
+    }
+
+
 def generar_despiece_bvm(
     tipo, ancho_m, alto_m, prof_m, esp_real,
     tiene_parante=False, tipo_parante="Corto (100mm)", distancia_parante=0,
@@ -360,3 +470,42 @@ def generar_despiece_bvm(
 
     return despiece
     
+
+
+COLUMNAS_DESPIECE = ("Pieza", "Cant", "L", "A", "Tipo")
+_TIPOS_COLUMNA = {"Cant": int, "L": float, "A": float}
+
+
+def generar_despiece_batch(configs):
+    """
+    Despiece de muchos módulos de una vez (p. ej. las 120 unidades de una
+    torre). configs: lista de dicts con los argumentos de
+    generar_despiece_bvm (ver args_despiece).
+
+    No vectoriza las fórmulas: cada configuración distinta pasa una vez
+    por generar_despiece_bvm y los módulos repetidos reusan sus filas, así
+    que la ganancia depende de cuántos módulos se repiten. Devuelve
+    una tabla columnar {"modulo", "Pieza", "Cant", "L", "A", "Tipo"} de
+    arrays, donde "modulo" es el índice de cada config en `configs`;
+    pd.DataFrame(tabla) da la planilla de corte de toda la obra.
+    """
+    unicas, indice = {}, []
+    for config in configs:
+        clave = json.dumps(config, sort_keys=True, default=str)
+        indice.append(unicas.setdefault(clave, (len(unicas), config))[0])
+    despieces = [generar_despiece_bvm(**config) for _, config in unicas.values()]
+
+    # Filas de cada configuración única, una detrás de otra
+    planas = [p for d in despieces for p in d]
+    columnas = {c: np.array([p[c] for p in planas], dtype=_TIPOS_COLUMNA.get(c, object))
+                for c in COLUMNAS_DESPIECE}
+    largos = np.array([len(d) for d in despieces], dtype=int)
+    inicios = np.cumsum(largos) - largos
+
+    # Cada módulo toma el bloque de filas de su configuración
+    indice = np.array(indice, dtype=int)
+    por_modulo = largos[indice]
+    desplazamiento = np.arange(por_modulo.sum()) - np.repeat(np.cumsum(por_modulo) - por_modulo, por_modulo)
+    filas = np.repeat(inicios[indice], por_modulo) + desplazamiento
+    return {"modulo": np.repeat(np.arange(len(indice)), por_modulo),
+            **{c: v[filas] for c, v in columnas.items()}}
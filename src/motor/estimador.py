@@ -0,0 +1,172 @@
+# motor/estimador.py
+# Estimador instantáneo de placas — BVM
+#
+# El optimizador tarda segundos; el Cotizador recalcula el precio en cada
+# cambio de un widget. Para el precio en vivo alcanza con un modelo:
+#
+#   m² consumidos = Σ_tipo m² de piezas del tipo × (1 + desperdicio_tipo)
+#   placas        = m² consumidos / m² de la placa
+#
+# con un desperdicio por tipo de módulo (un placard de laterales de 2,1 m
+# desperdicia distinto que una cajonera de piezas chicas) y una banda de
+# confianza con el error relativo del modelo, en placas enteras (las que
+# se compran). La cota de área (motor/cotas.py) es el piso de la banda.
+# Los fondos y pisos de cajón (Fibroplus de 3 mm: otro material, con
+# pocas piezas y grandes) no usan el desperdicio de su tipo de módulo
+# sino uno propio, el de CLASE_FONDO.
+#
+# El modelo se recalibra solo: cada corrida del optimizador registra sus
+# m² por tipo y las placas que usó, y los desperdicios se reajustan por
+# mínimos cuadrados (regularizados hacia los de fábrica, para que pocas
+# corridas no lo desarmen). Como la cache de optimizaciones, el archivo
+# del modelo es un acelerador: si no se puede leer o escribir se usan los
+# valores de fábrica.
+
+import json
+import math
+import os
+from pathlib import Path
+from statistics import NormalDist
+
+import numpy as np
+
+from .formatos_placa import M2_PLACA_REFERENCIA
+
+RUTA_MODELO_DEFAULT = os.environ.get(
+    "BVM_MODELO_ESTIMADOR",
+    str(Path(__file__).resolve().parents[2] / ".cache" / "estimador.json"),
+)
+
+# Desperdicio sobre el área neta de las piezas (el kerf cuenta como
+# desperdicio), ajustado con corridas de optimizar_obra sobre obras
+# sintéticas de cada tipo
+DESPERDICIO_DEFAULT = {
+    "Bajo Mesada":  0.18,
+    "Cajonera":     0.15,
+    "Alacena":      0.17,
+    "Placard":      0.20,
+    "Pieza Suelta": 0.22,
+    "Fondo":        0.30,   # CLASE_FONDO, no es un tipo de módulo
+}
+CLASE_FONDO = "Fondo"
+DESPERDICIO_OTROS = 0.18       # tipos sin dato
+ERROR_RELATIVO_DEFAULT = 0.10  # desvío del modelo, relativo a las placas
+MAX_CORRIDAS = 500             # corridas que se guardan para recalibrar
+PESO_PREVIO = 1.0              # cuántas corridas "vale" el valor de fábrica
+# Los modelos guardados antes de CLASE_FONDO tienen corridas de fondos
+# sumadas al tipo de módulo: se descartan
+VERSION_MODELO = 2
+# Con menos placas el redondeo de la última domina el desperdicio medido
+MIN_PLACAS_CALIBRAR = 3
+
+_memo = {}
+
+
+def _modelo_fabrica():
+    return {"desperdicio": dict(DESPERDICIO_DEFAULT), "error_relativo": ERROR_RELATIVO_DEFAULT, "corridas": []}
+
+
+def cargar_modelo(ruta=None):
+    """Modelo calibrado del archivo, o el de fábrica. Se memoiza por fecha
+    de modificación: en cada rerun del Cotizador solo cuesta un stat."""
+    ruta = ruta or RUTA_MODELO_DEFAULT
+    try:
+        marca = os.stat(ruta).st_mtime_ns
+    except OSError:
+        return _modelo_fabrica()
+    if _memo.get(ruta, (None,))[0] != marca:
+        try:
+            with open(ruta, encoding="utf-8") as f:
+                guardado = json.load(f)
+            modelo = {**_modelo_fabrica(), **guardado} if guardado.get("version") == VERSION_MODELO else _modelo_fabrica()
+        except (OSError, ValueError):
+            modelo = _modelo_fabrica()
+        _memo[ruta] = (marca, modelo)
+    return _memo[ruta][1]
+
+
+def estimar_placas(m2_por_tipo, m2_placa=M2_PLACA_REFERENCIA, confianza=0.9, modelo=None):
+    """
+    Placas que va a usar un conjunto de piezas, sin empaquetar.
+
+    m2_por_tipo: {tipo de módulo: m² de piezas de un material}; los
+    fondos y pisos de cajón van bajo CLASE_FONDO.
+    m2_placa: área de la placa (por defecto la de referencia, la de los
+    precios de la configuración).
+
+    Devuelve {"placas" (esperadas, con decimales: lo que se consume),
+    "minimo", "maximo" (placas enteras de la banda de `confianza`),
+    "cota_area", "m2_piezas", "m2_consumidos", "desperdicio_pct"}.
+    """
+    modelo = modelo or cargar_modelo()
+    desperdicio = modelo["desperdicio"]
+    m2_piezas = sum(m2_por_tipo.values())
+    m2_consumidos = sum(m2 * (1 + desperdicio.get(t, DESPERDICIO_OTROS)) for t, m2 in m2_por_tipo.items())
+    placas = m2_consumidos / m2_placa
+    cota = math.ceil(m2_piezas / m2_placa - 1e-9)
+    desvio = NormalDist().inv_cdf(0.5 + confianza / 2) * modelo["error_relativo"] * placas
+    return {
+        "placas": round(placas, 2),
+        "minimo": max(cota, math.ceil(placas - desvio - 1e-9)),
+        "maximo": max(cota, math.ceil(placas + desvio - 1e-9)),
+        "cota_area": cota,
+        "m2_piezas": round(m2_piezas, 3),
+        "m2_consumidos": round(m2_consumidos, 3),
+        "desperdicio_pct": round((m2_consumidos - m2_piezas) / m2_consumidos * 100, 1) if m2_consumidos else 0.0,
+    }
+
+
+def calibrar(corridas, previo=None):
+    """
+    Ajusta el desperdicio por tipo a las corridas [{"m2_por_tipo",
+    "placas", "m2_placa"}]: mínimos cuadrados sobre
+        placas × m2_placa - Σ m² = Σ m²_tipo × desperdicio_tipo
+    con una fila extra por tipo que lo tira hacia `previo` (por defecto,
+    DESPERDICIO_DEFAULT) con peso PESO_PREVIO corridas. Solo cuentan las
+    corridas de MIN_PLACAS_CALIBRAR placas o más; de ellas sale también el
+    error relativo.
+    """
+    previo = previo or DESPERDICIO_DEFAULT
+    corridas = [c for c in corridas if c["placas"] >= MIN_PLACAS_CALIBRAR]
+    if not corridas:
+        return {"desperdicio": dict(previo), "error_relativo": ERROR_RELATIVO_DEFAULT}
+    tipos = sorted({t for c in corridas for t in c["m2_por_tipo"]})
+    a = np.array([[c["m2_por_tipo"].get(t, 0.0) for t in tipos] for c in corridas])
+    y = np.array([c["placas"] * c["m2_placa"] - sum(c["m2_por_tipo"].values()) for c in corridas])
+    escala = PESO_PREVIO * max(a.sum(axis=0).max() / len(corridas), 1e-9)
+    a = np.vstack([a, np.eye(len(tipos)) * escala])
+    y = np.concatenate([y, [previo.get(t, DESPERDICIO_OTROS) * escala for t in tipos]])
+    ajuste = np.clip(np.linalg.lstsq(a, y, rcond=None)[0], 0.0, 1.0)
+    desperdicio = {**previo, **{t: round(float(d), 4) for t, d in zip(tipos, ajuste)}}
+
+    modelo = {"desperdicio": desperdicio, "error_relativo": ERROR_RELATIVO_DEFAULT}
+    relativos = []
+    for c in corridas:
+        esperado = estimar_placas(c["m2_por_tipo"], c["m2_placa"], modelo=modelo)["placas"]
+        relativos.append((c["placas"] - esperado) / esperado)
+    if len(relativos) >= 2:
+        modelo["error_relativo"] = round(float(np.sqrt(np.mean(np.square(relativos)))), 4)
+    return modelo
+
+
+def registrar_corridas(corridas, ruta=None):
+    """Suma corridas del optimizador al archivo del modelo (sin repetir
+    una corrida idéntica, como la de una obra que se reabre) y recalibra.
+    Se guardan las últimas MAX_CORRIDAS."""
+    if not corridas:
+        return
+    ruta = ruta or RUTA_MODELO_DEFAULT
+    previas = cargar_modelo(ruta)["corridas"]
+    vistas = {json.dumps(c, sort_keys=True) for c in previas}
+    nuevas = [c for c in corridas if json.dumps(c, sort_keys=True) not in vistas]
+    if not nuevas:
+        return
+    todas = (previas + nuevas)[-MAX_CORRIDAS:]
+    try:
+        Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+        temporal = f"{ruta}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({**calibrar(todas), "corridas": todas, "version": VERSION_MODELO}, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+    except OSError:
+        pass
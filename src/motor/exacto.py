@@ -0,0 +1,140 @@
+# motor/exacto.py
+# Búsqueda exacta para obras chicas — BVM
+#
+# En un módulo suelto (10 a 25 piezas) una placa de más es todo el margen
+# del trabajo, y las heurísticas a veces la usan. Con tan pocas piezas se
+# puede buscar en serio: branch-and-bound sobre ubicaciones guillotina.
+#
+# Se pregunta "¿entran en k placas?" empezando por una menos que la
+# heurística y bajando hasta la cota inferior (motor/cotas.py). Cada pieza,
+# de mayor a menor área, prueba cada placa abierta (y una sola placa
+# nueva, por simetría), cada hoja libre, cada orientación que permite su
+# veta y los dos sentidos del primer corte. Se poda cuando el área de las
+# piezas que faltan no entra en el área libre que todavía les sirve.
+#
+# La búsqueda no es completa: el orden de las piezas es fijo y cada una
+# va en la esquina de una hoja, cortando al ras de sus lados. Que no
+# encuentre k placas no prueba que no existan; el óptimo solo queda
+# probado cuando el layout llega a la cota inferior.
+#
+# La búsqueda tiene un tiempo límite duro: si se agota, queda lo mejor
+# encontrado (como mínimo, el layout de la heurística).
+
+import time
+
+from .guillotina import PlacaGuillotina
+
+LIMITE_PIEZAS_EXACTO = 25      # piezas: por encima solo corre la heurística
+TIEMPO_EXACTO_DEFAULT = 1.0    # s
+
+
+class _SinTiempo(Exception):
+    pass
+
+
+def _cortes(x, y, lw, lh, w, h):
+    """Las hojas libres que deja la pieza (w, h) en la esquina de la hoja
+    (x, y, lw, lh), para cada sentido del primer corte: [(horizontal,
+    [hojas])]. Si sobra de un solo lado los dos sentidos son iguales."""
+    if w == lw or h == lh:
+        resto = []
+        if w < lw:
+            resto.append((x + w, y, lw - w, lh))
+        if h < lh:
+            resto.append((x, y + h, lw, lh - h))
+        return [(h < lh, resto)]
+    return [
+        (True, [(x, y + h, lw, lh - h), (x + w, y, lw - w, h)]),
+        (False, [(x + w, y, lw - w, lh), (x, y + h, w, lh - h)]),
+    ]
+
+
+def _entra_en_placas(dims, rota, k, placa_ancho, placa_alto, limite):
+    """Busca ubicar todas las piezas en k placas. Devuelve la lista de
+    decisiones (placa, hoja, w, h, idx, horizontal) en orden, o None si
+    no entran. Lanza _SinTiempo al pasar `limite` (time.monotonic)."""
+    orden = sorted(range(len(dims)), key=lambda i: dims[i][0] * dims[i][1], reverse=True)
+    areas = [dims[i][0] * dims[i][1] for i in orden]
+    resto_area = [sum(areas[j:]) for j in range(len(orden) + 1)]
+    lado_min = [min(min(dims[i]) for i in orden[j:]) for j in range(len(orden))]
+    libres = []        # por placa abierta: lista de hojas (x, y, w, h)
+    decisiones = []
+    nodos = [0]
+
+    def _aprovechable(j):
+        total = (k - len(libres)) * placa_ancho * placa_alto
+        for hojas in libres:
+            total += sum(w * h for _, _, w, h in hojas if w >= lado_min[j] and h >= lado_min[j])
+        return total
+
+    def _ubicar(j):
+        if j == len(orden):
+            return True
+        nodos[0] += 1
+        if nodos[0] % 512 == 0 and time.monotonic() > limite:
+            raise _SinTiempo
+        if resto_area[j] > _aprovechable(j):
+            return False
+        idx = orden[j]
+        w, h = dims[idx]
+        orientaciones = [(w, h), (h, w)] if rota[idx] and w != h else [(w, h)]
+        abiertas = len(libres)
+        for p in range(abiertas + 1 if abiertas < k else abiertas):
+            if p == abiertas:
+                libres.append([(0, 0, placa_ancho, placa_alto)])
+            hojas = libres[p]
+            for i_hoja, (x, y, lw, lh) in enumerate(hojas):
+                for ow, oh in orientaciones:
+                    if ow > lw or oh > lh:
+                        continue
+                    for horizontal, nuevas in _cortes(x, y, lw, lh, ow, oh):
+                        libres[p] = hojas[:i_hoja] + hojas[i_hoja + 1:] + nuevas
+                        decisiones.append((p, (x, y, lw, lh), ow, oh, idx, horizontal))
+                        if _ubicar(j + 1):
+                            return True
+                        decisiones.pop()
+                libres[p] = hojas
+        if len(libres) > abiertas:
+            libres.pop()   # la placa nueva no sirvió
+        return False
+
+    return list(decisiones) if _ubicar(0) else None
+
+
+def _armar_placas(decisiones, k, placa_ancho, placa_alto):
+    """Reproduce las decisiones sobre PlacaGuillotina para tener el árbol
+    de cortes de cada placa."""
+    placas = [PlacaGuillotina(placa_ancho, placa_alto) for _ in range(k)]
+    for p, (x, y, lw, lh), w, h, idx, horizontal in decisiones:
+        placa = placas[p]
+        i_hoja = next(i for i, l in enumerate(placa.libres)
+                      if (l["x"], l["y"], l["w"], l["h"]) == (x, y, lw, lh))
+        placa.colocar(i_hoja, w, h, idx, regla=None, horizontal=horizontal)
+    return [p for p in placas if p.piezas]
+
+
+def empaquetar_exacto(dims, placa_ancho, placa_alto, cota, maximo, rotables=None,
+                      tiempo_limite_s=TIEMPO_EXACTO_DEFAULT):
+    """
+    Busca un layout guillotina con menos de `maximo` placas (lo que ya
+    logró la heurística), bajando de a una hasta `cota`.
+
+    Devuelve (placas, optimo): placas es la lista de PlacaGuillotina del
+    mejor layout encontrado (None si no mejoró a la heurística) y optimo
+    dice si quedó probado que no hay uno con menos placas, es decir, si
+    el mejor layout llegó a la cota (una cota válida de motor/cotas.py).
+    """
+    limite = time.monotonic() + tiempo_limite_s
+    rota = list(rotables) if rotables is not None else [True] * len(dims)
+    mejor = None
+    k = maximo - 1
+    try:
+        while k >= max(cota, 1):
+            decisiones = _entra_en_placas(dims, rota, k, placa_ancho, placa_alto, limite)
+            if decisiones is None:
+                break
+            mejor = _armar_placas(decisiones, k, placa_ancho, placa_alto)
+            k = len(mejor) - 1
+    except _SinTiempo:
+        pass
+    return mejor, (len(mejor) if mejor is not None else maximo) <= cota
@@ -109,6 +109,38 @@ def generar_dxf_bvm(df) -> bytes:
     return out.getvalue().encode("utf-8")
 
 
+def generar_dxf_patrones(resultado_opt, separacion=200):
+    """DXF con un dibujo por patrón de corte (no por placa): el contorno de
+    la placa y cada pieza en su posición, con "Material — Patrón A × 6"."""
+    doc = ezdxf.new("R2010", setup=True)
+    doc.header["$INSUNITS"] = 4  # milimetros
+    for capa, color in (("CUT", 7), ("LABEL", 3), ("MODULE", 5)):
+        doc.layers.new(capa, dxfattribs={"color": color})
+    msp = doc.modelspace()
+    y0 = 0
+    for material, data in resultado_opt.items():
+        x0 = 0
+        alto_fila = 0
+        for pat in data.get("patrones") or []:
+            ancho, alto = pat["placa_ancho"], pat["placa_alto"]
+            alto_fila = max(alto_fila, alto)
+            msp.add_lwpolyline([(x0, y0), (x0 + ancho, y0), (x0 + ancho, y0 + alto), (x0, y0 + alto)],
+                               close=True, dxfattribs={"layer": "MODULE"})
+            msp.add_text(f"{material} — Patrón {pat['patron']} × {pat['cantidad']}", height=30,
+                         dxfattribs={"layer": "MODULE"}).set_placement((x0, y0 + alto + 30))
+            for p in pat["layout"]:
+                x, y, w, h = x0 + p["x"], y0 + p["y"], p["w"], p["h"]
+                msp.add_lwpolyline([(x, y), (x + w, y), (x + w, y + h), (x, y + h)], close=True, dxfattribs={"layer": "CUT"})
+                msp.add_text(f"{p['nombre']} {int(w)}x{int(h)}", height=10,
+                             dxfattribs={"layer": "LABEL"}).set_placement((x + 6, y + 12))
+            x0 += ancho + separacion
+        y0 += alto_fila + separacion + 60
+
+    out = io.StringIO()
+    doc.write(out)
+    return out.getvalue().encode("utf-8")
+
+
 # ---------------------------------------------------------------------------
 # CSV PARA ASPIRE / CNC
 # ---------------------------------------------------------------------------
@@ -0,0 +1,47 @@
+# motor/formatos_placa.py
+# Formatos de placa — BVM
+#
+# Los precios de maderas y fondos de la configuración son por placa entera
+# de 2750×1830 mm (5,03 m²). Acá vive ese formato de referencia, para que
+# el costo por m² no dependa de un número suelto, y el catálogo de formatos
+# que se pueden comprar con su precio, que es lo que usa el optimizador
+# para elegir la combinación de placas más barata.
+
+FORMATO_REFERENCIA = {"nombre": "Entera 2750×1830", "ancho": 2750.0, "alto": 1830.0}
+M2_PLACA_REFERENCIA = FORMATO_REFERENCIA["ancho"] * FORMATO_REFERENCIA["alto"] / 1_000_000
+
+# recargo: sobreprecio por m² respecto de la placa de referencia (las
+# medias placas se pagan el corte en el corralón)
+# veta: lado por el que corre la veta ("ancho" o "alto"). La media placa
+# sale de partir la entera de 2750 al medio, así que su veta va por 1375.
+FORMATOS_DISPONIBLES = [
+    {"nombre": "Entera 2750×1830", "ancho": 2750.0, "alto": 1830.0, "recargo": 1.0, "veta": "ancho"},
+    {"nombre": "Entera 2600×1830", "ancho": 2600.0, "alto": 1830.0, "recargo": 1.0, "veta": "ancho"},
+    {"nombre": "Entera 2440×1830", "ancho": 2440.0, "alto": 1830.0, "recargo": 1.0, "veta": "ancho"},
+    {"nombre": "Media 1830×1375",  "ancho": 1830.0, "alto": 1375.0, "recargo": 1.1, "veta": "alto"},
+]
+
+
+def precio_m2(precio_placa):
+    """Precio por m² a partir del precio de la placa de referencia."""
+    return precio_placa / M2_PLACA_REFERENCIA
+
+
+def catalogo(precio_placa, formatos=None):
+    """
+    Formatos con su precio para un material, a partir del precio de su
+    placa de referencia (el valor de maderas/fondos en la configuración).
+    formatos: lista de formatos o de nombres de FORMATOS_DISPONIBLES
+    (por defecto, todos). Devuelve [{"nombre","ancho","alto","veta","precio"}].
+    """
+    por_nombre = {f["nombre"]: f for f in FORMATOS_DISPONIBLES}
+    elegidos = [por_nombre[f] if isinstance(f, str) else f for f in (formatos or FORMATOS_DISPONIBLES)]
+    return [
+        {
+            "nombre": f["nombre"], "ancho": f["ancho"], "alto": f["alto"],
+            "veta": f.get("veta", "ancho"),
+            "precio": round(precio_m2(precio_placa) * f["ancho"] * f["alto"] / 1_000_000
+                            * f.get("recargo", 1.0), 2),
+        }
+        for f in elegidos
+    ]
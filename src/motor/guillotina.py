@@ -0,0 +1,302 @@
+# motor/guillotina.py
+# Motor de Corte Guillotina — BVM
+#
+# La seccionadora del taller solo hace cortes de lado a lado: cada corte
+# parte un rectángulo en dos rectángulos. MaxRects no respeta eso, así que
+# sus layouts hay que re-planificarlos a mano antes de cortar.
+#
+# Este motor empaqueta piezas respetando la restricción guillotina y
+# guarda, por cada placa, el árbol de cortes que la genera:
+#   - nodo de corte: {"x","y","w","h","corte": "H"|"V","pos": coord,"hijos": [a, b]}
+#   - hoja con pieza: {"x","y","w","h","pieza": ...}
+#   - hoja libre (sobrante): {"x","y","w","h"}
+# "H" es un corte horizontal (a lo largo del eje x, en y=pos) y "V" uno
+# vertical (a lo largo del eje y, en x=pos).
+
+import time
+
+# Regla de división del rectángulo libre después de ubicar una pieza
+# (nomenclatura de Jylänki, "A Thousand Ways to Pack the Bin").
+REGLAS_DIVISION = ("slas", "llas", "sas", "las", "min_area", "max_area")
+
+# Criterio para elegir en qué rectángulo libre va cada pieza
+SELECCIONES = ("baf", "bssf", "blsf")
+
+# Orden en que se presentan las piezas al motor (siempre de mayor a menor)
+ORDENES = {
+    "area":       lambda d: d[0] * d[1],
+    "lado_largo": lambda d: (max(d), min(d)),
+    "perimetro":  lambda d: d[0] + d[1],
+}
+
+
+class TiempoAgotado(Exception):
+    """Se pasó el plazo `fin` (time.time) de un empaquetado: el portafolio
+    la usa para cortar las estrategias que siguen corriendo en el pool."""
+
+
+def _division_horizontal(regla, libre_w, libre_h, w, h):
+    """Decide si el primer corte del rectángulo libre es horizontal
+    (franja de alto h a todo el ancho) o vertical (franja de ancho w)."""
+    sobra_w = libre_w - w
+    sobra_h = libre_h - h
+    if regla == "slas":
+        return sobra_w <= sobra_h
+    if regla == "llas":
+        return sobra_w > sobra_h
+    if regla == "sas":
+        return libre_w <= libre_h
+    if regla == "las":
+        return libre_w > libre_h
+    if regla == "min_area":
+        return w * sobra_h > sobra_w * h
+    if regla == "max_area":
+        return w * sobra_h <= sobra_w * h
+    raise ValueError(f"Regla de división desconocida: {regla}")
+
+
+def _puntaje(seleccion, libre_w, libre_h, w, h):
+    """Menor es mejor."""
+    if seleccion == "baf":
+        return (libre_w * libre_h - w * h, min(libre_w - w, libre_h - h))
+    sobra_corto = min(libre_w - w, libre_h - h)
+    sobra_largo = max(libre_w - w, libre_h - h)
+    if seleccion == "bssf":
+        return (sobra_corto, sobra_largo)
+    if seleccion == "blsf":
+        return (sobra_largo, sobra_corto)
+    raise ValueError(f"Selección desconocida: {seleccion}")
+
+
+def _partir(nodo, corte, pos):
+    """Convierte la hoja `nodo` en un nodo de corte y devuelve sus dos hijos
+    (el que contiene el origen primero)."""
+    if corte == "H":
+        a = {"x": nodo["x"], "y": nodo["y"], "w": nodo["w"], "h": pos - nodo["y"]}
+        b = {"x": nodo["x"], "y": pos, "w": nodo["w"], "h": nodo["y"] + nodo["h"] - pos}
+    else:
+        a = {"x": nodo["x"], "y": nodo["y"], "w": pos - nodo["x"], "h": nodo["h"]}
+        b = {"x": pos, "y": nodo["y"], "w": nodo["x"] + nodo["w"] - pos, "h": nodo["h"]}
+    nodo["corte"] = corte
+    nodo["pos"] = pos
+    nodo["hijos"] = [a, b]
+    return a, b
+
+
+def _ubicar(nodo, w, h, pieza, horizontal):
+    """Ubica la pieza en la esquina (x, y) de la hoja libre `nodo`, cortando
+    el sobrante en hasta dos hojas libres nuevas. Devuelve las hojas libres
+    resultantes."""
+    x, y, libre_w, libre_h = nodo["x"], nodo["y"], nodo["w"], nodo["h"]
+    libres = []
+    actual = nodo
+    if horizontal:
+        primero, segundo = ("H", y + h), ("V", x + w)
+        necesita_primero, necesita_segundo = h < libre_h, w < libre_w
+    else:
+        primero, segundo = ("V", x + w), ("H", y + h)
+        necesita_primero, necesita_segundo = w < libre_w, h < libre_h
+
+    if necesita_primero:
+        actual, resto = _partir(actual, *primero)
+        libres.append(resto)
+    if necesita_segundo:
+        actual, resto = _partir(actual, *segundo)
+        libres.append(resto)
+    actual["pieza"] = pieza
+    return libres
+
+
+def trozar_hoja(hoja, largos, piezas):
+    """Parte con cortes verticales la hoja `hoja` (una tira ya ubicada) en
+    tramos de esos largos, uno por pieza, de izquierda a derecha. Lo que
+    sobre a la derecha queda como hoja libre."""
+    hoja.pop("pieza", None)
+    actual, x = hoja, hoja["x"]
+    for largo, pieza in zip(largos, piezas):
+        x += largo
+        if x < actual["x"] + actual["w"]:
+            tramo, actual = _partir(actual, "V", x)
+            tramo["pieza"] = pieza
+        else:
+            actual["pieza"] = pieza
+            return
+
+
+def hojas_libres(arbol):
+    """Devuelve las hojas libres (sin pieza ni corte) de un árbol de cortes."""
+    libres = []
+    pendientes = [arbol]
+    while pendientes:
+        nodo = pendientes.pop()
+        if "hijos" in nodo:
+            pendientes.extend(reversed(nodo["hijos"]))
+        elif "pieza" not in nodo:
+            libres.append(nodo)
+    return libres
+
+
+def contar_cortes(arbol):
+    """Cantidad de cortes de lado a lado que tiene el árbol de una placa."""
+    total = 0
+    pendientes = [arbol]
+    while pendientes:
+        nodo = pendientes.pop()
+        if "hijos" in nodo:
+            total += 1
+            pendientes.extend(nodo["hijos"])
+    return total
+
+
+class PlacaGuillotina:
+    """Una placa en proceso de empaquetado: su árbol de cortes y la lista de
+    hojas libres donde todavía se pueden ubicar piezas."""
+
+    def __init__(self, ancho, alto, arbol=None, libres=None):
+        """arbol: árbol de una placa ya empezada, para seguir llenando sus
+        hojas libres. libres: hojas libres explícitas, para completar un
+        layout que no salió de este motor (p. ej. MaxRects); en ese caso
+        el árbol no describe la placa."""
+        self.ancho = ancho
+        self.alto = alto
+        self.arbol = arbol or {"x": 0, "y": 0, "w": ancho, "h": alto}
+        self.libres = hojas_libres(self.arbol) if libres is None else libres
+        self.area_libre = sum(l["w"] * l["h"] for l in self.libres)
+        self.piezas = []  # (pieza, x, y, w, h)
+
+    def mejor_hoja(self, w, h, rotable, seleccion):
+        """Devuelve (puntaje, índice de hoja, w, h) del mejor lugar para la
+        pieza en esta placa, o None si no entra."""
+        if w * h > self.area_libre:
+            return None
+        mejor = None
+        for i, libre in enumerate(self.libres):
+            for ow, oh in ((w, h), (h, w)) if rotable and w != h else ((w, h),):
+                if ow <= libre["w"] and oh <= libre["h"]:
+                    p = _puntaje(seleccion, libre["w"], libre["h"], ow, oh)
+                    if mejor is None or p < mejor[0]:
+                        mejor = (p, i, ow, oh)
+        return mejor
+
+    def colocar(self, i_hoja, w, h, pieza, regla, horizontal=None):
+        """Ubica la pieza en la hoja libre i_hoja. horizontal fija el
+        sentido del primer corte; si es None lo decide la regla."""
+        hoja = self.libres.pop(i_hoja)
+        if horizontal is None:
+            horizontal = _division_horizontal(regla, hoja["w"], hoja["h"], w, h)
+        self.libres.extend(_ubicar(hoja, w, h, pieza, horizontal))
+        self.area_libre -= w * h
+        self.piezas.append((pieza, hoja["x"], hoja["y"], w, h))
+
+
+def _rotacion_por_pieza(n, rotacion, rotables):
+    return list(rotables) if rotables is not None else [rotacion] * n
+
+
+def empaquetar_guillotina(dims, placa_ancho, placa_alto, regla="slas",
+                          seleccion="baf", orden="area", rotacion=True, rotables=None,
+                          fin=None):
+    """
+    Empaqueta rectángulos con cortes guillotina.
+
+    dims: lista de (ancho, alto) — el índice de cada rectángulo es su id.
+    rotables: lista de bool por pieza (p. ej. por la veta); si se pasa,
+    reemplaza a `rotacion`.
+    fin: plazo opcional (time.time); al pasarlo lanza TiempoAgotado.
+    Devuelve (placas, sin_ubicar):
+    - placas: lista de PlacaGuillotina con .piezas = [(idx, x, y, w, h)]
+      y .arbol con las hojas de pieza marcadas con el idx.
+    - sin_ubicar: índices de piezas que no entran en una placa vacía.
+    """
+    if regla not in REGLAS_DIVISION:
+        raise ValueError(f"Regla de división desconocida: {regla}")
+    clave = ORDENES[orden]
+    indices = sorted(range(len(dims)), key=lambda i: clave(dims[i]), reverse=True)
+    rota = _rotacion_por_pieza(len(dims), rotacion, rotables)
+
+    placas = []
+    sin_ubicar = []
+    for idx in indices:
+        if fin is not None and time.time() > fin:
+            raise TiempoAgotado
+        w, h = dims[idx]
+        mejor, placa_mejor = None, None
+        for placa in placas:
+            cand = placa.mejor_hoja(w, h, rota[idx], seleccion)
+            if cand is not None and (mejor is None or cand[0] < mejor[0]):
+                mejor, placa_mejor = cand, placa
+        if mejor is None:
+            placa_mejor = PlacaGuillotina(placa_ancho, placa_alto)
+            mejor = placa_mejor.mejor_hoja(w, h, rota[idx], seleccion)
+            if mejor is None:
+                sin_ubicar.append(idx)
+                continue
+            placas.append(placa_mejor)
+        _, i_hoja, ow, oh = mejor
+        placa_mejor.colocar(i_hoja, ow, oh, idx, regla)
+
+    return placas, sin_ubicar
+
+
+def empaquetar_en_placas_fijas(dims, placas, regla="slas", seleccion="baf", orden="area",
+                               rotacion=True, rotables=None):
+    """
+    Empaqueta rectángulos en un conjunto fijo de placas de distinto tamaño
+    (p. ej. retazos del depósito), sin abrir placas nuevas.
+
+    dims: lista de (ancho, alto) de las piezas.
+    placas: lista de (ancho, alto) de las placas disponibles.
+    Cada pieza, de mayor a menor, va a la placa más chica donde entra.
+    Devuelve (usadas, sin_ubicar): usadas es una lista de
+    (índice en `placas`, PlacaGuillotina) solo con las placas que
+    recibieron alguna pieza; sin_ubicar son los índices de piezas que no
+    entraron en ninguna.
+    """
+    clave = ORDENES[orden]
+    indices = sorted(range(len(dims)), key=lambda i: clave(dims[i]), reverse=True)
+    por_area = sorted(range(len(placas)), key=lambda j: (placas[j][0] * placas[j][1], j))
+    abiertas = {j: PlacaGuillotina(*placas[j]) for j in por_area}
+    rota = _rotacion_por_pieza(len(dims), rotacion, rotables)
+
+    sin_ubicar = []
+    for idx in indices:
+        w, h = dims[idx]
+        for j in por_area:
+            cand = abiertas[j].mejor_hoja(w, h, rota[idx], seleccion)
+            if cand is not None:
+                _, i_hoja, ow, oh = cand
+                abiertas[j].colocar(i_hoja, ow, oh, idx, regla)
+                break
+        else:
+            sin_ubicar.append(idx)
+
+    usadas = [(j, abiertas[j]) for j in por_area if abiertas[j].piezas]
+    return usadas, sin_ubicar
+
+
+def completar_placas(dims, placas, regla="slas", seleccion="baf", orden="area", rotacion=True,
+                     rotables=None):
+    """
+    Ubica piezas en el espacio libre de placas ya empezadas (lista de
+    PlacaGuillotina), sin abrir placas nuevas. Cada pieza, de mayor a
+    menor, va a la hoja libre de mejor puntaje entre todas las placas.
+    Las piezas ubicadas se agregan a .piezas de cada placa como
+    (idx, x, y, w, h). Devuelve los índices de las que no entraron.
+    """
+    clave = ORDENES[orden]
+    indices = sorted(range(len(dims)), key=lambda i: clave(dims[i]), reverse=True)
+    rota = _rotacion_por_pieza(len(dims), rotacion, rotables)
+    sin_ubicar = []
+    for idx in indices:
+        w, h = dims[idx]
+        mejor, placa_mejor = None, None
+        for placa in placas:
+            cand = placa.mejor_hoja(w, h, rota[idx], seleccion)
+            if cand is not None and (mejor is None or cand[0] < mejor[0]):
+                mejor, placa_mejor = cand, placa
+        if mejor is None:
+            sin_ubicar.append(idx)
+            continue
+        _, i_hoja, ow, oh = mejor
+        placa_mejor.colocar(i_hoja, ow, oh, idx, regla)
+    return sin_ubicar
@@ -0,0 +1,169 @@
+# motor/lineal.py
+# Optimizador de corte lineal (1D) — BVM
+#
+# Tubos de ropero y tiras angostas (frentines, travesaños) no son
+# rectángulos para ubicar en una placa: son largos que se cortan de una
+# barra o de una tira. Empaquetarlos en 2D es lento y desperdicia, así que
+# acá se resuelven como cutting stock de una dimensión:
+#   - exacto (programación dinámica sobre subconjuntos) cuando son pocas
+#     piezas, que es donde una barra de más pesa en el presupuesto;
+#   - first-fit decreasing (FFD) en el resto: usa como mucho
+#     11/9·OPT + 6/9 barras y tarda milisegundos con miles de cortes.
+# Las tiras de cuerpo salen de la placa: las arma el optimizador 2D en su
+# modo "tiras primero" (optimizador._ripear_tiras) con estas funciones, y
+# ahí dejan de empaquetarse pieza por pieza. Acá quedan las barras que no
+# salen de la placa.
+
+import numpy as np
+
+from .piezas import tabla_desde_df
+
+# Largo de la barra o rollo de cada stock lineal (mm)
+BARRAS = {
+    "Tubo Ropero": 3000.0,
+}
+KERF_LINEAL_DEFAULT = 3.0   # mm — sierra de la ingletadora
+LIMITE_EXACTO = 12          # piezas: hasta acá se usa la DP exacta
+
+
+def empaquetar_ffd(largos, largo_barra, kerf=KERF_LINEAL_DEFAULT):
+    """
+    First-fit decreasing: cada largo, de mayor a menor, va a la primera
+    barra donde entra. Cada corte consume su largo más el kerf, salvo el
+    último de la barra. Devuelve (barras, sin_ubicar), con barras como
+    listas de índices de `largos`.
+    """
+    capacidad = largo_barra + kerf
+    barras, libres, sin_ubicar = [], [], []
+    for i in sorted(range(len(largos)), key=lambda i: largos[i], reverse=True):
+        consumo = largos[i] + kerf
+        if consumo > capacidad:
+            sin_ubicar.append(i)
+            continue
+        for j, libre in enumerate(libres):
+            if consumo <= libre:
+                barras[j].append(i)
+                libres[j] -= consumo
+                break
+        else:
+            barras.append([i])
+            libres.append(capacidad - consumo)
+    return barras, sin_ubicar
+
+
+def empaquetar_exacto(largos, largo_barra, kerf=KERF_LINEAL_DEFAULT):
+    """
+    Mínima cantidad de barras por programación dinámica sobre subconjuntos
+    (O(2^n · n), solo para n chico). Para cada subconjunto se guarda el
+    mejor (barras usadas, ocupado en la última barra) y se agrega una
+    pieza por vez, abriendo barra nueva cuando no entra. Misma salida que
+    empaquetar_ffd.
+    """
+    capacidad = largo_barra + kerf
+    sin_ubicar = [i for i, l in enumerate(largos) if l + kerf > capacidad]
+    indices = [i for i in range(len(largos)) if i not in sin_ubicar]
+    consumos = [largos[i] + kerf for i in indices]
+    n = len(indices)
+    if n == 0:
+        return [], sin_ubicar
+
+    completo = (1 << n) - 1
+    mejor = [None] * (1 << n)
+    previo = [None] * (1 << n)
+    mejor[0] = (1, 0.0)
+    for mascara in range(1 << n):
+        if mejor[mascara] is None:
+            continue
+        barras, ocupado = mejor[mascara]
+        for k in range(n):
+            if mascara & (1 << k):
+                continue
+            if ocupado + consumos[k] <= capacidad:
+                cand = (barras, ocupado + consumos[k])
+            else:
+                cand = (barras + 1, consumos[k])
+            siguiente = mascara | (1 << k)
+            if mejor[siguiente] is None or cand < mejor[siguiente]:
+                mejor[siguiente] = cand
+                previo[siguiente] = (mascara, k)
+
+    # Reconstruir el orden de las piezas y cortarlo en barras
+    orden = []
+    mascara = completo
+    while mascara:
+        mascara, k = previo[mascara]
+        orden.append(k)
+    orden.reverse()
+    barras, ocupado = [[]], 0.0
+    for k in orden:
+        if ocupado + consumos[k] > capacidad:
+            barras.append([])
+            ocupado = 0.0
+        barras[-1].append(indices[k])
+        ocupado += consumos[k]
+    return barras, sin_ubicar
+
+
+def optimizar_lineal(piezas_por_stock, kerf=KERF_LINEAL_DEFAULT):
+    """
+    piezas_por_stock: {stock: {"largo_barra": mm, "piezas": [(nombre, largo), ...]}}
+    Devuelve por stock:
+    - cant_barras, largo_barra y % de desperdicio
+    - barras: [{"cortes": [{"nombre","largo"}], "sobrante": mm}]
+    - exacto: si la cantidad de barras es la mínima probada
+    - piezas_sin_ubicar: nombres de piezas más largas que la barra
+    """
+    resultado = {}
+    for stock, datos in piezas_por_stock.items():
+        piezas = datos["piezas"]
+        if not piezas:
+            continue
+        largo_barra = datos["largo_barra"]
+        largos = [float(l) for _, l in piezas]
+        exacto = len(piezas) <= LIMITE_EXACTO
+        motor = empaquetar_exacto if exacto else empaquetar_ffd
+        barras, sin_ubicar = motor(largos, largo_barra, kerf)
+
+        salida = []
+        for barra in barras:
+            cortes = [{"nombre": piezas[i][0], "largo": largos[i]} for i in sorted(barra, key=lambda i: -largos[i])]
+            usado = sum(c["largo"] for c in cortes) + kerf * (len(cortes) - 1)
+            salida.append({"cortes": cortes, "sobrante": round(largo_barra - usado, 1)})
+        total = largo_barra * len(salida)
+        resultado[stock] = {
+            "cant_barras": len(salida),
+            "largo_barra": largo_barra,
+            "desperdicio_pct": round(100 * sum(b["sobrante"] for b in salida) / total, 1) if total else 0.0,
+            "barras": salida,
+            "exacto": exacto,
+            "piezas_sin_ubicar": [piezas[i][0] for i in sin_ubicar],
+        }
+    return resultado
+
+
+def piezas_lineales(modulos_con_df):
+    """
+    Junta por stock los herrajes lineales de la obra (Tipo "Herraje" con
+    stock en BARRAS, p. ej. "Tubo Ropero (ref.)"), cada uno contra su
+    barra. Son los que el optimizador deja fuera de las placas
+    (TIPOS_SIN_PLACA). Devuelve el dict que recibe optimizar_lineal.
+    """
+    por_stock = {}
+    for mod in modulos_con_df:
+        tabla = tabla_desde_df(mod.get("df_corte"), 0)
+        es_herraje = tabla["tipo"] == "Herraje"
+        if not es_herraje.any():
+            continue
+        cortes = np.maximum(tabla["largo"], tabla["ancho"])[es_herraje]
+        for nombre, corte in zip(tabla["nombre"][es_herraje].tolist(), cortes.tolist()):
+            stock = next((s for s in BARRAS if nombre.startswith(s)), None)
+            if stock is not None:
+                grupo = por_stock.setdefault(stock, {"largo_barra": BARRAS[stock], "piezas": []})
+                grupo["piezas"].append((nombre, corte))
+    return por_stock
+
+
+def optimizar_lineal_obra(modulos_con_df, kerf=KERF_LINEAL_DEFAULT):
+    """Barras y plan de cortes de todo lo lineal de una obra (ver
+    piezas_lineales y optimizar_lineal)."""
+    return optimizar_lineal(piezas_lineales(modulos_con_df), kerf)
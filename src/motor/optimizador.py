@@ -0,0 +1,1863 @@
+# motor/optimizador.py
+# Motor de Optimización de Corte (Bin Packing) — BVM
+#
+# Resuelve el problema real que Lepton/Polyboard/Promob ya resuelven:
+# dado un listado de piezas (de uno o varios módulos de una obra),
+# calcular cuántas placas estándar se necesitan y cómo se distribuyen
+# las piezas dentro de cada placa, minimizando el desperdicio.
+#
+# Algoritmos:
+# - "maxrects": MaxRects (vía librería rectpack), el estándar de la
+#   industria para 2D bin packing. Produce layouts libres, que no siempre
+#   se pueden cortar en una seccionadora.
+# - "guillotina": motor propio (motor/guillotina.py) que solo genera
+#   cortes de lado a lado y devuelve además el árbol de cortes por placa.
+# Cada uno tiene variantes (criterio de ubicación / regla de división) que
+# el portafolio (optimizar_corte_portafolio) corre en paralelo combinadas
+# con distintos órdenes de piezas, quedándose con el mejor layout.
+#
+# Uso sin navegador, para correr de noche la producción del día siguiente
+# (desde src/):
+#   python -m motor.optimizador obra.json --algoritmo guillotina --tiempo 60
+#   python -m motor.optimizador planilla.csv --placa 2750x1830 --kerf 4.5 -o salida/
+# Ver main() para todas las opciones.
+
+import argparse
+import copy
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+from rectpack import newPacker, PackingMode, SORT_AREA, SORT_LSIDE, SORT_PERI
+from rectpack.maxrects import MaxRectsBssf, MaxRectsBaf, MaxRectsBlsf, MaxRectsBl
+from rectpack.skyline import SkylineBl, SkylineMwf, SkylineMwfl
+
+from .guillotina import (empaquetar_guillotina, empaquetar_en_placas_fijas, completar_placas,
+                         contar_cortes, trozar_hoja, PlacaGuillotina, REGLAS_DIVISION,
+                         TiempoAgotado)
+from .cotas import cota_inferior, gap_pct
+from .piezas import (tabla_desde_df, como_tabla, concatenar, cant_piezas, dims_enteras, filas,
+                     etiquetar, tabla_desde_filas, rotables)
+from .retazos import sobrantes_de_placa, rectangulos_disjuntos
+from .lineal import empaquetar_exacto, empaquetar_ffd, LIMITE_EXACTO
+from .exacto import LIMITE_PIEZAS_EXACTO, TIEMPO_EXACTO_DEFAULT
+from . import exacto
+from .busqueda_local import ITERACIONES_DEFAULT, TIEMPO_BUSQUEDA_DEFAULT, SEMILLA_DEFAULT, OBJETIVOS
+from .formatos_placa import precio_m2
+from .despiece import generar_despiece_batch, args_despiece
+from .secuencia_corte import arbol_desde_layout, secuencia_placa, TIEMPOS_SIERRA_DEFAULT
+from . import busqueda_local
+from . import cache_optimizacion
+from . import estimador
+
+PLACA_ANCHO_DEFAULT = 2440.0   # mm — estándar Argentina (Faplac/Melamina)
+PLACA_ALTO_DEFAULT  = 1830.0   # mm
+KERF_DEFAULT        = 4.0      # mm — espesor de la sierra/disco de corte
+
+MATERIAL_FONDO_DEFAULT = "Fibroplus Blanco 3mm"
+TIPOS_SIN_PLACA = ("Herraje",)
+
+ORDENES = {"area": SORT_AREA, "lado_largo": SORT_LSIDE, "perimetro": SORT_PERI}
+ORDEN_DEFAULT = "area"
+
+TIEMPO_PORTAFOLIO_DEFAULT = 3.0   # s — presupuesto de reloj del portafolio
+TIEMPO_LOTE_DEFAULT = 20.0        # s — portafolio del corte semanal (optimizar_lote)
+# Placas menos llenas que se prueban en otro formato (ver _empaquetar_con_formatos)
+COLA_FORMATOS = 3
+# Modo "tiras primero": piezas de hasta este ancho (más el kerf) se ripean
+# en tiras. Llega a los laterales de cajón de 150 mm
+ANCHO_TIRA_RIPEO = 150.0
+# Lo que se hace después de la búsqueda (sobrantes, patrones, secuencias
+# de corte) sale del mismo deadline_s: se le reserva este tiempo por pieza
+RESERVA_POSPROCESO_S = 0.00005
+# Por debajo de esta cantidad de piezas no conviene pagar el arranque de
+# procesos para repartir los materiales
+MIN_PIEZAS_PARALELO = 300
+
+
+def _piezas_desde_df(df_corte, kerf=KERF_DEFAULT, material=None):
+    """Convierte un DataFrame de planilla de corte en la tabla columnar de
+    piezas individuales (expandiendo la cantidad, ver motor/piezas.py),
+    sumando el kerf a cada dimensión para que el corte real no quede
+    ajustado al límite. Con el material, cada pieza sabe si puede rotar
+    según su veta."""
+    return tabla_desde_df(df_corte, kerf, material)
+
+
+class _PodaPorArea:
+    """Mixin para los algoritmos de rectpack: lleva la cuenta del área libre
+    y del mayor ancho/alto libre de la placa, y descarta de entrada las
+    piezas que no pueden entrar.
+
+    Con PackingBin.BBF rectpack evalúa `fitness` en TODAS las placas
+    abiertas por cada pieza; en obras grandes la mayoría ya están llenas y
+    ese recorrido de sus max-rects es casi todo el tiempo de empaquetado."""
+
+    def reset(self):
+        super().reset()
+        self._area_libre = self.width * self.height
+        self._libre_max_w = self.width
+        self._libre_max_h = self.height
+
+    def _puede_entrar(self, width, height):
+        if width * height > self._area_libre:
+            return False
+        if width <= self._libre_max_w and height <= self._libre_max_h:
+            return True
+        return self.rot and height <= self._libre_max_w and width <= self._libre_max_h
+
+    def fitness(self, width, height):
+        if not self._puede_entrar(width, height):
+            return None
+        return super().fitness(width, height)
+
+    def add_rect(self, width, height, rid=None):
+        if not self._puede_entrar(width, height):
+            return None
+        rect = super().add_rect(width, height, rid)
+        if rect is not None:
+            self._area_libre -= width * height
+            self._libre_max_w = max((m.width for m in self._max_rects), default=0)
+            self._libre_max_h = max((m.height for m in self._max_rects), default=0)
+        return rect
+
+
+class _VetaFija:
+    """Mixin para los algoritmos de rectpack: rotación por pieza. rectpack
+    solo tiene un `rot` global por placa, así que para las medidas en
+    `fijas` (piezas con veta) se apaga durante fitness/add_rect. rectpack
+    no pasa el id de la pieza a fitness, por eso se identifican por medida:
+    si una pieza con veta y otra libre miden lo mismo, las dos quedan sin
+    rotar (más restrictivo, nunca un layout contra la veta)."""
+
+    def __init__(self, *args, fijas=frozenset(), **kwargs):
+        self._fijas = fijas
+        super().__init__(*args, **kwargs)
+
+    def _sin_rotar(self, metodo, width, height, *args):
+        if self.rot and (width, height) in self._fijas:
+            self.rot = False
+            try:
+                return metodo(width, height, *args)
+            finally:
+                self.rot = True
+        return metodo(width, height, *args)
+
+    def fitness(self, width, height):
+        return self._sin_rotar(super().fitness, width, height)
+
+    def add_rect(self, width, height, rid=None):
+        return self._sin_rotar(super().add_rect, width, height, rid)
+
+
+class _Plazo:
+    """Mixin para los algoritmos de rectpack: corta el empaquetado al pasar
+    el plazo `fin` (time.time) lanzando TiempoAgotado. rectpack no tiene
+    forma de interrumpirse, pero llama a fitness/add_rect por cada pieza."""
+
+    def __init__(self, *args, fin=None, **kwargs):
+        self._fin = fin
+        super().__init__(*args, **kwargs)
+
+    def _revisar_plazo(self):
+        if self._fin is not None and time.time() > self._fin:
+            raise TiempoAgotado
+
+    def fitness(self, width, height):
+        self._revisar_plazo()
+        return super().fitness(width, height)
+
+    def add_rect(self, width, height, rid=None):
+        self._revisar_plazo()
+        return super().add_rect(width, height, rid)
+
+
+class _MaxRectsBssfPodado(_Plazo, _VetaFija, _PodaPorArea, MaxRectsBssf):
+    pass
+
+
+class _MaxRectsBafPodado(_Plazo, _VetaFija, _PodaPorArea, MaxRectsBaf):
+    pass
+
+
+class _MaxRectsBlsfPodado(_Plazo, _VetaFija, _PodaPorArea, MaxRectsBlsf):
+    pass
+
+
+class _MaxRectsBlPodado(_Plazo, _VetaFija, _PodaPorArea, MaxRectsBl):
+    pass
+
+
+class _SkylineBl(_Plazo, _VetaFija, SkylineBl):
+    pass
+
+
+class _SkylineMwf(_Plazo, _VetaFija, SkylineMwf):
+    pass
+
+
+class _SkylineMwfl(_Plazo, _VetaFija, SkylineMwfl):
+    pass
+
+
+# Algoritmos de layout libre (rectpack)
+_ALGOS_RECTPACK = {
+    "maxrects":      _MaxRectsBssfPodado,
+    "maxrects_baf":  _MaxRectsBafPodado,
+    "maxrects_blsf": _MaxRectsBlsfPodado,
+    "maxrects_bl":   _MaxRectsBlPodado,
+    "skyline_bl":    _SkylineBl,
+    "skyline_mwf":   _SkylineMwf,
+    "skyline_mwfl":  _SkylineMwfl,
+}
+
+# Algoritmos guillotina (motor propio): "guillotina" usa la regla por
+# defecto (slas) y "guillotina_<regla>" cualquiera de las otras.
+_ALGOS_GUILLOTINA = {"guillotina": "slas"}
+_ALGOS_GUILLOTINA.update({f"guillotina_{r}": r for r in REGLAS_DIVISION if r != "slas"})
+
+ALGORITMOS = tuple(_ALGOS_RECTPACK) + tuple(_ALGOS_GUILLOTINA)
+ALGORITMO_DEFAULT = "maxrects"
+
+# Portafolios de estrategias (algoritmo, orden). La primera de cada lista
+# se corre siempre, aunque se agote el tiempo, para tener un resultado.
+ESTRATEGIAS_GUILLOTINA = [(a, o) for a in _ALGOS_GUILLOTINA for o in ORDENES]
+# Skyline va al final: es el más lento y rara vez gana en piezas de mueble
+ESTRATEGIAS_PORTAFOLIO = (
+    [(a, o) for a in _ALGOS_RECTPACK if a.startswith("maxrects") for o in ORDENES]
+    + ESTRATEGIAS_GUILLOTINA
+    + [(a, o) for a in _ALGOS_RECTPACK if a.startswith("skyline") for o in ORDENES]
+)
+
+
+def es_guillotina(algoritmo):
+    return algoritmo in _ALGOS_GUILLOTINA
+
+
+def _empaquetar_rectpack(dims, placa_ancho, placa_alto, algoritmo=ALGORITMO_DEFAULT,
+                         orden=ORDEN_DEFAULT, rotables=None, fin=None):
+    """Empaqueta con rectpack. Devuelve una lista de placas, cada una como
+    lista de (idx, x, y, w, h). rotables: bool por pieza (None = todas
+    giran). fin: plazo opcional (time.time), ver _Plazo."""
+    packer = newPacker(mode=PackingMode.Offline, pack_algo=_ALGOS_RECTPACK[algoritmo],
+                       sort_algo=ORDENES[orden], rotation=True)
+    ancho, alto = round(placa_ancho), round(placa_alto)
+    fijas = frozenset(d for d, r in zip(dims, rotables) if not r) if rotables else frozenset()
+
+    # rectpack necesita rectángulos como (ancho, alto, rid)
+    for i, (w, h) in enumerate(dims):
+        # Una pieza con veta que solo entra girada haría que rectpack abra
+        # placas sin fin: queda afuera, como las que no entran de ningún modo
+        if (w, h) in fijas and (w > ancho or h > alto):
+            continue
+        packer.add_rect(w, h, rid=i)
+
+    # Una sola fábrica de placas sin límite: rectpack abre cada placa recién
+    # cuando una pieza no entra en las abiertas, así que el costo crece con
+    # las placas usadas y no con la cantidad de piezas.
+    packer.add_bin(ancho, alto, count=float("inf"), fijas=fijas, fin=fin)
+
+    packer.pack()
+
+    placas = []
+    for abin in packer:
+        rects = [(rect.rid, rect.x, rect.y, rect.width, rect.height) for rect in abin]
+        if rects:
+            placas.append(rects)
+    return placas
+
+
+def _nombrar_arbol(nodo, nombres):
+    """Copia el árbol de cortes reemplazando el índice de cada hoja por el
+    nombre de la pieza, para que el resultado sea serializable y legible.
+    Las hojas que ya tienen nombre (placas completadas en una
+    re-optimización incremental) quedan como están."""
+    copia = {k: nodo[k] for k in ("x", "y", "w", "h")}
+    if "hijos" in nodo:
+        copia["corte"] = nodo["corte"]
+        copia["pos"] = nodo["pos"]
+        copia["hijos"] = [_nombrar_arbol(h, nombres) for h in nodo["hijos"]]
+    elif "pieza" in nodo:
+        pieza = nodo["pieza"]
+        copia["pieza"] = nombres[pieza] if isinstance(pieza, int) else pieza
+    return copia
+
+
+def _resultado_vacio(placa_ancho, placa_alto, algoritmo=ALGORITMO_DEFAULT, orden=ORDEN_DEFAULT):
+    """Entrada de un material que no necesita placas nuevas (p. ej. porque
+    todas sus piezas salieron de retazos)."""
+    return {
+        "cant_placas": 0, "desperdicio_pct": 0.0, "cota_inferior": 0, "gap_pct": 0.0,
+        "placas": [], "placa_ancho": placa_ancho, "placa_alto": placa_alto,
+        "algoritmo": algoritmo, "orden": orden, "piezas_sin_ubicar": [],
+    }
+
+
+def _consumir_retazos(piezas_por_material, retazos):
+    """
+    Empaqueta primero en los retazos del depósito (la lista que devuelve
+    consultar_retazos_disponibles: dicts con "id", "material", "largo",
+    "ancho"). Cada pieza va al retazo más chico donde entra, siempre con
+    cortes guillotina porque los retazos se cortan en la seccionadora.
+
+    Devuelve (piezas_restantes_por_material, uso_por_material), donde uso
+    tiene "retazos_usados" (ids) y "placas_retazo" (layout de cada uno).
+    """
+    restantes, uso = {}, {}
+    for material, piezas in piezas_por_material.items():
+        stock = [r for r in retazos if r.get("material") == material
+                 and float(r.get("largo", 0)) > 0 and float(r.get("ancho", 0)) > 0]
+        if not stock:
+            restantes[material] = piezas
+            continue
+        dims = dims_enteras(piezas)
+        medidas = [(round(float(r["largo"])), round(float(r["ancho"]))) for r in stock]
+        usadas, sin_ubicar = empaquetar_en_placas_fijas(dims, medidas, rotables=rotables(piezas))
+        columnas = _columnas_layout(piezas)
+        restantes[material] = filas(piezas, sorted(sin_ubicar))
+        uso[material] = {
+            "retazos_usados": [stock[j]["id"] for j, _ in usadas],
+            "placas_retazo": [
+                {
+                    "retazo_id": stock[j]["id"],
+                    "largo": medidas[j][0],
+                    "ancho": medidas[j][1],
+                    "piezas": _layout_desde_rects(placa.piezas, columnas),
+                }
+                for j, placa in usadas
+            ],
+        }
+    return restantes, uso
+
+
+def _columnas_layout(piezas):
+    """Columnas de la tabla que viajan a cada pieza del layout, ya como
+    listas para indexarlas rápido."""
+    return {c: piezas[c].tolist() for c in ("nombre", "tipo", "modulo", "proyecto") if c in piezas}
+
+
+def _layout_desde_rects(rects, columnas):
+    """[(idx, x, y, w, h)] -> layout de placa que consume generar_svg_placa."""
+    return [
+        {**{c: v[i] for c, v in columnas.items()}, "x": x, "y": y, "w": w, "h": h}
+        for i, x, y, w, h in rects
+    ]
+
+
+def _metricas(placas_usadas, dims, placa_ancho, placa_alto, dimensiones=None):
+    """Placas, % de desperdicio, cota inferior y gap de un layout.
+    dimensiones: (ancho, alto) de cada placa si no son todas iguales; la
+    cota se calcula con placa_ancho × placa_alto."""
+    area_piezas = sum(p["w"] * p["h"] for layout in placas_usadas for p in layout)
+    if dimensiones is not None:
+        area_total_disponible = sum(w * h for w, h in dimensiones)
+    else:
+        area_total_disponible = placa_ancho * placa_alto * len(placas_usadas)
+    desperdicio_pct = (
+        round(100 * (1 - area_piezas / area_total_disponible), 1)
+        if area_total_disponible > 0 else 0.0
+    )
+    cota = cota_inferior(dims, round(placa_ancho), round(placa_alto))
+    return {
+        "cant_placas": len(placas_usadas),
+        "desperdicio_pct": desperdicio_pct,
+        # Mínimo teórico de placas y distancia del layout a ese mínimo
+        "cota_inferior": cota,
+        "gap_pct": gap_pct(len(placas_usadas), cota),
+    }
+
+
+def dimensiones_placa(data, i):
+    """(ancho, alto) de la placa i de un material: con varios formatos
+    cada placa trae el suyo en "dimensiones_placas"."""
+    if "dimensiones_placas" in data:
+        return tuple(data["dimensiones_placas"][i])
+    return data["placa_ancho"], data["placa_alto"]
+
+
+def _agregar_sobrantes(data):
+    """Agrega "retazos_sobrantes": los recortes útiles (es_retazo_util) que
+    deja cada placa nueva y cada retazo usado, listos para cargarlos al
+    depósito. Cada uno lleva "placa" (índice en data["placas"]) o
+    "retazo_id" (el retazo del que sale). Además, "area_retazos_m2": el
+    total recuperable."""
+    sobrantes = []
+    for i, layout in enumerate(data["placas"]):
+        for s in sobrantes_de_placa(layout, *dimensiones_placa(data, i)):
+            sobrantes.append({**s, "placa": i})
+    for usado in data.get("placas_retazo", []):
+        for s in sobrantes_de_placa(usado["piezas"], usado["largo"], usado["ancho"]):
+            sobrantes.append({**s, "retazo_id": usado["retazo_id"]})
+    data["retazos_sobrantes"] = sobrantes
+    data["area_retazos_m2"] = round(sum(s["largo"] * s["ancho"] for s in sobrantes) / 1_000_000, 3)
+
+
+def _agregar_valor_retazos(data, precio_placa):
+    """Agrega "valor_retazos": lo que valen los retazos sobrantes al
+    precio por m² del material, para acreditarlo en la cotización."""
+    data["valor_retazos"] = round(data["area_retazos_m2"] * precio_m2(precio_placa), 2)
+
+
+def _letra_patron(i):
+    """0 -> "A", 25 -> "Z", 26 -> "AA"..."""
+    letra = ""
+    i += 1
+    while i:
+        i, resto = divmod(i - 1, 26)
+        letra = chr(ord("A") + resto) + letra
+    return letra
+
+
+def _agregar_patrones(data):
+    """
+    Agrega "patrones": las placas con exactamente el mismo layout (mismas
+    piezas en las mismas posiciones, sin importar de qué módulo salen)
+    agrupadas en un patrón con su multiplicidad, para dibujar y exportar
+    cada una una sola vez y que el operario repita el mismo seteo:
+        [{"patron": "A", "cantidad": 6, "placas": [0, 1, ...], "layout": [...],
+          "placa_ancho": ..., "placa_alto": ...}]
+    Los patrones quedan en el orden de su primera placa.
+    """
+    por_firma = {}
+    for i, layout in enumerate(data["placas"]):
+        firma = (dimensiones_placa(data, i),
+                 tuple(sorted((p["nombre"], p["x"], p["y"], p["w"], p["h"]) for p in layout)))
+        por_firma.setdefault(firma, []).append(i)
+    data["patrones"] = [
+        {"patron": _letra_patron(j), "cantidad": len(indices), "placas": indices,
+         "layout": data["placas"][indices[0]],
+         "placa_ancho": firma[0][0], "placa_alto": firma[0][1]}
+        for j, (firma, indices) in enumerate(por_firma.items())
+    ]
+
+
+def _arbol_placa(data, i):
+    """Árbol de cortes de la placa i: el del motor guillotina o, en un
+    layout libre, el reconstruido si se puede cortar en la seccionadora
+    (None si no)."""
+    if "arboles_corte" in data:
+        return data["arboles_corte"][i]
+    return arbol_desde_layout(data["placas"][i], *dimensiones_placa(data, i))
+
+
+def _tiempo_sierra(data, tiempos=None):
+    """Tiempo total de seccionadora de un layout (infinito si alguna placa
+    solo se puede cortar con CNC)."""
+    total = 0.0
+    for i in range(len(data["placas"])):
+        arbol = _arbol_placa(data, i)
+        if arbol is None:
+            return float("inf")
+        total += secuencia_placa(arbol, tiempos)["tiempo_s"]
+    return total
+
+
+def _agregar_secuencias(data, tiempos=None):
+    """
+    Agrega "secuencias": por placa, la secuencia de corte en la
+    seccionadora con cortes, giros y tiempo estimado (ver
+    motor/secuencia_corte.py), o None si el layout solo se puede cortar
+    con CNC; "tiempo_sierra_s": la suma de las que tienen secuencia, y
+    "placas_solo_cnc". Cada patrón lleva la secuencia de su placa.
+    """
+    secuencias = []
+    for i in range(len(data["placas"])):
+        arbol = _arbol_placa(data, i)
+        secuencias.append(secuencia_placa(arbol, tiempos) if arbol is not None else None)
+    data["secuencias"] = secuencias
+    data["tiempo_sierra_s"] = round(sum(s["tiempo_s"] for s in secuencias if s), 1)
+    data["placas_solo_cnc"] = sum(1 for s in secuencias if s is None)
+    for patron in data.get("patrones", []):
+        patron["secuencia"] = secuencias[patron["placas"][0]]
+
+
+def _empaquetar_material(piezas, placa_ancho, placa_alto, algoritmo=ALGORITMO_DEFAULT,
+                         orden=ORDEN_DEFAULT, ancho_tira=None, fin=None):
+    """Corre UNA estrategia sobre las piezas de un material y arma su
+    entrada del resultado. Es la unidad de trabajo del portafolio, así que
+    tiene que ser una función de módulo (picklable). `piezas` es una tabla
+    de motor/piezas.py. Con ancho_tira, las piezas angostas se ripean
+    primero en tiras (ver _empaquetar_con_tiras); como las tiras a veces
+    cuestan una placa más, también se empaqueta sin tiras y se queda con
+    las tiras solo si no usan más placas ("tiras_descartadas" avisa si no).
+    Con fin (time.time), lanza TiempoAgotado si el empaquetado no terminó
+    a esa hora."""
+    if ancho_tira:
+        con_tiras = _empaquetar_con_tiras(piezas, placa_ancho, placa_alto, algoritmo, orden, ancho_tira,
+                                          fin)
+        sin_tiras = _empaquetar_material(piezas, placa_ancho, placa_alto, algoritmo, orden, fin=fin)
+        if ((len(sin_tiras["piezas_sin_ubicar"]), sin_tiras["cant_placas"])
+                < (len(con_tiras["piezas_sin_ubicar"]), con_tiras["cant_placas"])):
+            return {**sin_tiras, "ancho_tira": ancho_tira, "tiras": [], "tiras_descartadas": True}
+        return con_tiras
+    dims = dims_enteras(piezas)
+    rota = rotables(piezas)
+    columnas = _columnas_layout(piezas)
+    nombres = columnas["nombre"]
+    arboles = None
+    if es_guillotina(algoritmo):
+        placas_g, _ = empaquetar_guillotina(dims, round(placa_ancho), round(placa_alto),
+                                            regla=_ALGOS_GUILLOTINA[algoritmo], orden=orden,
+                                            rotables=rota, fin=fin)
+        placas_rects = [pg.piezas for pg in placas_g]
+        arboles = [_nombrar_arbol(pg.arbol, nombres) for pg in placas_g]
+    else:
+        placas_rects = _empaquetar_rectpack(dims, placa_ancho, placa_alto, algoritmo, orden, rota,
+                                            fin)
+
+    placas_usadas = [_layout_desde_rects(rects, columnas) for rects in placas_rects]
+    ubicadas = {rect[0] for rects in placas_rects for rect in rects}
+
+    data = {
+        **_metricas(placas_usadas, dims, placa_ancho, placa_alto),
+        "placas": placas_usadas,
+        "placa_ancho": placa_ancho,
+        "placa_alto": placa_alto,
+        "algoritmo": algoritmo,
+        "orden": orden,
+        # Piezas más grandes que la placa: no se pueden optimizar acá
+        "piezas_sin_ubicar": [n for i, n in enumerate(nombres) if i not in ubicadas],
+    }
+    if arboles is not None:
+        data["arboles_corte"] = arboles
+        data["cant_cortes"] = sum(contar_cortes(a) for a in arboles)
+    return data
+
+
+def _ripear_tiras(piezas, placa_ancho, ancho_tira):
+    """
+    Arma las tiras del modo "tiras primero": agrupa las piezas de hasta
+    ancho_tira de ancho (medida con kerf) por ancho exacto y reparte sus
+    largos en tiras a lo largo de la placa con el cutting stock de
+    motor/lineal.py (sin kerf: ya está en las medidas). La tira sale a lo
+    largo de la placa, que es el sentido de la veta: las que rotan van con
+    el lado largo sobre la tira; las de veta, con su "largo" de la tabla,
+    que ya es la medida que sigue la veta (ver piezas._ejes_veta).
+
+    Devuelve (tabla, tiras): la tabla con las piezas anchas más una fila
+    por tira (no rota, tipo "Tira", nombre único) y, por tira, su nombre,
+    medidas e índices de las piezas en orden de corte.
+    """
+    dims = dims_enteras(piezas)
+    rota = rotables(piezas) or [True] * len(dims)
+    largo_tira = round(placa_ancho)
+    por_ancho = {}
+    for i, ((l, a), r) in enumerate(zip(dims, rota)):
+        largo, ancho = (max(l, a), min(l, a)) if r else (l, a)
+        if ancho <= ancho_tira and largo <= largo_tira:
+            por_ancho.setdefault(ancho, []).append((i, largo))
+
+    tiras, en_tira = [], set()
+    for ancho, grupo in sorted(por_ancho.items(), reverse=True):
+        largos = [largo for _, largo in grupo]
+        motor = empaquetar_exacto if len(largos) <= LIMITE_EXACTO else empaquetar_ffd
+        barras, _ = motor(largos, largo_tira, kerf=0)
+        for barra in barras:
+            barra = sorted(barra, key=lambda k: -largos[k])
+            tiras.append({
+                "nombre": f"Tira {ancho} mm #{len(tiras) + 1}",
+                "ancho": ancho,
+                "largo": sum(largos[k] for k in barra),
+                "indices": [grupo[k][0] for k in barra],
+                "largos": [largos[k] for k in barra],
+            })
+            en_tira.update(grupo[k][0] for k in barra)
+
+    anchas = filas(piezas, [i not in en_tira for i in range(len(dims))])
+    columnas = [c for c in ("nombre", "tipo", "modulo", "proyecto", "largo", "ancho", "rotable") if c in piezas]
+    filas_tiras = [{"nombre": t["nombre"], "tipo": "Tira", "modulo": "", "proyecto": "", "largo": t["largo"],
+                    "ancho": t["ancho"], "rotable": False} for t in tiras]
+    tabla = concatenar([anchas, tabla_desde_filas(filas_tiras, columnas)]) if tiras else anchas
+    return tabla, tiras
+
+
+def _empaquetar_con_tiras(piezas, placa_ancho, placa_alto, algoritmo=ALGORITMO_DEFAULT,
+                          orden=ORDEN_DEFAULT, ancho_tira=ANCHO_TIRA_RIPEO, fin=None):
+    """
+    Modo "tiras primero", como se corta en la seccionadora: las piezas
+    angostas del mismo ancho (travesaños, frentines, laterales de cajón)
+    se juntan en tiras ripeadas a lo largo de la placa, cada tira se
+    trocea con cortes transversales y el empaquetado 2D solo ve las piezas
+    anchas más una pieza por tira, que es un problema mucho más chico.
+
+    Devuelve lo mismo que _empaquetar_material, con el layout ya por pieza
+    (cada tira desarmada en sus piezas) y además "tiras": [{"ancho",
+    "largo", "placa", "piezas": [nombres]}] en el orden de corte y el
+    "ancho_tira" usado.
+    """
+    tabla, tiras = _ripear_tiras(piezas, placa_ancho, ancho_tira)
+    data = _empaquetar_material(tabla, placa_ancho, placa_alto, algoritmo, orden, fin=fin)
+    if not tiras:
+        return {**data, "ancho_tira": ancho_tira, "tiras": []}
+
+    columnas = _columnas_layout(piezas)
+    bloques = {
+        t["nombre"]: {"ancho": t["ancho"], "largo": t["largo"],
+                      "piezas": [{**{c: v[k] for c, v in columnas.items()}, "w": largo}
+                                 for k, largo in zip(t["indices"], t["largos"])]}
+        for t in tiras
+    }
+    placas, info_tiras = _expandir_tiras(data["placas"], data.get("arboles_corte"), bloques)
+    if "arboles_corte" in data:
+        data["cant_cortes"] = sum(contar_cortes(a) for a in data["arboles_corte"])
+
+    return {
+        **data,
+        **_metricas(placas, dims_enteras(piezas), placa_ancho, placa_alto),
+        "placas": placas,
+        "ancho_tira": ancho_tira,
+        "tiras": info_tiras,
+    }
+
+
+def _expandir_tiras(layouts, arboles, bloques):
+    """
+    Desarma cada tira ubicada en sus piezas, una al lado de la otra desde
+    el extremo de la tira. bloques: {nombre de la tira: {"ancho", "largo",
+    "piezas": [pieza del layout sin posición, con su "w"]}}. Los árboles
+    de corte, si hay, se trocean en el lugar (ver trozar_hoja).
+    Devuelve (layouts, tiras) con la info de cada tira: "ancho", "largo",
+    "placa", "x", "y" y "piezas" (nombres en orden de corte).
+    """
+    placas, info_tiras = [], []
+    for i, layout in enumerate(layouts):
+        nuevo = []
+        for p in layout:
+            bloque = bloques.get(p["nombre"]) if p.get("tipo") == "Tira" else None
+            if bloque is None:
+                nuevo.append(p)
+                continue
+            x = p["x"]
+            for q in bloque["piezas"]:
+                nuevo.append({**q, "x": x, "y": p["y"], "h": p["h"]})
+                x += q["w"]
+            info_tiras.append({"ancho": bloque["ancho"], "largo": bloque["largo"], "placa": i,
+                               "x": p["x"], "y": p["y"], "piezas": [q["nombre"] for q in bloque["piezas"]]})
+        placas.append(nuevo)
+
+    for arbol in arboles or []:
+        pendientes = [arbol]
+        while pendientes:
+            nodo = pendientes.pop()
+            if "hijos" in nodo:
+                pendientes.extend(nodo["hijos"])
+            elif nodo.get("pieza") in bloques:
+                piezas = bloques[nodo["pieza"]]["piezas"]
+                trozar_hoja(nodo, [q["w"] for q in piezas], [q["nombre"] for q in piezas])
+    return placas, info_tiras
+
+
+def _colapsar_tiras(data):
+    """
+    Lo inverso de _expandir_tiras sobre un resultado: cada tira vuelve a
+    ser una sola pieza del layout (tipo "Tira") y, en los árboles, una
+    sola hoja. Devuelve (layouts, arboles, bloques) con copias; los
+    bloques sirven para volver a expandirlas.
+    """
+    layouts = [list(layout) for layout in data["placas"]]
+    arboles = copy.deepcopy(data["arboles_corte"]) if "arboles_corte" in data else None
+    bloques = {}
+    for k, t in enumerate(data["tiras"]):
+        nombre = f"Tira {t['ancho']:g} mm #{k + 1}"
+        layout = layouts[t["placa"]]
+        propias = sorted((p for p in layout if p["y"] == t["y"] and p["h"] == t["ancho"]
+                          and t["x"] <= p["x"] < t["x"] + t["largo"]), key=lambda p: p["x"])
+        bloques[nombre] = {"ancho": t["ancho"], "largo": t["largo"],
+                           "piezas": [{c: v for c, v in p.items() if c not in ("x", "y", "h")} for p in propias]}
+        layouts[t["placa"]] = [p for p in layout if not any(p is q for q in propias)] + [
+            {"nombre": nombre, "tipo": "Tira", "x": t["x"], "y": t["y"], "w": t["largo"], "h": t["ancho"]}]
+        if arboles is not None:
+            pendientes = [arboles[t["placa"]]]
+            while pendientes:
+                nodo = pendientes.pop()
+                if (nodo["x"], nodo["y"], nodo["w"], nodo["h"]) == (t["x"], t["y"], t["largo"], t["ancho"]):
+                    for clave in ("corte", "pos", "hijos"):
+                        nodo.pop(clave, None)
+                    nodo["pieza"] = nombre
+                    break
+                pendientes.extend(nodo.get("hijos", []))
+    return layouts, arboles, bloques
+
+
+def _reetiquetar(data, piezas):
+    """
+    Pone en un resultado leído de la cache los nombres, tipos, módulos y
+    proyectos de `piezas`: la clave de la cache es solo el multiconjunto
+    de medidas, así que el layout guardado puede venir de otra obra con
+    las mismas piezas. Cada pieza del layout toma una fila de la tabla con
+    sus medidas; las que no giran, solo en su orientación, y van primero
+    para que las que giran no les ocupen el lugar. Rehace con eso las
+    hojas de los árboles de corte, las tiras y las piezas sin ubicar.
+    Devuelve None si el layout no calza con las piezas.
+    """
+    columnas = _columnas_layout(piezas)
+    dims = dims_enteras(piezas)
+    rota = rotables(piezas) or [True] * len(dims)
+    fijas, libres = {}, {}
+    for i, ((l, a), r, t) in enumerate(zip(dims, rota, columnas["tipo"])):
+        if r:
+            libres.setdefault((min(l, a), max(l, a), t), []).append(i)
+        else:
+            fijas.setdefault((l, a, t), []).append(i)
+    for filas_medida in (*fijas.values(), *libres.values()):
+        filas_medida.reverse()  # se consumen con pop() en el orden de la tabla
+
+    ubicadas = [p for layout in data["placas"] for p in layout]
+    asignadas = [None] * len(ubicadas)
+    for k, p in enumerate(ubicadas):
+        candidatas = fijas.get((round(p["w"]), round(p["h"]), p.get("tipo")))
+        if candidatas:
+            asignadas[k] = candidatas.pop()
+    for k, p in enumerate(ubicadas):
+        if asignadas[k] is None:
+            w, h = round(p["w"]), round(p["h"])
+            candidatas = libres.get((min(w, h), max(w, h), p.get("tipo")))
+            if not candidatas:
+                return None
+            asignadas[k] = candidatas.pop()
+
+    placas, k = [], 0
+    for layout in data["placas"]:
+        nuevo = []
+        for p in layout:
+            nuevo.append({**p, **{c: v[asignadas[k]] for c, v in columnas.items()}})
+            k += 1
+        placas.append(nuevo)
+    resto = sorted(i for filas_medida in (*fijas.values(), *libres.values()) for i in filas_medida)
+    data = {**data, "placas": placas, "piezas_sin_ubicar": [columnas["nombre"][i] for i in resto]}
+
+    if "arboles_corte" in data:
+        arboles = copy.deepcopy(data["arboles_corte"])
+        for arbol, layout in zip(arboles, placas):
+            por_posicion = {(p["x"], p["y"]): p["nombre"] for p in layout}
+            pendientes = [arbol]
+            while pendientes:
+                nodo = pendientes.pop()
+                pendientes.extend(nodo.get("hijos", []))
+                if "pieza" in nodo:
+                    nodo["pieza"] = por_posicion.get((nodo["x"], nodo["y"]), nodo["pieza"])
+        data["arboles_corte"] = arboles
+    if data.get("tiras"):
+        data["tiras"] = [
+            {**t, "piezas": [p["nombre"] for p in sorted(
+                (p for p in placas[t["placa"]] if p["y"] == t["y"] and p["h"] == t["ancho"]
+                 and t["x"] <= p["x"] < t["x"] + t["largo"]), key=lambda p: p["x"])]}
+            for t in data["tiras"]
+        ]
+    return data
+
+
+def _tabla_de_layouts(layouts, piezas):
+    """Tabla con las piezas ya ubicadas en esos layouts, con las medidas y
+    la orientación que tienen ahí (no rotan: esa orientación ya respeta la
+    veta). `piezas` es la tabla original, para saber qué columnas llevar."""
+    filas_layout = [{**p, "largo": p["w"], "ancho": p["h"], "rotable": False}
+                    for layout in layouts for p in layout]
+    columnas = [c for c in ("nombre", "tipo", "modulo", "proyecto", "largo", "ancho", "rotable") if c in piezas]
+    return tabla_desde_filas(filas_layout, columnas)
+
+
+def _medidas_formato(formato):
+    """(ancho, alto) con que se empaqueta un formato: el motor pone la veta
+    a lo largo del ancho, así que un formato con la veta por el alto (la
+    media placa) se empaqueta girado."""
+    if formato.get("veta") == "alto":
+        return formato["alto"], formato["ancho"]
+    return formato["ancho"], formato["alto"]
+
+
+def _empaquetar_con_formatos(piezas, formatos, algoritmo=ALGORITMO_DEFAULT, orden=ORDEN_DEFAULT,
+                             ancho_tira=None):
+    """
+    Elige la combinación de formatos de placa más barata para un material.
+    formatos: [{"nombre","ancho","alto","veta","precio"}] (ver
+    formatos_placa.catalogo). Cada formato se empaqueta con su veta a lo
+    largo del eje x (ver _medidas_formato), y así quedan sus medidas en
+    "dimensiones_placas".
+
+    1. Empaqueta todo en cada formato y se queda con el de menor costo.
+    2. Re-empaqueta las placas menos llenas (hasta COLA_FORMATOS) en cada
+       uno de los otros formatos y aplica el cambio que más ahorra, p. ej.
+       terminar la obra con una media placa en vez de una entera casi vacía.
+
+    Son unas pocas corridas de una sola estrategia, así que alcanza para la
+    cotización interactiva. Además de lo de _empaquetar_material, devuelve
+    "dimensiones_placas", "formatos_placas" (nombre por placa),
+    "resumen_formatos", "costo_total" y "formatos" (el catálogo usado).
+    """
+    candidatos = [(f, _empaquetar_material(piezas, *_medidas_formato(f), algoritmo, orden, ancho_tira))
+                  for f in formatos]
+    formato, base = min(candidatos, key=lambda c: (len(c[1]["piezas_sin_ubicar"]),
+                                                    c[1]["cant_placas"] * c[0]["precio"]))
+    placas = [(formato, layout) for layout in base["placas"]]
+    arboles = base.get("arboles_corte")
+    tiras = base.get("tiras")
+
+    uso = sorted(range(len(placas)), key=lambda i: sum(p["w"] * p["h"] for p in placas[i][1]))
+    mejor_ahorro, cambio = 0.0, None
+    for k in range(1, min(COLA_FORMATOS, len(placas)) + 1):
+        cola = uso[:k]
+        tabla = _tabla_de_layouts([placas[i][1] for i in cola], piezas)
+        for otro in formatos:
+            if otro is formato:
+                continue
+            alt = _empaquetar_material(tabla, *_medidas_formato(otro), algoritmo, orden, ancho_tira)
+            ahorro = k * formato["precio"] - alt["cant_placas"] * otro["precio"]
+            if not alt["piezas_sin_ubicar"] and ahorro > mejor_ahorro:
+                mejor_ahorro, cambio = ahorro, (cola, otro, alt)
+
+    if cambio is not None:
+        cola, otro, alt = cambio
+        quedan = [i for i in range(len(placas)) if i not in cola]
+        placas = [placas[i] for i in quedan] + [(otro, layout) for layout in alt["placas"]]
+        if arboles is not None:
+            arboles = [arboles[i] for i in quedan] + alt["arboles_corte"]
+        if tiras is not None:
+            tiras = _renumerar_tiras(tiras, quedan) + [{**t, "placa": t["placa"] + len(quedan)}
+                                                      for t in alt["tiras"]]
+
+    layouts = [layout for _, layout in placas]
+    dimensiones = [list(_medidas_formato(f)) for f, _ in placas]
+    resumen = {}
+    for f, _ in placas:
+        item = resumen.setdefault(f["nombre"], {"formato": f["nombre"], "cantidad": 0, "precio_unitario": f["precio"]})
+        item["cantidad"] += 1
+    # Una placa del tamaño del formato más grande en cada sentido contiene a
+    # cualquiera de los formatos: la cota con esa placa sigue siendo válida
+    cota_ancho = max(_medidas_formato(f)[0] for f in formatos)
+    cota_alto = max(_medidas_formato(f)[1] for f in formatos)
+    data = {
+        **base,
+        **_metricas(layouts, dims_enteras(piezas), cota_ancho, cota_alto, dimensiones),
+        "placas": layouts,
+        "dimensiones_placas": dimensiones,
+        "formatos_placas": [f["nombre"] for f, _ in placas],
+        "resumen_formatos": [{**r, "subtotal": round(r["cantidad"] * r["precio_unitario"], 2)}
+                             for r in resumen.values()],
+        "costo_total": round(sum(f["precio"] for f, _ in placas), 2),
+        "formatos": formatos,
+    }
+    if arboles is not None:
+        data["arboles_corte"] = arboles
+        data["cant_cortes"] = sum(contar_cortes(a) for a in arboles)
+    if tiras is not None:
+        data["tiras"] = tiras
+    return data
+
+
+def _renumerar_tiras(tiras, quedan):
+    """Tiras de las placas que quedan (índices viejos en `quedan`), con la
+    placa renumerada a su nueva posición."""
+    nueva = {viejo: i for i, viejo in enumerate(quedan)}
+    return [{**t, "placa": nueva[t["placa"]]} for t in tiras if t["placa"] in nueva]
+
+
+def _mejorar_exacto(data, piezas, tiempo_limite_s=TIEMPO_EXACTO_DEFAULT):
+    """
+    Si el material tiene pocas piezas (hasta LIMITE_PIEZAS_EXACTO) y la
+    heurística no llegó a la cota inferior, busca con motor/exacto.py un
+    layout con menos placas dentro del tiempo límite. Devuelve el mismo
+    dict (con el layout exacto si mejoró) más "optimo_probado": si el
+    layout llegó a la cota inferior (la búsqueda no es completa, así que
+    no encontrar uno mejor no prueba nada).
+
+    Con varios formatos o piezas que no entran se deja como está.
+    """
+    if "formatos" in data or data["piezas_sin_ubicar"] or cant_piezas(piezas) > LIMITE_PIEZAS_EXACTO:
+        return data
+    if _es_optimo(data):
+        return {**data, "optimo_probado": True}
+    placa_ancho, placa_alto = data["placa_ancho"], data["placa_alto"]
+    dims = dims_enteras(piezas)
+    placas_g, optimo = exacto.empaquetar_exacto(dims, round(placa_ancho), round(placa_alto),
+                                                data["cota_inferior"], data["cant_placas"],
+                                                rotables=rotables(piezas), tiempo_limite_s=tiempo_limite_s)
+    if placas_g is None:
+        return {**data, "optimo_probado": optimo}
+
+    columnas = _columnas_layout(piezas)
+    placas = [_layout_desde_rects(pg.piezas, columnas) for pg in placas_g]
+    nuevo = {**data, **_metricas(placas, dims, placa_ancho, placa_alto), "placas": placas,
+             "optimo_probado": optimo}
+    if "tiras" in data:
+        nuevo["tiras"] = []   # el layout exacto no ripea tiras
+    if "arboles_corte" in data:
+        nuevo["arboles_corte"] = [_nombrar_arbol(pg.arbol, columnas["nombre"]) for pg in placas_g]
+        nuevo["cant_cortes"] = sum(contar_cortes(a) for a in nuevo["arboles_corte"])
+    return nuevo
+
+
+def _mejorar_busqueda_local(data, piezas, semilla=SEMILLA_DEFAULT, iteraciones=ITERACIONES_DEFAULT,
+                            tiempo_limite_s=TIEMPO_BUSQUEDA_DEFAULT, objetivo="placas"):
+    """
+    Corre la búsqueda local ruin-and-recreate (motor/busqueda_local.py)
+    sobre el layout de un material que todavía no alcanzó la cota
+    inferior. Una pieza del layout gira si su fila de la tabla (mismo
+    nombre y módulo) es rotable. Devuelve el dict con el mejor layout
+    encontrado y "busqueda_local": {"semilla", "iteraciones", "placas_antes"}.
+
+    Con objetivo "retazos" corre aunque ya esté en la cota: busca, con las
+    mismas placas, concentrar el sobrante en retazos aprovechables.
+    Con varios formatos se deja como está.
+    """
+    if "formatos" in data or not data["placas"]:
+        return data
+    if objetivo == "placas" and (_es_optimo(data) or data["cant_placas"] < 2):
+        return data
+    n = cant_piezas(piezas)
+    modulos = piezas["modulo"].tolist() if "modulo" in piezas else [None] * n
+    rota = dict(zip(zip(piezas["nombre"].tolist(), modulos), rotables(piezas) or [True] * n))
+    layouts, arboles, bloques = data["placas"], data.get("arboles_corte"), None
+    if data.get("tiras"):
+        # Cada tira se mueve entera, como una pieza que no gira
+        layouts, arboles, bloques = _colapsar_tiras(data)
+    mejora = busqueda_local.mejorar(
+        layouts, round(data["placa_ancho"]), round(data["placa_alto"]),
+        lambda p: p.get("tipo") != "Tira" and rota.get((p["nombre"], p.get("modulo")), True),
+        arboles=arboles, regla=_ALGOS_GUILLOTINA.get(data["algoritmo"], "slas"),
+        semilla=semilla, iteraciones=iteraciones, tiempo_limite_s=tiempo_limite_s, objetivo=objetivo,
+    )
+    if mejora is None:
+        return data
+    layouts, arboles = mejora
+    tiras = None
+    if bloques is not None:
+        layouts, tiras = _expandir_tiras(layouts, arboles, bloques)
+    nuevo = {
+        **data,
+        **_metricas(layouts, dims_enteras(piezas), data["placa_ancho"], data["placa_alto"]),
+        "placas": layouts,
+        "busqueda_local": {"semilla": semilla, "iteraciones": iteraciones, "placas_antes": data["cant_placas"]},
+    }
+    if arboles is not None:
+        nuevo["arboles_corte"] = arboles
+        nuevo["cant_cortes"] = sum(contar_cortes(a) for a in arboles)
+    if tiras is not None:
+        nuevo["tiras"] = tiras
+    return nuevo
+
+
+def _tiempo_fase(tiempo_s, fin):
+    """El tiempo de una fase de mejora, recortado a lo que queda hasta
+    `fin` (time.time(), que vale igual en los procesos del pool; None: sin
+    tope). 0 cuando ya no queda: la fase no corre."""
+    if not tiempo_s or fin is None:
+        return tiempo_s
+    return min(tiempo_s, max(0.0, fin - time.time()))
+
+
+def _mejorar_material(data, piezas, exacto_s, busqueda_local_s, semilla, iteraciones, objetivo, fin=None):
+    """Las fases de mejora sobre el layout de un material: búsqueda exacta
+    y búsqueda local (y, con objetivo "retazos", una segunda pasada con
+    ese objetivo). 0 o None en un tiempo apaga esa fase; con `fin`, cada
+    fase tiene a lo sumo lo que queda hasta ahí (ver _tiempo_fase)."""
+    exacto_s = _tiempo_fase(exacto_s, fin)
+    if exacto_s:
+        data = _mejorar_exacto(data, piezas, exacto_s)
+    tiempo_s = _tiempo_fase(busqueda_local_s, fin)
+    if tiempo_s:
+        data = _mejorar_busqueda_local(data, piezas, semilla, iteraciones, tiempo_s)
+        if objetivo == "retazos":
+            # Primero menos placas; después, con esas placas y el tiempo
+            # que quede, mejores retazos
+            tiempo_s = _tiempo_fase(busqueda_local_s, fin)
+            if tiempo_s:
+                data = _mejorar_busqueda_local(data, piezas, semilla, iteraciones, tiempo_s, objetivo)
+    return data
+
+
+def _mejorar_materiales(nuevos, piezas_por_material, workers=None, on_progreso=None, inicio=None, **fases):
+    """_mejorar_material sobre cada material; como en optimizar_corte, con
+    varios materiales y suficientes piezas cada uno va en su proceso.
+    on_progreso recibe, como en el portafolio pero con "fase": "mejora",
+    el resultado de cada material a medida que termina sus fases."""
+    inicio = inicio or time.monotonic()
+    workers = min(workers or os.cpu_count() or 1, len(nuevos))
+    mejorados = {}
+
+    def _terminado(material, data):
+        mejorados[material] = data
+        _avisar_progreso(on_progreso, material, data, inicio, len(mejorados), len(nuevos),
+                         data["cant_placas"] < nuevos[material]["cant_placas"], fase="mejora")
+
+    if workers <= 1 or sum(cant_piezas(piezas_por_material[m]) for m in nuevos) < MIN_PIEZAS_PARALELO:
+        for m, data in nuevos.items():
+            _terminado(m, _mejorar_material(data, piezas_por_material[m], **fases))
+        return mejorados
+    por_tamanio = sorted(nuevos, key=lambda m: cant_piezas(piezas_por_material[m]), reverse=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {pool.submit(_mejorar_material, nuevos[m], piezas_por_material[m], **fases): m
+                   for m in por_tamanio}
+        for futuro in as_completed(futuros):
+            _terminado(futuros[futuro], futuro.result())
+    return {m: mejorados[m] for m in nuevos}
+
+
+def _es_optimo(data):
+    """El layout ya usa la cota inferior de placas: ninguna otra estrategia
+    puede usar menos, así que no vale la pena seguir buscando."""
+    return not data["piezas_sin_ubicar"] and data["cant_placas"] <= data["cota_inferior"]
+
+
+def _clave_resultado(data, objetivo="placas", tiempos=None):
+    """Criterio para comparar layouts de un mismo material (menor es mejor):
+    primero que entren todas las piezas, después menos placas, con
+    objetivo "retazos" más área en retazos aprovechables, después menos
+    tiempo de seccionadora (ver _tiempo_sierra) y al final menos
+    desperdicio. El tiempo de seccionadora arma el árbol y la secuencia de
+    cada placa, así que se calcula una vez por layout y queda guardado en
+    data["_tiempo_sierra"] (optimizar_corte_portafolio lo saca al final)."""
+    clave = (len(data["piezas_sin_ubicar"]), data["cant_placas"])
+    if objetivo == "retazos":
+        retazos = sum(busqueda_local.area_retazos(layout, data["placa_ancho"], data["placa_alto"])
+                      for layout in data["placas"])
+        clave += (-retazos,)
+    if "_tiempo_sierra" not in data:
+        data["_tiempo_sierra"] = _tiempo_sierra(data, tiempos)
+    return clave + (data["_tiempo_sierra"], data["desperdicio_pct"])
+
+
+def optimizar_corte(piezas_por_material: dict, placa_ancho=PLACA_ANCHO_DEFAULT,
+                     placa_alto=PLACA_ALTO_DEFAULT, kerf=KERF_DEFAULT,
+                     algoritmo=ALGORITMO_DEFAULT, orden=ORDEN_DEFAULT, workers=None, ancho_tira=None):
+    """
+    Recibe un dict {material: piezas}, donde piezas es la tabla de
+    _piezas_desde_df (o una lista de dicts {"nombre","largo","ancho","tipo"}),
+    y devuelve por material:
+    - cantidad de placas necesarias
+    - % de desperdicio
+    - el layout de cada placa (qué pieza va dónde, para dibujar el diagrama)
+    - con un algoritmo guillotina, el árbol de cortes de cada placa
+      ("arboles_corte") y la cantidad total de cortes
+
+    Los materiales son independientes: si hay más de uno y suficientes
+    piezas, cada uno se resuelve en su propio proceso (hasta `workers`,
+    por defecto uno por núcleo) y la obra tarda lo que tarda su material
+    más pesado, no la suma.
+
+    ancho_tira: activa el modo "tiras primero" (ver _empaquetar_con_tiras)
+    con ese ancho máximo de tira, kerf incluido.
+
+    Esto NO modifica el despiece existente — es una capa de optimización
+    que se ejecuta sobre el resultado ya calculado.
+    """
+    if algoritmo not in ALGORITMOS:
+        raise ValueError(f"Algoritmo de optimización desconocido: {algoritmo}")
+    if orden not in ORDENES:
+        raise ValueError(f"Orden de piezas desconocido: {orden}")
+
+    tablas = {m: como_tabla(p) for m, p in piezas_por_material.items()}
+    tablas = {m: t for m, t in tablas.items() if cant_piezas(t)}
+    workers = min(workers or os.cpu_count() or 1, len(tablas))
+
+    if workers <= 1 or sum(cant_piezas(t) for t in tablas.values()) < MIN_PIEZAS_PARALELO:
+        return {m: _empaquetar_material(t, placa_ancho, placa_alto, algoritmo, orden, ancho_tira)
+                for m, t in tablas.items()}
+
+    # El material más grande se lanza primero para que no quede solo al final
+    por_tamanio = sorted(tablas, key=lambda m: cant_piezas(tablas[m]), reverse=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futuros = {m: pool.submit(_empaquetar_material, tablas[m], placa_ancho, placa_alto, algoritmo, orden,
+                                  ancho_tira)
+                   for m in por_tamanio}
+        return {m: futuros[m].result() for m in tablas}
+
+
+def _avisar_progreso(on_progreso, material, data, inicio, terminadas, total, mejora, fase="portafolio"):
+    if on_progreso is None:
+        return
+    on_progreso({
+        "fase": fase,
+        "material": material,
+        "cant_placas": data["cant_placas"],
+        "desperdicio_pct": data["desperdicio_pct"],
+        "cota_inferior": data["cota_inferior"],
+        "gap_pct": data["gap_pct"],
+        "algoritmo": data["algoritmo"],
+        "orden": data["orden"],
+        "mejora": mejora,
+        "terminadas": terminadas,
+        "total": total,
+        "transcurrido_s": round(time.monotonic() - inicio, 2),
+    })
+
+
+def optimizar_corte_portafolio(piezas_por_material: dict, placa_ancho=PLACA_ANCHO_DEFAULT,
+                                placa_alto=PLACA_ALTO_DEFAULT, kerf=KERF_DEFAULT,
+                                estrategias=None, workers=None,
+                                tiempo_limite_s=TIEMPO_PORTAFOLIO_DEFAULT, on_progreso=None,
+                                ancho_tira=None, objetivo="placas", tiempos_sierra=None):
+    """
+    Corre varias estrategias (algoritmo, orden) por material en un pool de
+    procesos y se queda, por material, con el layout de menos placas y
+    después menos desperdicio (ver _clave_resultado).
+
+    Es un optimizador "anytime": la primera estrategia se resuelve en este
+    proceso antes de lanzar el pool, así siempre hay un resultado; el resto
+    compite contra el reloj y al vencer tiempo_limite_s se devuelve lo
+    mejor encontrado hasta ese momento. Cada estrategia del pool recibe el
+    mismo plazo y se corta sola al pasarlo (ver _Plazo), así al vencer el
+    tiempo los núcleos quedan libres de verdad. Un material deja de buscar
+    apenas su layout alcanza la cota inferior (motor/cotas.py): ya es
+    óptimo.
+
+    on_progreso: callable opcional que recibe un dict por cada estrategia
+    terminada con "fase" ("portafolio"), "material", "cant_placas",
+    "desperdicio_pct" (del mejor layout del material hasta ahora),
+    "cota_inferior", "gap_pct", "mejora" (si esta estrategia lo mejoró),
+    "terminadas"/"total" y "transcurrido_s".
+
+    ancho_tira: como en optimizar_corte, para todas las estrategias.
+    objetivo: "placas" o "retazos" (desempata por área de retazos
+    aprovechables, ver _clave_resultado).
+    tiempos_sierra: tiempos de la seccionadora para desempatar por tiempo
+    de corte (ver motor/secuencia_corte.py).
+
+    Devuelve el mismo dict que optimizar_corte.
+    """
+    inicio = time.monotonic()
+    estrategias = list(estrategias or ESTRATEGIAS_PORTAFOLIO)
+    algoritmo0, orden0 = estrategias[0]
+    resultado = optimizar_corte(piezas_por_material, placa_ancho, placa_alto, kerf,
+                                algoritmo=algoritmo0, orden=orden0, ancho_tira=ancho_tira)
+
+    # Estrategia por estrategia (no material por material), así si se corta
+    # el tiempo todos los materiales recibieron las mismas estrategias
+    pendientes = [m for m, data in resultado.items() if not _es_optimo(data)]
+    tareas = [(m, a, o) for a, o in estrategias[1:] for m in pendientes]
+    total = len(resultado) + len(tareas)
+    for terminadas, (material, data) in enumerate(resultado.items(), start=1):
+        _avisar_progreso(on_progreso, material, data, inicio, terminadas, total, True)
+    if not tareas:
+        return resultado
+
+    terminadas = len(resultado)
+    restante = max(0.0, tiempo_limite_s - (time.monotonic() - inicio))
+    fin = time.time() + restante
+    pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+    try:
+        futuros = {
+            pool.submit(_empaquetar_material, como_tabla(piezas_por_material[m]), placa_ancho, placa_alto, a, o,
+                        ancho_tira, fin): m
+            for m, a, o in tareas
+        }
+        try:
+            for futuro in as_completed(futuros, timeout=restante):
+                terminadas += 1
+                material = futuros[futuro]
+                if futuro.cancelled() or futuro.exception() is not None:
+                    continue
+                candidato = futuro.result()
+                mejora = (_clave_resultado(candidato, objetivo, tiempos_sierra)
+                          < _clave_resultado(resultado[material], objetivo, tiempos_sierra))
+                if mejora:
+                    resultado[material] = candidato
+                _avisar_progreso(on_progreso, material, resultado[material],
+                                 inicio, terminadas, total, mejora)
+                if mejora and _es_optimo(candidato):
+                    # Óptimo probado: se cancela lo que falta de este material
+                    for otro, m in futuros.items():
+                        if m == material:
+                            otro.cancel()
+                    if material in pendientes:
+                        pendientes.remove(material)
+                    if not pendientes:
+                        break
+        except TimeoutError:
+            pass  # se agotó el tiempo: queda lo mejor encontrado
+    finally:
+        # Lo que no arrancó se cancela; lo que corre termina solo en `fin`
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    for data in resultado.values():
+        data.pop("_tiempo_sierra", None)
+    return resultado
+
+
+def etiquetas_modulos(modulos_con_df):
+    """Identificador estable de cada módulo de la obra: un hash de su
+    nombre, material y planilla de corte, más el número de aparición para
+    distinguir módulos repetidos ("3f9a...#0", "3f9a...#1"). No depende
+    de la posición en la obra, así que sobrevive a agregar o quitar otros
+    módulos."""
+    vistas = {}
+    etiquetas = []
+    for mod in modulos_con_df:
+        df = mod.get("df_corte")
+        planilla = df.to_csv(index=False) if df is not None else ""
+        firma = hashlib.sha1(json.dumps(
+            [str(mod.get("nombre", "")), str(mod.get("material", "")), planilla], ensure_ascii=False,
+        ).encode("utf-8")).hexdigest()[:12]
+        etiquetas.append(f"{firma}#{vistas.get(firma, 0)}")
+        vistas[firma] = vistas.get(firma, 0) + 1
+    return etiquetas
+
+
+def material_fondo(mod):
+    """Material de fondos y pisos de cajón de un módulo (mat_fondo_sel,
+    guardado en sus params), o None si el módulo va sin fondo."""
+    material = mod.get("params", {}).get("mat_fondo_sel") or mod.get("mat_fondo_sel") or MATERIAL_FONDO_DEFAULT
+    return None if material == "Sin fondo" else material
+
+
+def _piezas_por_material(modulos_con_df, kerf, excluir_tipos, fondos=True):
+    """Agrupa las piezas de la obra en una tabla por material, con la
+    columna "modulo" (ver etiquetas_modulos) en cada pieza. Las de
+    excluir_tipos van al material de fondo de su módulo (o se descartan si
+    fondos es False)."""
+    piezas_por_material = {}
+
+    for mod, etiqueta in zip(modulos_con_df, etiquetas_modulos(modulos_con_df)):
+        df = mod.get("df_corte")
+        material = mod.get("material", "Sin material")
+        if df is None or df.empty:
+            continue
+        grupos = [(material, df)]
+        if "Tipo" in df.columns:
+            # Tubos y demás herrajes no salen de la placa (ver motor/lineal.py)
+            df = df[~df["Tipo"].isin(TIPOS_SIN_PLACA)]
+            es_fondo = df["Tipo"].isin(excluir_tipos)
+            grupos = [(material, df[~es_fondo])]
+            if fondos and material_fondo(mod) and es_fondo.any():
+                grupos.append((material_fondo(mod), df[es_fondo]))
+        for mat, df_grupo in grupos:
+            piezas = _piezas_desde_df(df_grupo, kerf=kerf, material=mat)
+            if cant_piezas(piezas):
+                piezas_por_material.setdefault(mat, []).append(etiquetar(piezas, "modulo", etiqueta))
+
+    return {m: concatenar(tablas) for m, tablas in piezas_por_material.items()}
+
+
+def _optimizar_piezas(piezas_por_material, placa_ancho, placa_alto, kerf, algoritmo, portafolio, workers,
+                      tiempo_limite_s, deadline_s, on_progreso, retazos, usar_cache, formatos, tiras,
+                      exacto_s, busqueda_local_s, semilla, iteraciones, objetivo, precios, tiempos_sierra,
+                      fin=None):
+    """El recorrido completo de optimizar_obra sobre las piezas ya
+    agrupadas por material: retazos del depósito, cache, empaquetado,
+    fases de mejora y datos para el taller. Lo comparten optimizar_obra y
+    optimizar_lote. fin: hora (time.time) en que vence deadline_s, contada
+    desde que el llamador empezó a armar las piezas."""
+    if objetivo not in OBJETIVOS:
+        raise ValueError(f"Objetivo desconocido: {objetivo}")
+    inicio = time.monotonic()
+    # deadline_s es para todo el recorrido: portafolio, fases de mejora y
+    # lo que se agrega después, que se descuenta de entrada
+    if fin is None and deadline_s is not None:
+        fin = time.time() + deadline_s
+    if fin is not None:
+        fin -= RESERVA_POSPROCESO_S * sum(cant_piezas(p) for p in piezas_por_material.values())
+    ancho_tira = ANCHO_TIRA_RIPEO + kerf if tiras else None
+
+    uso_retazos = {}
+    if retazos:
+        piezas_por_material, uso_retazos = _consumir_retazos(piezas_por_material, retazos)
+
+    if deadline_s is not None:
+        portafolio, tiempo_limite_s = True, deadline_s
+
+    def _formatos_de(material):
+        return formatos.get(material) if isinstance(formatos, dict) else formatos
+
+    claves, resultado = {}, {}
+    if usar_cache:
+        # Con portafolio el resultado depende del tiempo que tuvo para buscar:
+        # una corrida con más tiempo no puede devolver la de una con menos
+        estrategia = [algoritmo, "portafolio" if portafolio else "simple", ancho_tira,
+                      tiempo_limite_s if portafolio else None, exacto_s or None,
+                      [semilla, iteraciones, busqueda_local_s] if busqueda_local_s else None, objetivo,
+                      sorted({**TIEMPOS_SIERRA_DEFAULT, **(tiempos_sierra or {})}.items())]
+        claves = {m: cache_optimizacion.clave_material(p, placa_ancho, placa_alto, kerf,
+                                                      estrategia + [_formatos_de(m) if formatos else None])
+                  for m, p in piezas_por_material.items()}
+        resultado = cache_optimizacion.leer(claves)
+        resultado = {m: data for m, data in ((m, _reetiquetar(data, piezas_por_material[m]))
+                                             for m, data in resultado.items()) if data is not None}
+    pendientes = {m: p for m, p in piezas_por_material.items() if m not in resultado}
+
+    if pendientes and formatos:
+        nuevos = {}
+        for m, p in pendientes.items():
+            if _formatos_de(m):
+                nuevos[m] = _empaquetar_con_formatos(p, _formatos_de(m), algoritmo, ancho_tira=ancho_tira)
+            else:
+                nuevos[m] = _empaquetar_material(p, placa_ancho, placa_alto, algoritmo, ancho_tira=ancho_tira)
+    elif pendientes and portafolio:
+        base = ESTRATEGIAS_GUILLOTINA if es_guillotina(algoritmo) else ESTRATEGIAS_PORTAFOLIO
+        # La estrategia pedida va primero: es la que se garantiza
+        estrategias = [(algoritmo, ORDEN_DEFAULT)] + [e for e in base if e != (algoritmo, ORDEN_DEFAULT)]
+        if fin is not None:
+            tiempo_limite_s = max(0.0, fin - time.time())
+        nuevos = optimizar_corte_portafolio(pendientes, placa_ancho, placa_alto, kerf,
+                                            estrategias=estrategias, workers=workers,
+                                            tiempo_limite_s=tiempo_limite_s, on_progreso=on_progreso,
+                                            ancho_tira=ancho_tira, objetivo=objetivo,
+                                            tiempos_sierra=tiempos_sierra)
+    elif pendientes:
+        nuevos = optimizar_corte(pendientes, placa_ancho, placa_alto, kerf, algoritmo=algoritmo,
+                                 workers=workers, ancho_tira=ancho_tira)
+    else:
+        nuevos = {}
+    if exacto_s or busqueda_local_s:
+        nuevos = _mejorar_materiales(nuevos, pendientes, workers, on_progreso, inicio, exacto_s=exacto_s,
+                                     busqueda_local_s=busqueda_local_s, semilla=semilla,
+                                     iteraciones=iteraciones, objetivo=objetivo, fin=fin)
+    if usar_cache:
+        cache_optimizacion.guardar(nuevos, claves)
+    # Se respeta el orden de materiales de la obra
+    resultado = {m: resultado.get(m) or nuevos[m] for m in piezas_por_material if m in resultado or m in nuevos}
+
+    for material, uso in uso_retazos.items():
+        resultado.setdefault(material, _resultado_vacio(placa_ancho, placa_alto, algoritmo)).update(uso)
+
+    for material, data in resultado.items():
+        _agregar_sobrantes(data)
+        _agregar_patrones(data)
+        _agregar_secuencias(data, tiempos_sierra)
+        if precios and precios.get(material):
+            _agregar_valor_retazos(data, precios[material])
+
+    return resultado
+
+
+def _tipo_modulo(mod):
+    return mod.get("tipo") or mod.get("params", {}).get("tipo_modulo") or mod.get("tipo_modulo") or "Otro"
+
+
+def _corridas_estimador(resultado, piezas_por_material, modulos_con_df, kerf, excluir_tipos=("Fondo", "Piso")):
+    """Corridas para recalibrar motor/estimador.py: por material, los m²
+    netos (sin kerf) de piezas por tipo de módulo y las placas usadas. Las
+    piezas de excluir_tipos (fondos y pisos de cajón) cuentan en
+    estimador.CLASE_FONDO, no en el tipo de su módulo. Quedan afuera los
+    materiales con retazos del depósito, con varios formatos o con piezas
+    sin ubicar, que no miden el desperdicio real."""
+    tipos = dict(zip(etiquetas_modulos(modulos_con_df), (_tipo_modulo(m) for m in modulos_con_df)))
+    corridas = []
+    for material, data in resultado.items():
+        piezas = piezas_por_material.get(material)
+        if (piezas is None or "formatos" in data or data.get("retazos_usados") or data["piezas_sin_ubicar"]
+                or not data["cant_placas"]):
+            continue
+        m2_por_tipo = {}
+        netas = (piezas["largo"] - kerf) * (piezas["ancho"] - kerf) / 1e6
+        for etiqueta, tipo_pieza, m2 in zip(piezas["modulo"].tolist(), piezas["tipo"].tolist(), netas.tolist()):
+            tipo = estimador.CLASE_FONDO if tipo_pieza in excluir_tipos else tipos.get(etiqueta, "Otro")
+            m2_por_tipo[tipo] = m2_por_tipo.get(tipo, 0.0) + m2
+        corridas.append({"m2_por_tipo": {t: round(m2, 4) for t, m2 in m2_por_tipo.items()},
+                         "placas": data["cant_placas"],
+                         "m2_placa": round(data["placa_ancho"] * data["placa_alto"] / 1e6, 4)})
+    return corridas
+
+
+def optimizar_obra(modulos_con_df, placa_ancho=PLACA_ANCHO_DEFAULT,
+                    placa_alto=PLACA_ALTO_DEFAULT, kerf=KERF_DEFAULT,
+                    excluir_tipos=("Fondo", "Piso"), algoritmo=ALGORITMO_DEFAULT,
+                    fondos=True, portafolio=False, workers=None, tiempo_limite_s=TIEMPO_PORTAFOLIO_DEFAULT,
+                    deadline_s=None, on_progreso=None, retazos=None, usar_cache=True,
+                    formatos=None, tiras=False, exacto_s=None,
+                    busqueda_local_s=None, semilla=SEMILLA_DEFAULT,
+                    iteraciones=ITERACIONES_DEFAULT, objetivo="placas", precios=None,
+                    tiempos_sierra=None, calibrar_estimador=True):
+    """
+    Punto de entrada principal: recibe la lista de módulos de una obra
+    (cada uno con su df_corte y su material), agrupa todas las piezas
+    de cuerpo por material, y corre el optimizador.
+
+    excluir_tipos: piezas que no van en el material del cuerpo (fondos y
+    pisos de cajón suelen ser Fibroplus/Faplac, no la melamina principal).
+    Con fondos=True se optimizan como otro material más, agrupadas por el
+    mat_fondo_sel de cada módulo, en la misma corrida (misma cache y mismo
+    paralelismo); con fondos=False se dejan afuera.
+
+    algoritmo: "maxrects" (layout libre) o "guillotina" (solo cortes de
+    lado a lado, apto para seccionadora) — ver ALGORITMOS.
+
+    portafolio: si es True, en vez de una sola estrategia compite el
+    portafolio completo en `workers` procesos durante tiempo_limite_s
+    (ver optimizar_corte_portafolio). Con un algoritmo guillotina solo
+    compiten variantes guillotina, para que el layout siga siendo cortable
+    en la seccionadora.
+
+    deadline_s / on_progreso: modo "anytime". Con deadline_s se activa el
+    portafolio; deadline_s es el tiempo de todo el recorrido desde que se
+    llama (armar las piezas, buscar y agregar sobrantes, patrones y
+    secuencias), así que las fases de mejora (exacta y búsqueda local)
+    usan lo que deje el portafolio y no corren si ya no queda. Lo único
+    que no se corta es la primera estrategia, que se resuelve entera para
+    tener siempre un resultado: en obras de miles de piezas con un
+    deadline_s de un segundo puede pasarse de ese tiempo. Al vencer
+    devuelve el mejor layout encontrado y, mientras tanto, on_progreso
+    recibe cada avance (placas, % de desperdicio y cota inferior, con
+    "fase" "portafolio" o "mejora") para mostrarlo en la UI.
+
+    retazos: inventario del depósito (lo que devuelve
+    consultar_retazos_disponibles). Si se pasa, las piezas se ubican
+    primero en los retazos del mismo material, del más chico que sirve al
+    más grande, y solo lo que sobra abre placas enteras. Cada material
+    informa "retazos_usados" (ids) y "placas_retazo" (layout por retazo).
+
+    Además, cada material trae "retazos_sobrantes": los recortes que
+    quedan libres y superan el mínimo de es_retazo_util, para guardarlos
+    en el depósito de una sola vez.
+
+    Y "patrones": las placas con el mismo layout agrupadas, para dibujar
+    y exportar cada layout una sola vez.
+
+    usar_cache: busca primero cada material en la cache persistente
+    (motor/cache_optimizacion.py) y guarda ahí lo que haya que calcular.
+
+    formatos: catálogo de formatos de placa con precio (lista, o dict
+    {material: lista}; ver formatos_placa.catalogo). Si se pasa, en vez de
+    una placa fija se elige la mezcla de formatos de menor costo total
+    (ver _empaquetar_con_formatos) con el algoritmo pedido, sin portafolio.
+
+    tiras: modo "tiras primero". Las piezas de hasta ANCHO_TIRA_RIPEO de
+    ancho se agrupan por ancho en tiras ripeadas a lo largo de la placa y
+    se trocean; el empaquetado 2D solo ubica las piezas anchas y las tiras
+    (ver _empaquetar_con_tiras). Cada material informa sus "tiras".
+
+    exacto_s: tiempo límite de la búsqueda exacta (motor/exacto.py) que se
+    corre sobre los materiales de hasta LIMITE_PIEZAS_EXACTO piezas cuando
+    la heurística no llegó a la cota inferior. Por defecto está apagada
+    (p. ej. TIEMPO_EXACTO_DEFAULT la prende). Esos materiales informan
+    "optimo_probado".
+
+    busqueda_local_s / semilla / iteraciones: fase de mejora
+    ruin-and-recreate (motor/busqueda_local.py) sobre los materiales que
+    siguen por encima de la cota inferior, para sacar la última placa casi
+    vacía. Con la misma semilla e iteraciones el resultado es el mismo
+    (busqueda_local_s es solo un tope de tiempo por material). Por defecto
+    está apagada (p. ej. TIEMPO_BUSQUEDA_DEFAULT la prende).
+
+    objetivo: "placas" (menos placas y menos desperdicio) o "retazos":
+    con las mismas placas, prefiere el layout que concentra el sobrante en
+    retazos aprovechables (es_retazo_util) en vez de tiras sueltas.
+
+    Cada material informa "area_retazos_m2"; con precios ({material:
+    precio de la placa de referencia}) también "valor_retazos", lo que
+    valen esos retazos para acreditarlos en la cotización.
+
+    Cada placa trae su secuencia de corte en la seccionadora y el material
+    el "tiempo_sierra_s" total (ver _agregar_secuencias), con los tiempos
+    por corte, giro, refilado y carga de tiempos_sierra (por defecto
+    TIEMPOS_SIERRA_DEFAULT). Entre layouts con las mismas placas el
+    portafolio se queda con el de menor tiempo.
+
+    calibrar_estimador: registra las placas usadas por cada material para
+    recalibrar el estimador instantáneo del Cotizador (motor/estimador.py).
+    """
+    fin = time.time() + deadline_s if deadline_s is not None else None
+    piezas_por_material = _piezas_por_material(modulos_con_df, kerf, excluir_tipos, fondos)
+    resultado = _optimizar_piezas(piezas_por_material, placa_ancho, placa_alto, kerf, algoritmo, portafolio,
+                                  workers, tiempo_limite_s, deadline_s, on_progreso, retazos, usar_cache, formatos,
+                                  tiras, exacto_s, busqueda_local_s, semilla, iteraciones, objetivo, precios,
+                                  tiempos_sierra, fin)
+    if calibrar_estimador:
+        estimador.registrar_corridas(_corridas_estimador(resultado, piezas_por_material, modulos_con_df, kerf,
+                                                         excluir_tipos))
+    return resultado
+
+
+def _agregar_proyectos(data):
+    """Agrega "proyectos" a un material del corte semanal: por proyecto,
+    cuántas piezas tiene, en qué placas (índices) y retazos del depósito
+    van, y el área de esas piezas en m², para repartir el material."""
+    proyectos = {}
+
+    def _resumen(proyecto):
+        return proyectos.setdefault(proyecto, {"piezas": 0, "placas": [], "retazos": [], "area_m2": 0.0})
+
+    for i, layout in enumerate(data["placas"]):
+        for p in layout:
+            r = _resumen(p.get("proyecto"))
+            r["piezas"] += 1
+            r["area_m2"] += p["w"] * p["h"] / 1e6
+            if not r["placas"] or r["placas"][-1] != i:
+                r["placas"].append(i)
+    for usado in data.get("placas_retazo", []):
+        for p in usado["piezas"]:
+            r = _resumen(p.get("proyecto"))
+            r["piezas"] += 1
+            r["area_m2"] += p["w"] * p["h"] / 1e6
+            if usado["retazo_id"] not in r["retazos"]:
+                r["retazos"].append(usado["retazo_id"])
+    for r in proyectos.values():
+        r["area_m2"] = round(r["area_m2"], 3)
+    data["proyectos"] = proyectos
+
+
+def optimizar_lote(obras, placa_ancho=PLACA_ANCHO_DEFAULT, placa_alto=PLACA_ALTO_DEFAULT,
+                   kerf=KERF_DEFAULT, excluir_tipos=("Fondo", "Piso"), algoritmo=ALGORITMO_DEFAULT,
+                   fondos=True, workers=None, deadline_s=TIEMPO_LOTE_DEFAULT, on_progreso=None,
+                   retazos=None, usar_cache=True, tiras=False, exacto_s=None,
+                   busqueda_local_s=None, semilla=SEMILLA_DEFAULT,
+                   iteraciones=ITERACIONES_DEFAULT, objetivo="placas", precios=None, tiempos_sierra=None):
+    """
+    Corte semanal: optimiza juntas las piezas de varias obras, todas las
+    de un mismo material en las mismas placas.
+
+    obras: dict {proyecto: modulos_con_df} (el proyecto es el id de la
+    venta o cualquier identificador; se respeta el orden). Cada pieza del
+    layout trae, además de su "modulo", el "proyecto" del que sale, para
+    que las etiquetas sigan siendo trazables, y cada material informa
+    "proyectos" (ver _agregar_proyectos).
+
+    Con miles de piezas el portafolio corre en `workers` procesos con
+    deadline_s de tiempo límite (None: una sola estrategia), y las fases
+    de mejora, si se prenden, van un material por proceso. El resto de los
+    parámetros son los de optimizar_obra.
+    """
+    fin = time.time() + deadline_s if deadline_s is not None else None
+    tablas = {}
+    for proyecto, modulos_con_df in obras.items():
+        for material, piezas in _piezas_por_material(modulos_con_df, kerf, excluir_tipos, fondos).items():
+            tablas.setdefault(material, []).append(etiquetar(piezas, "proyecto", str(proyecto)))
+    piezas_por_material = {m: concatenar(t) for m, t in tablas.items()}
+
+    resultado = _optimizar_piezas(piezas_por_material, placa_ancho, placa_alto, kerf, algoritmo,
+                                  deadline_s is not None, workers, deadline_s, deadline_s, on_progreso,
+                                  retazos, usar_cache, None, tiras, exacto_s, busqueda_local_s, semilla,
+                                  iteraciones, objetivo, precios, tiempos_sierra, fin)
+    for data in resultado.values():
+        _agregar_proyectos(data)
+    return resultado
+
+
+def _placas_para_completar(data, conservar):
+    """PlacaGuillotina de cada placa a conservar, con su espacio libre
+    listo para recibir piezas: las hojas libres del árbol si el layout es
+    guillotina, o huecos disjuntos si es un layout libre."""
+    placas = []
+    for i in conservar:
+        ancho, alto = (round(d) for d in dimensiones_placa(data, i))
+        if "arboles_corte" in data:
+            placas.append(PlacaGuillotina(ancho, alto, arbol=copy.deepcopy(data["arboles_corte"][i])))
+        else:
+            ocupados = [(p["x"], p["y"], p["w"], p["h"]) for p in data["placas"][i]]
+            libres = [{"x": x, "y": y, "w": w, "h": h}
+                      for x, y, w, h in rectangulos_disjuntos(ocupados, ancho, alto)]
+            placas.append(PlacaGuillotina(ancho, alto, libres=libres))
+    return placas
+
+
+def _reoptimizar_material(data, piezas, algoritmo):
+    """Actualiza el layout de un material sin rehacerlo (ver
+    reoptimizar_obra). `piezas` es la tabla actual, con columna "modulo"."""
+    actuales = set(piezas["modulo"].tolist())
+    previas = {p.get("modulo") for layout in data["placas"] for p in layout}
+    previas |= {p.get("modulo") for r in data.get("placas_retazo", []) for p in r["piezas"]}
+    quitados = previas - actuales
+    nuevos = actuales - previas
+    if not quitados and not nuevos:
+        return data
+
+    placa_ancho, placa_alto = data["placa_ancho"], data["placa_alto"]
+    algoritmo = algoritmo or data["algoritmo"]
+    tocadas = [i for i, layout in enumerate(data["placas"]) if any(p.get("modulo") in quitados for p in layout)]
+    conservar = [i for i in range(len(data["placas"])) if i not in tocadas]
+
+    # Piezas a ubicar: lo que queda de las placas tocadas más los módulos nuevos
+    sueltas = [[p for p in data["placas"][i] if p.get("modulo") not in quitados] for i in tocadas]
+    pendientes = concatenar([
+        _tabla_de_layouts(sueltas, piezas),
+        filas(piezas, [m in nuevos for m in piezas["modulo"].tolist()]),
+    ])
+
+    placas = _placas_para_completar(data, conservar)
+    regla = _ALGOS_GUILLOTINA.get(algoritmo, "slas")
+    dims = dims_enteras(pendientes)
+    sin_ubicar = completar_placas(dims, placas, regla=regla, orden=data["orden"],
+                                  rotables=rotables(pendientes))
+
+    cols_pendientes = _columnas_layout(pendientes)
+    layouts = [data["placas"][i] + _layout_desde_rects(pg.piezas, cols_pendientes)
+               for i, pg in zip(conservar, placas)]
+    extra = _empaquetar_material(filas(pendientes, sorted(sin_ubicar)), placa_ancho, placa_alto,
+                                 algoritmo, data["orden"], data.get("ancho_tira"))
+    layouts += extra["placas"]
+
+    nuevo = {
+        **data,
+        **_metricas(layouts, dims_enteras(piezas), placa_ancho, placa_alto),
+        "placas": layouts,
+        "piezas_sin_ubicar": [n for n, (l, a), r in zip(piezas["nombre"].tolist(), dims_enteras(piezas),
+                                                         rotables(piezas) or [True] * cant_piezas(piezas))
+                              if not _entra(l, a, placa_ancho, placa_alto, r)],
+    }
+    if "arboles_corte" in data:
+        arboles = [_nombrar_arbol(pg.arbol, cols_pendientes["nombre"]) for pg in placas]
+        arboles += extra.get("arboles_corte", [])
+        nuevo["arboles_corte"] = arboles
+        nuevo["cant_cortes"] = sum(contar_cortes(a) for a in arboles)
+    if "tiras" in data:
+        # Las tiras de placas desarmadas se vuelven a armar en `extra`
+        nuevo["tiras"] = _renumerar_tiras(data["tiras"], conservar) + [
+            {**t, "placa": t["placa"] + len(conservar)} for t in extra["tiras"]]
+    if "placas_retazo" in data:
+        usados = [{**r, "piezas": [p for p in r["piezas"] if p.get("modulo") not in quitados]}
+                  for r in data["placas_retazo"]]
+        nuevo["placas_retazo"] = [r for r in usados if r["piezas"]]
+        nuevo["retazos_usados"] = [r["retazo_id"] for r in nuevo["placas_retazo"]]
+    return nuevo
+
+
+def _entra(largo, ancho, placa_ancho, placa_alto, rotable=True):
+    if largo <= placa_ancho and ancho <= placa_alto:
+        return True
+    return rotable and ancho <= placa_ancho and largo <= placa_alto
+
+
+def reoptimizar_obra(resultado_previo, modulos_con_df, kerf=KERF_DEFAULT,
+                     excluir_tipos=("Fondo", "Piso"), algoritmo=None, fondos=True, precios=None,
+                     tiempos_sierra=None):
+    """
+    Actualiza un resultado de optimizar_obra después de agregar o quitar
+    módulos, sin rehacer el layout completo:
+    - las piezas de los módulos nuevos van primero al espacio libre de las
+      placas que ya existen, y solo se abren placas nuevas si no entran;
+    - las placas que tenían piezas de un módulo quitado se desarman y sus
+      piezas restantes se re-ubican igual que las nuevas; el resto de las
+      placas no se toca.
+
+    Los módulos se reconocen por etiquetas_modulos, así que el resultado
+    previo tiene que venir de optimizar_obra (trae "modulo" en cada pieza).
+    Los materiales sin esa información o nuevos en la obra se optimizan de
+    cero. Para rehacer todo, llamar de nuevo a optimizar_obra. precios:
+    como en optimizar_obra, para informar "valor_retazos"; tiempos_sierra,
+    para las secuencias de corte.
+    """
+    piezas_por_material = _piezas_por_material(modulos_con_df, kerf, excluir_tipos, fondos)
+    base = next(iter(resultado_previo.values()), None)
+    placa_ancho = base["placa_ancho"] if base else PLACA_ANCHO_DEFAULT
+    placa_alto = base["placa_alto"] if base else PLACA_ALTO_DEFAULT
+
+    resultado = {}
+    for material, piezas in piezas_por_material.items():
+        previo = resultado_previo.get(material)
+        etiquetado = previo and all("modulo" in p for layout in previo["placas"] for p in layout)
+        if previo and "formatos" in previo:
+            # Con varios formatos la mezcla óptima puede cambiar: se recalcula
+            resultado[material] = _empaquetar_con_formatos(piezas, previo["formatos"],
+                                                           algoritmo or previo["algoritmo"], previo["orden"],
+                                                           previo.get("ancho_tira"))
+        elif etiquetado:
+            resultado[material] = _reoptimizar_material(previo, piezas, algoritmo)
+        else:
+            resultado[material] = _empaquetar_material(piezas, placa_ancho, placa_alto,
+                                                       algoritmo or ALGORITMO_DEFAULT)
+        _agregar_sobrantes(resultado[material])
+        _agregar_patrones(resultado[material])
+        _agregar_secuencias(resultado[material], tiempos_sierra)
+        if precios and precios.get(material):
+            _agregar_valor_retazos(resultado[material], precios[material])
+    return resultado
+
+
+def generar_svg_placa(layout_placa, placa_ancho, placa_alto, max_width_px=600):
+    """Genera un SVG del diagrama de corte de UNA placa — para mostrar
+    visualmente al carpintero dónde va cada pieza antes de cortar."""
+    escala = max_width_px / placa_ancho
+    w_px = max_width_px
+    h_px = placa_alto * escala
+
+    colores = ["#1D9E75", "#0F6E56", "#5B7FD4", "#D4AF7A", "#A0522D",
+               "#7A6040", "#9B7D55", "#8B6F47", "#2A4099", "#6B8E23"]
+
+    svg = [f'<svg viewBox="0 0 {w_px} {h_px}" xmlns="http://www.w3.org/2000/svg" '
+           f'style="width:100%;max-width:{max_width_px}px;border:2px solid #5D4E37;border-radius:4px;background:#FAFAF8;">']
+
+    for i, pieza in enumerate(layout_placa):
+        x = pieza["x"] * escala
+        y = pieza["y"] * escala
+        w = pieza["w"] * escala
+        h = pieza["h"] * escala
+        color = colores[i % len(colores)]
+        svg.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="{w:.1f}" height="{h:.1f}" '
+                   f'fill="{color}" opacity="0.75" stroke="#333" stroke-width="0.5"/>')
+        # Etiqueta solo si la pieza es lo bastante grande para mostrar texto
+        if w > 40 and h > 18:
+            label = html.escape(str(pieza["nombre"])[:18])
+            svg.append(f'<text x="{x+w/2:.1f}" y="{y+h/2:.1f}" text-anchor="middle" '
+                       f'dominant-baseline="middle" font-size="9" fill="white" font-weight="600">{label}</text>')
+
+    svg.append('</svg>')
+    return '\n'.join(svg)
+
+
+# --- Línea de comandos ------------------------------------------------------
+
+# Nombres de columna de las otras planillas del sistema (orden de producción,
+# CSV para Aspire) -> los de df_corte
+_COLUMNAS_CSV = {
+    "Largo": "L", "Largo mm": "L", "Length": "L",
+    "Ancho": "A", "Ancho mm": "A", "Width": "A",
+    "Cantidad": "Cant", "Quantity": "Cant",
+    "Name": "Pieza",
+    "Tipo de modulo": "Tipo modulo",
+}
+
+
+def modulos_desde_obra(datos):
+    """
+    Módulos con df_corte a partir de una obra guardada: la lista que arma
+    _serializar_obra_para_nube en app.py, o el dict de parámetros de la
+    venta ({"es_obra": True, "modulos": [...]}). El despiece se rehace
+    con generar_despiece_batch.
+    """
+    if isinstance(datos, dict):
+        datos = datos.get("modulos", [datos])
+    argumentos = [args_despiece(m) for m in datos]
+    tabla = pd.DataFrame(generar_despiece_batch(argumentos))
+    por_modulo = {k: df.drop(columns="modulo").reset_index(drop=True) for k, df in tabla.groupby("modulo")}
+    modulos = []
+    for i, (m, args) in enumerate(zip(datos, argumentos)):
+        df = por_modulo.get(i)
+        if df is None:
+            continue
+        modulos.append({
+            "nombre": m.get("nombre") or f"Módulo {i + 1}",
+            "tipo": args["tipo"],
+            "material": m.get("mat_principal") or m.get("material") or "Sin material",
+            "mat_fondo_sel": m.get("mat_fondo_sel") or MATERIAL_FONDO_DEFAULT,
+            "df_corte": df,
+        })
+    return modulos
+
+
+def modulos_desde_csv(ruta):
+    """
+    Módulos a partir de una planilla de corte CSV (separador "," o ";"):
+    columnas Pieza, L, A, Cant y, opcionales, Tipo, Material, Veta y
+    Modulo (también con los nombres del orden de producción o del CSV para
+    Aspire). Sin columna Modulo, cada material es un módulo.
+    """
+    df = pd.read_csv(ruta, sep=None, engine="python", encoding="utf-8-sig")
+    df = df.rename(columns={c: _COLUMNAS_CSV[c] for c in df.columns if c in _COLUMNAS_CSV})
+    faltan = [c for c in ("L", "A") if c not in df.columns]
+    if faltan:
+        raise ValueError(f"La planilla no tiene las columnas {', '.join(faltan)} (largo y ancho)")
+    if "Cant" not in df.columns:
+        df["Cant"] = 1
+    if "Material" not in df.columns:
+        df["Material"] = "Sin material"
+    df["Material"] = df["Material"].fillna("Sin material").astype(str)
+    claves = ["Modulo", "Material"] if "Modulo" in df.columns else ["Material"]
+    modulos = []
+    for clave, grupo in df.groupby(claves, sort=False):
+        clave = clave if isinstance(clave, tuple) else (clave,)
+        modulos.append({
+            "nombre": str(clave[0]),
+            "tipo": str(grupo["Tipo modulo"].iloc[0]) if "Tipo modulo" in grupo else "Otro",
+            "material": clave[-1],
+            "df_corte": grupo.reset_index(drop=True),
+        })
+    return modulos
+
+
+def _nombre_archivo(texto):
+    return re.sub(r"[^\w.-]+", "_", str(texto)).strip("_") or "material"
+
+
+def _escribir_salidas(resultado, carpeta):
+    """Escribe resultado.json, un SVG por patrón de corte y patrones.dxf
+    (si está ezdxf). Devuelve la lista de archivos escritos."""
+    carpeta = Path(carpeta)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    escritos = [carpeta / "resultado.json"]
+    with open(escritos[0], "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=1,
+                  default=lambda v: v.item() if hasattr(v, "item") else str(v))
+    for material, data in resultado.items():
+        for pat in data.get("patrones") or []:
+            ruta = carpeta / f"{_nombre_archivo(material)}_patron_{pat['patron']}.svg"
+            ruta.write_text(generar_svg_placa(pat["layout"], pat["placa_ancho"], pat["placa_alto"],
+                                              max_width_px=1200), encoding="utf-8")
+            escritos.append(ruta)
+    try:
+        from .exportadores import generar_dxf_patrones
+    except ImportError:
+        print("Aviso: falta ezdxf (o fpdf2), no se escribe el DXF.", file=sys.stderr)
+    else:
+        escritos.append(carpeta / "patrones.dxf")
+        escritos[-1].write_bytes(generar_dxf_patrones(resultado))
+    return escritos
+
+
+def _medida_placa(texto):
+    try:
+        ancho, alto = (float(v) for v in texto.lower().replace("×", "x").split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"medida de placa inválida: {texto!r} (ej.: 2440x1830)")
+    return ancho, alto
+
+
+def main(argv=None):
+    """Optimiza una obra (JSON) o una planilla de corte (CSV) y escribe
+    los layouts en JSON, SVG y DXF."""
+    parser = argparse.ArgumentParser(
+        prog="python -m motor.optimizador",
+        description="Optimizador de corte BVM: obra guardada (.json) o planilla de corte (.csv) "
+                    "-> layouts en JSON, SVG y DXF.",
+    )
+    parser.add_argument("entrada", type=Path, help="obra .json (como se guarda en la nube) o planilla .csv")
+    parser.add_argument("-o", "--salida", type=Path,
+                        help="carpeta de salida (por defecto <entrada>_corte junto a la entrada)")
+    parser.add_argument("--algoritmo", choices=ALGORITMOS, default=ALGORITMO_DEFAULT)
+    parser.add_argument("--placa", type=_medida_placa, default=(PLACA_ANCHO_DEFAULT, PLACA_ALTO_DEFAULT),
+                        metavar="ANCHOxALTO",
+                        help=f"medida de la placa en mm (por defecto {PLACA_ANCHO_DEFAULT:g}x{PLACA_ALTO_DEFAULT:g})")
+    parser.add_argument("--kerf", type=float, default=KERF_DEFAULT, help="espesor de la sierra en mm")
+    parser.add_argument("--workers", type=int, help="procesos (por defecto uno por núcleo)")
+    parser.add_argument("--tiempo", type=float,
+                        help="presupuesto en s: corre el portafolio de estrategias hasta ese tiempo "
+                             "(sin esto, una sola estrategia)")
+    parser.add_argument("--tiras", action="store_true", help="ripear primero las piezas angostas en tiras")
+    parser.add_argument("--objetivo", choices=OBJETIVOS, default="placas")
+    parser.add_argument("--mejorar", action="store_true",
+                        help=f"correr además la búsqueda exacta ({TIEMPO_EXACTO_DEFAULT:g} s) y la búsqueda "
+                             f"local ({TIEMPO_BUSQUEDA_DEFAULT:g} s) sobre los materiales lejos del mínimo")
+    parser.add_argument("--sin-cache", action="store_true", help="no leer ni guardar la cache de optimizaciones")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.entrada.suffix.lower() == ".csv":
+            modulos = modulos_desde_csv(args.entrada)
+        else:
+            modulos = modulos_desde_obra(json.loads(args.entrada.read_text(encoding="utf-8")))
+    except (OSError, ValueError) as e:
+        parser.error(f"no se pudo leer {args.entrada}: {e}")
+    if not modulos:
+        parser.error(f"{args.entrada} no tiene piezas para cortar")
+
+    def _progreso(ev):
+        print(f"  {ev['material']}: {ev['cant_placas']} placas ({ev['terminadas']}/{ev['total']}, "
+              f"{ev['transcurrido_s']:.1f} s)", file=sys.stderr)
+
+    inicio = time.monotonic()
+    resultado = optimizar_obra(
+        modulos, placa_ancho=args.placa[0], placa_alto=args.placa[1], kerf=args.kerf,
+        algoritmo=args.algoritmo, workers=args.workers, deadline_s=args.tiempo,
+        on_progreso=_progreso if args.tiempo else None, usar_cache=not args.sin_cache,
+        tiras=args.tiras, objetivo=args.objetivo,
+        exacto_s=TIEMPO_EXACTO_DEFAULT if args.mejorar else None,
+        busqueda_local_s=TIEMPO_BUSQUEDA_DEFAULT if args.mejorar else None,
+    )
+    carpeta = args.salida or args.entrada.with_name(f"{args.entrada.stem}_corte")
+    escritos = _escribir_salidas(resultado, carpeta)
+
+    for material, data in resultado.items():
+        sin_ubicar = f", {len(data['piezas_sin_ubicar'])} SIN UBICAR" if data["piezas_sin_ubicar"] else ""
+        print(f"{material}: {data['cant_placas']} placas, {data['desperdicio_pct']}% desperdicio, "
+              f"mínimo {data['cota_inferior']}{sin_ubicar}")
+    print(f"{len(escritos)} archivos en {carpeta} ({time.monotonic() - inicio:.1f} s)")
+    return 1 if any(d["piezas_sin_ubicar"] for d in resultado.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
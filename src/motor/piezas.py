@@ -0,0 +1,147 @@
+# motor/piezas.py
+# Tabla de piezas para el optimizador — BVM
+#
+# El optimizador trabaja con una "tabla" columnar: un dict de arrays de
+# NumPy del mismo largo, una fila por unidad física de pieza (Cant ya
+# expandida) y el kerf ya sumado a las medidas:
+#     {"nombre": [...], "largo": [...], "ancho": [...], "tipo": [...]}
+# Armarla con np.repeat sobre las columnas de la planilla de corte evita
+# recorrer el DataFrame fila por fila y crear un dict por pieza, que era
+# el camino más lento al optimizar edificios enteros.
+
+import numpy as np
+import pandas as pd
+
+from .despiece import obtener_veta_automatica, eje_veta
+
+COLUMNAS = ("nombre", "largo", "ancho", "tipo")
+
+
+def tabla_vacia():
+    return {
+        "nombre": np.array([], dtype=object),
+        "largo":  np.array([], dtype=float),
+        "ancho":  np.array([], dtype=float),
+        "tipo":   np.array([], dtype=object),
+    }
+
+
+def _columna(df, nombre, defecto):
+    if nombre in df.columns:
+        return df[nombre]
+    return pd.Series(defecto, index=df.index)
+
+
+def _ejes_veta(df_corte, nombre, largo, ancho, material):
+    """Por pieza, qué medida va a lo largo de la veta de la placa ("L",
+    "A", o None si gira libremente; ver eje_veta). La veta sale de la
+    columna "Veta" de la planilla o, si no está, de la regla de
+    obtener_veta_automatica para el material."""
+    if "Veta" in df_corte.columns:
+        vetas = df_corte["Veta"].astype(str).tolist()
+    elif material:
+        # La regla depende solo del nombre: se evalúa una vez por nombre
+        por_nombre = {n: obtener_veta_automatica(n, material) for n in set(nombre.tolist())}
+        vetas = [por_nombre[n] for n in nombre.tolist()]
+    else:
+        return np.full(len(nombre), None, dtype=object)
+    return np.array([eje_veta(n, v, l, a) for n, v, l, a in zip(nombre.tolist(), vetas, largo.tolist(),
+                                                                 ancho.tolist())], dtype=object)
+
+
+def tabla_desde_df(df_corte, kerf, material=None):
+    """Expande una planilla de corte (Pieza, L, A, Cant, Tipo) a una tabla
+    con una fila por unidad, sumando el kerf a cada medida para que el
+    corte real no quede ajustado al límite. La columna "rotable" dice qué
+    piezas pueden girar según su veta; las que no, traen como "largo" la
+    medida que va a lo largo de la veta (ver _ejes_veta), que puede ser
+    la A de la planilla."""
+    if df_corte is None or df_corte.empty:
+        return {**tabla_vacia(), "rotable": np.array([], dtype=bool)}
+    largo = pd.to_numeric(_columna(df_corte, "L", 0), errors="coerce").fillna(0).to_numpy(dtype=float) + kerf
+    ancho = pd.to_numeric(_columna(df_corte, "A", 0), errors="coerce").fillna(0).to_numpy(dtype=float) + kerf
+    cant = pd.to_numeric(_columna(df_corte, "Cant", 0), errors="coerce").fillna(0).to_numpy().astype(int)
+    nombre = _columna(df_corte, "Pieza", "Pieza").astype(str).to_numpy(dtype=object)
+    tipo = _columna(df_corte, "Tipo", "Cuerpo").astype(str).to_numpy(dtype=object)
+
+    # La placa tiene la veta a lo largo (su ancho): las piezas con veta van
+    # sin girar, con la medida que sigue la veta como largo de la tabla
+    ejes = _ejes_veta(df_corte, nombre, largo, ancho, material)
+    por_a = ejes == "A"
+    largo, ancho = np.where(por_a, ancho, largo), np.where(por_a, largo, ancho)
+    rotable = np.array([e is None for e in ejes.tolist()], dtype=bool)
+
+    validas = (largo > 0) & (ancho > 0) & (cant > 0)
+    repeticiones = cant[validas]
+    return {
+        "nombre":  np.repeat(nombre[validas], repeticiones),
+        "largo":   np.repeat(largo[validas], repeticiones),
+        "ancho":   np.repeat(ancho[validas], repeticiones),
+        "tipo":    np.repeat(tipo[validas], repeticiones),
+        "rotable": np.repeat(rotable[validas], repeticiones),
+    }
+
+
+def como_tabla(piezas):
+    """Acepta una tabla o la forma anterior (lista de dicts
+    {"nombre","largo","ancho","tipo"}) y devuelve siempre una tabla."""
+    if isinstance(piezas, dict):
+        return piezas
+    if not piezas:
+        return tabla_vacia()
+    return {
+        col: np.array([p[col] for p in piezas], dtype=float if col in ("largo", "ancho") else object)
+        for col in COLUMNAS
+    }
+
+
+def cant_piezas(tabla):
+    return len(tabla["largo"])
+
+
+def concatenar(tablas):
+    """Une varias tablas (p. ej. las de cada módulo de un mismo material).
+    Solo se conservan las columnas presentes en todas."""
+    tablas = [t for t in tablas if cant_piezas(t) > 0]
+    if not tablas:
+        return tabla_vacia()
+    columnas = [c for c in tablas[0] if all(c in t for t in tablas[1:])]
+    return {c: np.concatenate([t[c] for t in tablas]) for c in columnas}
+
+
+def filas(tabla, indices):
+    """Sub-tabla con las filas indicadas (lista de índices o máscara)."""
+    indices = np.asarray(indices)
+    if indices.dtype != bool:
+        indices = indices.astype(int)
+    return {c: v[indices] for c, v in tabla.items()}
+
+
+def dims_enteras(tabla):
+    """Lista de (largo, ancho) redondeados a mm enteros, que es lo que
+    consumen los motores de empaquetado."""
+    largos = np.rint(tabla["largo"]).astype(int).tolist()
+    anchos = np.rint(tabla["ancho"]).astype(int).tolist()
+    return list(zip(largos, anchos))
+
+
+def etiquetar(tabla, columna, valor):
+    """Agrega a la tabla una columna con el mismo valor en todas las filas
+    (p. ej. el módulo del que sale cada pieza)."""
+    return {**tabla, columna: np.full(cant_piezas(tabla), valor, dtype=object)}
+
+
+def rotables(tabla):
+    """Lista de bool por pieza (si se puede girar 90°), o None si la tabla
+    no trae la columna y todas giran libremente."""
+    if "rotable" not in tabla:
+        return None
+    return tabla["rotable"].astype(bool).tolist()
+
+
+_TIPOS = {"largo": float, "ancho": float, "rotable": bool}
+
+
+def tabla_desde_filas(filas_dict, columnas):
+    """Tabla a partir de una lista de dicts con esas columnas."""
+    return {c: np.array([f[c] for f in filas_dict], dtype=_TIPOS.get(c, object)) for c in columnas}
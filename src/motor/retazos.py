@@ -1,5 +1,7 @@
 # motor/retazos.py
 
+from .formatos_placa import precio_m2
+
 MIN_ANCHO = 150
 MIN_LARGO = 400
 
@@ -30,7 +32,7 @@ def calcular_ahorro_retazos(df_corte, retazos, precio_placa):
         for ret in retazos_utiles:
             if pieza_entra_en_retazo(ret, row):
                 m2_pieza = (float(row["L"]) * float(row["A"])) / 1_000_000
-                ahorro = m2_pieza * (precio_placa / 5.03)
+                ahorro = m2_pieza * precio_m2(precio_placa)
                 ahorro_total += ahorro
                 matches.append({
                     "pieza": row["Pieza"],
@@ -40,3 +42,88 @@ def calcular_ahorro_retazos(df_corte, retazos, precio_placa):
                 break
 
     return round(ahorro_total, 2), matches
+
+
+# --- Sobrantes de placas optimizadas -------------------------------------
+# Después de optimizar, el espacio libre de cada placa se describe con sus
+# rectángulos libres maximales (como en MaxRects): cada uno es el mayor
+# rectángulo vacío que no se puede agrandar. Se superponen entre sí, así
+# que para proponer retazos físicos se eligen de a uno, el más grande
+# primero, descontando cada elegido del resto.
+
+def _restar(libre, ocupado):
+    """Parte `libre` (x, y, w, h) en los hasta cuatro rectángulos maximales
+    que quedan al sacarle `ocupado`. Si no se tocan, devuelve [libre]."""
+    lx, ly, lw, lh = libre
+    ox, oy, ow, oh = ocupado
+    if ox >= lx + lw or ox + ow <= lx or oy >= ly + lh or oy + oh <= ly:
+        return [libre]
+    partes = []
+    if ox > lx:
+        partes.append((lx, ly, ox - lx, lh))
+    if ox + ow < lx + lw:
+        partes.append((ox + ow, ly, lx + lw - ox - ow, lh))
+    if oy > ly:
+        partes.append((lx, ly, lw, oy - ly))
+    if oy + oh < ly + lh:
+        partes.append((lx, oy + oh, lw, ly + lh - oy - oh))
+    return partes
+
+
+def _contenido(a, b):
+    return a[0] >= b[0] and a[1] >= b[1] and a[0] + a[2] <= b[0] + b[2] and a[1] + a[3] <= b[1] + b[3]
+
+
+def _podar(rects):
+    """Saca los rectángulos contenidos en otro (y los repetidos)."""
+    rects = sorted(set(rects), key=lambda r: r[2] * r[3], reverse=True)
+    salida = []
+    for r in rects:
+        if not any(_contenido(r, s) for s in salida):
+            salida.append(r)
+    return salida
+
+
+def rectangulos_libres(ocupados, placa_ancho, placa_alto):
+    """Rectángulos libres maximales de una placa, dados los rectángulos
+    ocupados como (x, y, w, h)."""
+    libres = [(0, 0, placa_ancho, placa_alto)]
+    for ocupado in ocupados:
+        nuevos = []
+        for libre in libres:
+            nuevos.extend(_restar(libre, ocupado))
+        libres = _podar(nuevos)
+    return libres
+
+
+def rectangulos_disjuntos(ocupados, placa_ancho, placa_alto, sirve=None):
+    """Reparte el espacio libre en rectángulos que no se superponen, el más
+    grande primero. sirve(w, h) filtra cuáles se aceptan (por defecto,
+    todos)."""
+    libres = rectangulos_libres(ocupados, placa_ancho, placa_alto)
+    elegidos = []
+    while True:
+        candidatos = [r for r in libres if sirve is None or sirve(r[2], r[3])]
+        if not candidatos:
+            return elegidos
+        elegido = max(candidatos, key=lambda r: (r[2] * r[3], -r[1], -r[0]))
+        elegidos.append(elegido)
+        nuevos = []
+        for libre in libres:
+            nuevos.extend(_restar(libre, elegido))
+        libres = _podar(nuevos)
+
+
+def sobrantes_de_placa(layout_placa, placa_ancho, placa_alto):
+    """
+    Retazos candidatos que deja una placa optimizada: rectángulos libres
+    disjuntos que pasan es_retazo_util, del más grande al más chico.
+    layout_placa es la lista de piezas {"x","y","w","h",...} que devuelve
+    el optimizador. Devuelve [{"x","y","largo","ancho"}] con largo sobre
+    el ancho de la placa.
+    """
+    ocupados = [(p["x"], p["y"], p["w"], p["h"]) for p in layout_placa]
+    return [
+        {"x": round(x), "y": round(y), "largo": round(w), "ancho": round(h)}
+        for x, y, w, h in rectangulos_disjuntos(ocupados, placa_ancho, placa_alto, es_retazo_util)
+    ]
@@ -0,0 +1,116 @@
+# motor/secuencia_corte.py
+# Secuencia de corte en la seccionadora — BVM
+#
+# El optimizador dice qué pieza va dónde; el operario necesita además en
+# qué orden cortar. Acá se recorre el árbol de cortes de cada placa (el de
+# motor/guillotina.py, o uno reconstruido desde un layout libre cuando es
+# guillotina) y se arma la secuencia:
+#   - refilado: los dos cantos de referencia de la placa;
+#   - ripeo: los cortes del primer sentido, de lado a lado de la placa;
+#   - trozado: los cortes transversales de cada tira, que hay que girar;
+#   - recorte: los niveles siguientes, girando de nuevo en cada cambio.
+# Cada cambio de sentido entre un corte y el siguiente de la misma parte
+# es un giro de 90° en la mesa. Con el tiempo por corte, por giro, por
+# refilado y de carga de la placa sale el tiempo de sierra de cada placa,
+# que sirve para elegir, entre layouts con las mismas placas, el que más
+# rinde en la seccionadora.
+
+TIEMPOS_SIERRA_DEFAULT = {
+    "corte_s":    12.0,   # un corte de lado a lado, con el posicionado
+    "giro_s":     20.0,   # girar 90° una parte en la mesa
+    "refilado_s": 15.0,   # cada canto de referencia
+    "carga_s":    45.0,   # subir la placa a la mesa
+}
+
+
+def _encajar(region, rects):
+    """Árbol guillotina de `region` (x, y, w, h) con esos rectángulos
+    (x, y, w, h, nombre) adentro, o None si no hay corte de lado a lado
+    que no atraviese alguna pieza."""
+    x, y, w, h = region
+    nodo = {"x": x, "y": y, "w": w, "h": h}
+    if not rects:
+        return nodo
+    if len(rects) == 1 and rects[0][:4] == region:
+        nodo["pieza"] = rects[0][4]
+        return nodo
+    for corte in ("H", "V"):
+        if corte == "H":
+            posiciones = sorted({r[1] + r[3] for r in rects} | {r[1] for r in rects})
+            limites = (y, y + h)
+        else:
+            posiciones = sorted({r[0] + r[2] for r in rects} | {r[0] for r in rects})
+            limites = (x, x + w)
+        for pos in posiciones:
+            if not limites[0] < pos < limites[1]:
+                continue
+            if corte == "H":
+                cruza = any(r[1] < pos < r[1] + r[3] for r in rects)
+            else:
+                cruza = any(r[0] < pos < r[0] + r[2] for r in rects)
+            if cruza:
+                continue
+            if corte == "H":
+                ra, rb = (x, y, w, pos - y), (x, pos, w, y + h - pos)
+                antes = [r for r in rects if r[1] + r[3] <= pos]
+            else:
+                ra, rb = (x, y, pos - x, h), (pos, y, x + w - pos, h)
+                antes = [r for r in rects if r[0] + r[2] <= pos]
+            despues = [r for r in rects if r not in antes]
+            a, b = _encajar(ra, antes), _encajar(rb, despues)
+            if a is None or b is None:
+                return None
+            nodo.update({"corte": corte, "pos": pos, "hijos": [a, b]})
+            return nodo
+    return None
+
+
+def arbol_desde_layout(layout, placa_ancho, placa_alto):
+    """Reconstruye el árbol de cortes de un layout libre (MaxRects) si se
+    puede cortar en la seccionadora; None si necesita CNC."""
+    rects = [(p["x"], p["y"], p["w"], p["h"], p["nombre"]) for p in layout]
+    return _encajar((0, 0, placa_ancho, placa_alto), rects)
+
+
+def secuencia_placa(arbol, tiempos=None, refilar=True):
+    """
+    Secuencia de corte de una placa a partir de su árbol. Devuelve
+    {"pasos", "cant_cortes", "cant_giros", "tiempo_s"}, donde cada paso es
+    {"paso", "tipo", "corte" ("H"/"V"), "pos", "largo"} o, para los giros,
+    {"paso", "tipo": "giro"}. El largo de un corte es la medida de la parte
+    que atraviesa.
+    """
+    tiempos = {**TIEMPOS_SIERRA_DEFAULT, **(tiempos or {})}
+    pasos = []
+    if refilar:
+        pasos.append({"tipo": "refilado", "corte": "H", "pos": 0, "largo": arbol["w"]})
+        pasos.append({"tipo": "refilado", "corte": "V", "pos": 0, "largo": arbol["h"]})
+
+    tipos = ("ripeo", "trozado")
+    # (nodo, sentido del corte anterior sobre esta parte, nivel)
+    pendientes = [(arbol, None, 0)]
+    giros = 0
+    while pendientes:
+        nodo, anterior, nivel = pendientes.pop()
+        if "hijos" not in nodo:
+            continue
+        if anterior is not None and nodo["corte"] != anterior:
+            giros += 1
+            nivel += 1
+            pasos.append({"tipo": "giro"})
+        pasos.append({
+            "tipo": tipos[nivel] if nivel < len(tipos) else "recorte",
+            "corte": nodo["corte"], "pos": nodo["pos"],
+            "largo": nodo["w"] if nodo["corte"] == "H" else nodo["h"],
+        })
+        for hijo in reversed(nodo["hijos"]):
+            pendientes.append((hijo, nodo["corte"], nivel))
+
+    for i, paso in enumerate(pasos, start=1):
+        paso["paso"] = i
+    cortes = sum(1 for p in pasos if p["tipo"] not in ("giro", "refilado"))
+    refilados = sum(1 for p in pasos if p["tipo"] == "refilado")
+    tiempo = (tiempos["carga_s"] + cortes * tiempos["corte_s"] + giros * tiempos["giro_s"]
+              + refilados * tiempos["refilado_s"])
+    return {"pasos": pasos, "cant_cortes": cortes, "cant_giros": giros, "tiempo_s": round(tiempo, 1)}
+
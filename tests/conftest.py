@@ -0,0 +1,71 @@
+# tests/conftest.py
+# Configuración común de los tests del motor — BVM
+#
+# Los tests corren desde la raíz del repo (python -m pytest) e importan el
+# motor desde src/, como la app. La cache de optimizaciones y el modelo
+# del estimador van a una carpeta temporal para no tocar los del taller.
+
+import random
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from motor import cache_optimizacion, estimador  # noqa: E402
+from motor.despiece import generar_despiece_bvm  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def rutas_temporales(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_optimizacion, "RUTA_CACHE_DEFAULT", str(tmp_path / "optimizacion.sqlite3"))
+    monkeypatch.setattr(estimador, "RUTA_MODELO_DEFAULT", str(tmp_path / "estimador.json"))
+    return tmp_path
+
+
+def modulo(tipo="Bajo Mesada", ancho_m=600, alto_m=720, prof_m=560, nombre=None, material="Roble Kendal"):
+    """Módulo de obra como los arma la app: nombre, material y df_corte."""
+    df = pd.DataFrame(generar_despiece_bvm(tipo, ancho_m=ancho_m, alto_m=alto_m, prof_m=prof_m, esp_real=18,
+                                           cant_cajones=3 if tipo == "Cajonera" else 0,
+                                           estantes_fijos=1, estantes_moviles=1))
+    return {"nombre": nombre or f"{tipo} {ancho_m}", "material": material, "df_corte": df, "tipo": tipo}
+
+
+def obra(n, semilla=0):
+    """n módulos de cocina y placard con medidas al azar."""
+    rnd = random.Random(semilla)
+    modulos = []
+    for i in range(n):
+        tipo = rnd.choice(["Bajo Mesada", "Alacena", "Cajonera", "Placard"])
+        modulos.append(modulo(tipo, ancho_m=rnd.choice([400, 600, 800, 900]),
+                              alto_m=2100 if tipo == "Placard" else rnd.choice([700, 720]),
+                              prof_m=rnd.choice([350, 560]), nombre=f"M{i}"))
+    return modulos
+
+
+def piezas_del_layout(data):
+    return [p for layout in data["placas"] for p in layout]
+
+
+def hojas_con_pieza(arbol):
+    pendientes, hojas = [arbol], []
+    while pendientes:
+        nodo = pendientes.pop()
+        pendientes.extend(nodo.get("hijos", []))
+        if "pieza" in nodo:
+            hojas.append(nodo)
+    return hojas
+
+
+def verificar_layout(layout, ancho, alto):
+    """Cada pieza dentro de la placa y ninguna encima de otra."""
+    for p in layout:
+        assert p["x"] >= 0 and p["y"] >= 0, p
+        assert p["x"] + p["w"] <= ancho and p["y"] + p["h"] <= alto, (p, ancho, alto)
+    for i, a in enumerate(layout):
+        for b in layout[i + 1:]:
+            separadas = (a["x"] + a["w"] <= b["x"] or b["x"] + b["w"] <= a["x"]
+                         or a["y"] + a["h"] <= b["y"] or b["y"] + b["h"] <= a["y"])
+            assert separadas, (a, b)
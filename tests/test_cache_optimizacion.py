@@ -0,0 +1,42 @@
+import numpy as np
+
+from motor import cache_optimizacion
+
+
+def _tabla(nombres, largos, anchos, modulo="m1"):
+    n = len(nombres)
+    return {"nombre": np.array(nombres, dtype=object), "largo": np.array(largos, dtype=float),
+            "ancho": np.array(anchos, dtype=float), "tipo": np.array(["Cuerpo"] * n, dtype=object),
+            "rotable": np.ones(n, dtype=bool), "modulo": np.array([modulo] * n, dtype=object)}
+
+
+def test_clave_no_depende_de_nombres_ni_orden():
+    a = _tabla(["Lateral", "Base"], [700, 600], [560, 560])
+    b = _tabla(["Base X", "Lateral X"], [600, 700], [560, 560], modulo="otro")
+    clave = cache_optimizacion.clave_material(a, 2750, 1830, 4, ["maxrects"])
+    assert clave == cache_optimizacion.clave_material(b, 2750, 1830, 4, ["maxrects"])
+
+
+def test_clave_cambia_con_medidas_placa_o_estrategia():
+    a = _tabla(["Lateral"], [700], [560])
+    clave = cache_optimizacion.clave_material(a, 2750, 1830, 4, ["maxrects"])
+    assert clave != cache_optimizacion.clave_material(_tabla(["Lateral"], [701], [560]), 2750, 1830, 4, ["maxrects"])
+    assert clave != cache_optimizacion.clave_material(a, 2600, 1830, 4, ["maxrects"])
+    assert clave != cache_optimizacion.clave_material(a, 2750, 1830, 4, ["guillotina"])
+    no_rota = {**a, "rotable": np.zeros(1, dtype=bool)}
+    assert clave != cache_optimizacion.clave_material(no_rota, 2750, 1830, 4, ["maxrects"])
+
+
+def test_guardar_y_leer(tmp_path):
+    ruta = str(tmp_path / "cache.sqlite3")
+    assert cache_optimizacion.leer({"Roble": "k1"}, ruta) == {}
+    cache_optimizacion.guardar({"Roble": {"cant_placas": np.int64(3)}, "Otro": {}}, {"Roble": "k1"}, ruta)
+    assert cache_optimizacion.leer({"Roble": "k1", "Pino": "k2"}, ruta) == {"Roble": {"cant_placas": 3}}
+
+
+def test_sin_carpeta_escribible_no_hay_cache(tmp_path):
+    bloqueo = tmp_path / "archivo"
+    bloqueo.write_text("")
+    ruta = str(bloqueo / "sub" / "cache.sqlite3")  # la "carpeta" es un archivo
+    cache_optimizacion.guardar({"Roble": {}}, {"Roble": "k1"}, ruta)
+    assert cache_optimizacion.leer({"Roble": "k1"}, ruta) == {}
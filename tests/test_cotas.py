@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from motor.cotas import cota_area, cota_inferior, cota_l1, cota_l2, gap_pct
+from motor.exacto import empaquetar_exacto
+from motor.guillotina import empaquetar_guillotina
+
+
+def test_cota_de_area():
+    assert cota_area([(1375, 915)] * 4, 2750, 1830) == 1
+    assert cota_area([(1375, 915)] * 5, 2750, 1830) == 2
+    assert cota_area([], 2750, 1830) == 0
+
+
+def test_piezas_de_mas_de_media_placa_no_comparten():
+    dims = [(1400, 1000)] * 3
+    assert cota_area(dims, 2750, 1830) == 1
+    assert cota_l2(dims, 2750, 1830, rotacion=False) == 3
+    assert cota_inferior(dims, 2750, 1830, rotacion=False) == 3
+    # Giradas, dos entran lado a lado (1000 + 1400 <= 2750)
+    assert cota_inferior(dims, 2750, 1830) < 3
+
+
+def test_l1_suma_altos_de_piezas_anchas():
+    assert cota_l1([(2000, 700)] * 5, 2750, 1830, rotacion=False) == 2
+
+
+@pytest.mark.parametrize("semilla", range(8))
+def test_cota_nunca_supera_al_optimo(semilla):
+    rnd = random.Random(semilla)
+    dims = [(rnd.randint(300, 1500), rnd.randint(200, 1000)) for _ in range(rnd.randint(3, 8))]
+    placas, _ = empaquetar_guillotina(dims, 2750, 1830)
+    cota = cota_inferior(dims, 2750, 1830)
+    mejor, _ = empaquetar_exacto(dims, 2750, 1830, cota, len(placas), tiempo_limite_s=2.0)
+    assert cota <= len(mejor or placas)
+
+
+def test_gap():
+    assert gap_pct(10, 8) == 25.0
+    assert gap_pct(3, 3) == 0.0
+    assert gap_pct(1, 0) == 0.0
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from motor import estimador
+from motor.estimador import CLASE_FONDO, calibrar, cargar_modelo, estimar_placas, registrar_corridas
+
+
+def test_estimacion_con_el_modelo_de_fabrica():
+    est = estimar_placas({"Bajo Mesada": 10.0}, m2_placa=5.0)
+    assert est["placas"] == pytest.approx(10.0 * 1.18 / 5.0, abs=0.01)
+    assert est["cota_area"] == 2
+    assert est["cota_area"] <= est["minimo"] <= est["placas"] <= est["maximo"]
+    assert est["desperdicio_pct"] == pytest.approx(18 / 118 * 100, abs=0.1)
+
+
+def test_fondos_usan_su_propia_clase():
+    fondo = estimar_placas({CLASE_FONDO: 10.0}, m2_placa=5.0)
+    assert fondo["m2_consumidos"] == pytest.approx(10.0 * (1 + estimador.DESPERDICIO_DEFAULT[CLASE_FONDO]))
+
+
+def test_calibrar_recupera_el_desperdicio():
+    corridas = [{"m2_por_tipo": {"Alacena": m2}, "placas": m2 * 1.25 / 5.0, "m2_placa": 5.0}
+                for m2 in (20.0, 40.0, 60.0, 80.0, 100.0) for _ in range(20)]
+    modelo = calibrar(corridas)
+    assert modelo["desperdicio"]["Alacena"] == pytest.approx(0.25, abs=0.01)
+    assert modelo["error_relativo"] < 0.01
+
+
+def test_corridas_chicas_no_calibran():
+    modelo = calibrar([{"m2_por_tipo": {"Alacena": 1.0}, "placas": 1, "m2_placa": 5.0}])
+    assert modelo["desperdicio"] == estimador.DESPERDICIO_DEFAULT
+
+
+def test_registrar_y_cargar(rutas_temporales):
+    ruta = str(rutas_temporales / "modelo.json")
+    corrida = {"m2_por_tipo": {"Placard": 30.0}, "placas": 8, "m2_placa": 5.03}
+    registrar_corridas([corrida], ruta)
+    registrar_corridas([corrida], ruta)  # la misma corrida no se repite
+    modelo = cargar_modelo(ruta)
+    assert modelo["corridas"] == [corrida]
+    assert json.loads(open(ruta, encoding="utf-8").read())["version"] == estimador.VERSION_MODELO
+
+
+def test_modelo_de_otra_version_se_ignora(rutas_temporales):
+    ruta = rutas_temporales / "viejo.json"
+    ruta.write_text(json.dumps({"desperdicio": {"Alacena": 0.9}, "error_relativo": 0.5, "corridas": []}))
+    assert cargar_modelo(str(ruta))["desperdicio"] == estimador.DESPERDICIO_DEFAULT
@@ -0,0 +1,51 @@
+import random
+import time
+
+from motor.exacto import empaquetar_exacto
+
+from conftest import verificar_layout
+
+
+def _layout(placa):
+    return [{"x": x, "y": y, "w": w, "h": h} for _, x, y, w, h in placa.piezas]
+
+
+def test_encuentra_el_optimo_y_lo_prueba():
+    dims = [(1375, 915)] * 4
+    placas, optimo = empaquetar_exacto(dims, 2750, 1830, cota=1, maximo=2)
+    assert optimo
+    assert len(placas) == 1
+    assert sorted(i for p in placas for i, *_ in p.piezas) == [0, 1, 2, 3]
+    verificar_layout(_layout(placas[0]), 2750, 1830)
+
+
+def test_respeta_la_veta():
+    # Sin girar, dos de 1830 de largo no entran en una placa de 1830 de alto
+    dims = [(1830, 1375)] * 2
+    placas, _ = empaquetar_exacto(dims, 2750, 1830, cota=1, maximo=2, rotables=[False, False])
+    assert placas is None
+    placas, optimo = empaquetar_exacto(dims, 2750, 1830, cota=1, maximo=2, rotables=[True, True])
+    assert optimo and len(placas) == 1
+
+
+def test_sin_mejora_posible_devuelve_none():
+    placas, optimo = empaquetar_exacto([(2000, 1500)] * 2, 2750, 1830, cota=2, maximo=2)
+    assert placas is None and optimo
+
+
+def test_optimo_solo_si_alcanza_la_cota():
+    # La cota de área de estas piezas es 1, pero no entran en una sola placa
+    rnd = random.Random(1)
+    dims = [(rnd.randint(500, 1300), rnd.randint(300, 900)) for _ in range(14)]
+    placas, optimo = empaquetar_exacto(dims, 2750, 1830, cota=1, maximo=3)
+    assert len(placas) == 2 and not optimo
+
+
+def test_sin_tiempo_corta_enseguida():
+    rnd = random.Random(2)
+    dims = [(rnd.randint(200, 1400), rnd.randint(150, 900)) for _ in range(40)]
+    inicio = time.monotonic()
+    placas, _ = empaquetar_exacto(dims, 2750, 1830, cota=1, maximo=8, tiempo_limite_s=0.0)
+    assert time.monotonic() - inicio < 1.0
+    for placa in placas or []:
+        verificar_layout(_layout(placa), 2750, 1830)
@@ -0,0 +1,82 @@
+import random
+import time
+
+import pytest
+
+from motor.guillotina import (REGLAS_DIVISION, TiempoAgotado, completar_placas, contar_cortes,
+                              empaquetar_en_placas_fijas, empaquetar_guillotina)
+
+from conftest import hojas_con_pieza, verificar_layout
+
+
+def _dims(n, semilla=0):
+    rnd = random.Random(semilla)
+    return [(rnd.randint(100, 1200), rnd.randint(50, 800)) for _ in range(n)]
+
+
+def _layout(placa):
+    return [{"x": x, "y": y, "w": w, "h": h, "idx": i} for i, x, y, w, h in placa.piezas]
+
+
+def _es_guillotina(nodo):
+    """Los hijos de cada corte parten exactamente al padre."""
+    if "hijos" not in nodo:
+        return True
+    a, b = nodo["hijos"]
+    if nodo["corte"] == "H":
+        ok = (a["y"] == nodo["y"] and b["y"] == a["y"] + a["h"] == nodo["pos"]
+              and a["h"] + b["h"] == nodo["h"] and a["w"] == b["w"] == nodo["w"])
+    else:
+        ok = (a["x"] == nodo["x"] and b["x"] == a["x"] + a["w"] == nodo["pos"]
+              and a["w"] + b["w"] == nodo["w"] and a["h"] == b["h"] == nodo["h"])
+    return ok and _es_guillotina(a) and _es_guillotina(b)
+
+
+@pytest.mark.parametrize("regla", REGLAS_DIVISION)
+def test_layout_valido_y_arbol_consistente(regla):
+    dims = _dims(60)
+    placas, sin_ubicar = empaquetar_guillotina(dims, 2750, 1830, regla=regla)
+    assert not sin_ubicar
+    assert sorted(i for p in placas for i, *_ in p.piezas) == list(range(len(dims)))
+    for placa in placas:
+        verificar_layout(_layout(placa), 2750, 1830)
+        assert _es_guillotina(placa.arbol)
+        hojas = sorted((h["x"], h["y"], h["w"], h["h"], h["pieza"]) for h in hojas_con_pieza(placa.arbol))
+        assert hojas == sorted((x, y, w, h, i) for i, x, y, w, h in placa.piezas)
+        assert contar_cortes(placa.arbol) >= len(placa.piezas) - 1
+
+
+def test_respeta_las_piezas_que_no_rotan():
+    dims = [(1000, 200)] * 10 + [(300, 900)] * 4
+    rotables = [False] * 10 + [True] * 4
+    placas, _ = empaquetar_guillotina(dims, 2750, 1830, rotables=rotables)
+    for placa in placas:
+        for i, _, _, w, h in placa.piezas:
+            if not rotables[i]:
+                assert (w, h) == dims[i]
+
+
+def test_pieza_que_no_entra_queda_sin_ubicar():
+    placas, sin_ubicar = empaquetar_guillotina([(3000, 100), (500, 500)], 2750, 1830, rotacion=False)
+    assert sin_ubicar == [0]
+    assert len(placas) == 1
+
+
+def test_plazo_vencido_lanza_tiempo_agotado():
+    with pytest.raises(TiempoAgotado):
+        empaquetar_guillotina(_dims(10), 2750, 1830, fin=time.time() - 1)
+
+
+def test_placas_fijas_sin_abrir_nuevas():
+    usadas, sin_ubicar = empaquetar_en_placas_fijas([(500, 400), (600, 300), (2000, 1000)], [(700, 500), (800, 800)])
+    assert sin_ubicar == [2]
+    for _, placa in usadas:
+        verificar_layout(_layout(placa), placa.ancho, placa.alto)
+
+
+def test_completar_usa_el_espacio_libre():
+    placas, _ = empaquetar_guillotina([(2750, 900)], 2750, 1830)
+    sin_ubicar = completar_placas([(1000, 900), (1000, 900)], placas)
+    assert not sin_ubicar
+    verificar_layout(_layout(placas[0]), 2750, 1830)
+    assert len(placas[0].piezas) == 3
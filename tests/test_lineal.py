@@ -0,0 +1,81 @@
+import itertools
+import random
+
+import pandas as pd
+import pytest
+
+from motor.lineal import empaquetar_exacto, empaquetar_ffd, optimizar_lineal, optimizar_lineal_obra
+
+
+def _minimo_fuerza_bruta(largos, largo_barra, kerf):
+    """Menor cantidad de barras probando todas las asignaciones."""
+    capacidad = largo_barra + kerf
+    n = len(largos)
+    for barras in range(1, n + 1):
+        for asignacion in itertools.product(range(barras), repeat=n):
+            ocupado = [0.0] * barras
+            for largo, b in zip(largos, asignacion):
+                ocupado[b] += largo + kerf
+            if max(ocupado) <= capacidad:
+                return barras
+    return n
+
+
+def _verificar_barras(barras, largos, largo_barra, kerf):
+    assert sorted(i for b in barras for i in b) == list(range(len(largos)))
+    for barra in barras:
+        assert sum(largos[i] for i in barra) + kerf * (len(barra) - 1) <= largo_barra
+
+
+@pytest.mark.parametrize("semilla", range(15))
+def test_exacto_igual_a_fuerza_bruta(semilla):
+    rnd = random.Random(semilla)
+    largos = [float(rnd.randint(300, 1800)) for _ in range(rnd.randint(1, 7))]
+    barras, sin_ubicar = empaquetar_exacto(largos, 3000.0, 3.0)
+    assert not sin_ubicar
+    _verificar_barras(barras, largos, 3000.0, 3.0)
+    assert len(barras) == _minimo_fuerza_bruta(largos, 3000.0, 3.0)
+
+
+def test_exacto_mejora_a_ffd():
+    # FFD: 400+400 | 300+300+300 | 300; el óptimo es 400+300+300 dos veces
+    largos = [400.0, 400.0, 300.0, 300.0, 300.0, 300.0]
+    ffd, _ = empaquetar_ffd(largos, 1000.0, 0.0)
+    exacto, _ = empaquetar_exacto(largos, 1000.0, 0.0)
+    assert len(ffd) == 3
+    assert len(exacto) == 2
+
+
+@pytest.mark.parametrize("motor", [empaquetar_ffd, empaquetar_exacto])
+def test_piezas_mas_largas_que_la_barra_quedan_afuera(motor):
+    largos = [3500.0, 1000.0, 2999.0]
+    barras, sin_ubicar = motor(largos, 3000.0, 3.0)
+    assert sin_ubicar == [0]
+    assert sorted(i for b in barras for i in b) == [1, 2]
+
+
+def test_ffd_valido_con_muchas_piezas():
+    rnd = random.Random(0)
+    largos = [float(rnd.randint(100, 2500)) for _ in range(500)]
+    barras, sin_ubicar = empaquetar_ffd(largos, 3000.0, 3.0)
+    assert not sin_ubicar
+    _verificar_barras(barras, largos, 3000.0, 3.0)
+
+
+def test_optimizar_lineal_informa_sobrantes():
+    resultado = optimizar_lineal({"Tubo": {"largo_barra": 3000.0, "piezas": [("a", 1000.0), ("b", 1000.0)]}},
+                                 kerf=3.0)
+    tubo = resultado["Tubo"]
+    assert tubo["cant_barras"] == 1 and tubo["exacto"]
+    assert tubo["barras"][0]["sobrante"] == 997.0
+
+
+def test_obra_solo_junta_herrajes_lineales():
+    df = pd.DataFrame([
+        {"Pieza": "Tubo Ropero (ref.)", "Cant": 3, "L": 900, "A": 35, "Tipo": "Herraje"},
+        {"Pieza": "Bisagra", "Cant": 4, "L": 35, "A": 35, "Tipo": "Herraje"},
+        {"Pieza": "Frentín", "Cant": 2, "L": 900, "A": 80, "Tipo": "Cuerpo"},
+    ])
+    resultado = optimizar_lineal_obra([{"df_corte": df}, {"df_corte": None}])
+    assert list(resultado) == ["Tubo Ropero"]
+    assert sum(len(b["cortes"]) for b in resultado["Tubo Ropero"]["barras"]) == 3
@@ -0,0 +1,163 @@
+import pytest
+
+import motor.optimizador as optimizador
+from motor.formatos_placa import catalogo
+from motor.optimizador import optimizar_obra, reoptimizar_obra, dimensiones_placa
+
+from conftest import hojas_con_pieza, modulo, obra, piezas_del_layout, verificar_layout
+
+
+def _optimizar(modulos, **kwargs):
+    return optimizar_obra(modulos, usar_cache=False, calibrar_estimador=False, **kwargs)
+
+
+def _cantidad_por_material(modulos):
+    tablas = optimizador._piezas_por_material(modulos, optimizador.KERF_DEFAULT, ("Fondo", "Piso"))
+    return {m: len(t["largo"]) for m, t in tablas.items()}
+
+
+def _verificar_resultado(resultado, modulos):
+    for material, cantidad in _cantidad_por_material(modulos).items():
+        data = resultado[material]
+        for i, layout in enumerate(data["placas"]):
+            verificar_layout(layout, *dimensiones_placa(data, i))
+        assert len(piezas_del_layout(data)) + len(data["piezas_sin_ubicar"]) == cantidad
+        assert data["cant_placas"] == len(data["placas"]) >= data["cota_inferior"]
+
+
+@pytest.mark.parametrize("algoritmo", ["maxrects", "maxrects_baf", "skyline_bl", "guillotina", "guillotina_min_area"])
+def test_layout_sin_solapes_ni_piezas_afuera(algoritmo):
+    modulos = obra(8)
+    resultado = _optimizar(modulos, algoritmo=algoritmo)
+    _verificar_resultado(resultado, modulos)
+    assert not any(d["piezas_sin_ubicar"] for d in resultado.values())
+
+
+@pytest.mark.parametrize("algoritmo", ["maxrects", "guillotina"])
+def test_modo_tiras_valido(algoritmo):
+    modulos = obra(8, semilla=2)
+    resultado = _optimizar(modulos, algoritmo=algoritmo, tiras=True)
+    _verificar_resultado(resultado, modulos)
+    for data in resultado.values():
+        nombres = [p["nombre"] for p in piezas_del_layout(data)]
+        assert not any(n.startswith("Tira ") for n in nombres)
+
+
+def test_tiras_no_usan_mas_placas_que_sin_tiras():
+    modulos = obra(20, semilla=1)
+    sin_tiras = _optimizar(modulos, algoritmo="guillotina")
+    con_tiras = _optimizar(modulos, algoritmo="guillotina", tiras=True)
+    for material, data in con_tiras.items():
+        assert data["cant_placas"] <= sin_tiras[material]["cant_placas"]
+
+
+def test_piezas_con_veta_no_giran():
+    resultado = _optimizar([modulo("Placard", ancho_m=1200, alto_m=2100, prof_m=560)])
+    laterales = [p for p in piezas_del_layout(resultado["Roble Kendal"]) if p["nombre"].startswith("Lateral")]
+    assert laterales
+    # La veta va a lo largo de la placa (x): el alto del placard queda en w
+    assert all(p["w"] > p["h"] for p in laterales)
+
+
+@pytest.mark.parametrize("tiras", [False, True])
+def test_hojas_del_arbol_coinciden_con_el_layout(tiras):
+    resultado = _optimizar(obra(8, semilla=3), algoritmo="guillotina", tiras=tiras)
+    for data in resultado.values():
+        assert len(data["arboles_corte"]) == len(data["placas"])
+        for arbol, layout in zip(data["arboles_corte"], data["placas"]):
+            hojas = sorted((h["x"], h["y"], h["w"], h["h"], h["pieza"]) for h in hojas_con_pieza(arbol))
+            piezas = sorted((p["x"], p["y"], p["w"], p["h"], p["nombre"]) for p in layout)
+            assert hojas == piezas
+
+
+def test_portafolio_con_deadline_devuelve_layout_valido():
+    modulos = obra(6, semilla=4)
+    resultado = _optimizar(modulos, deadline_s=1.0, workers=1)
+    _verificar_resultado(resultado, modulos)
+    simple = _optimizar(modulos)
+    for material, data in resultado.items():
+        assert data["cant_placas"] <= simple[material]["cant_placas"]
+        assert "_tiempo_sierra" not in data
+
+
+def test_fases_de_mejora_apagadas_por_defecto(monkeypatch):
+    llamadas = []
+    monkeypatch.setattr(optimizador, "_mejorar_materiales", lambda *a, **k: llamadas.append(a) or a[0])
+    _optimizar(obra(3))
+    assert not llamadas
+
+
+def test_formato_con_veta_por_el_alto_se_empaqueta_girado():
+    formatos = [f for f in catalogo(100000.0) if f["nombre"].startswith("Media")]
+    resultado = _optimizar([modulo("Alacena", ancho_m=600, alto_m=700, prof_m=350)], formatos=formatos,
+                           fondos=False)
+    data = resultado["Roble Kendal"]
+    assert data["dimensiones_placas"] == [[1375.0, 1830.0]] * data["cant_placas"]
+    for i, layout in enumerate(data["placas"]):
+        verificar_layout(layout, *dimensiones_placa(data, i))
+
+
+class TestCache:
+    def test_segunda_corrida_sale_de_la_cache(self, monkeypatch):
+        modulos = obra(4)
+        primera = optimizar_obra(modulos, calibrar_estimador=False)
+        llamadas = []
+        original = optimizador.optimizar_corte
+        monkeypatch.setattr(optimizador, "optimizar_corte", lambda *a, **k: llamadas.append(a) or original(*a, **k))
+        segunda = optimizar_obra(modulos, calibrar_estimador=False)
+        assert not llamadas
+        for material, data in primera.items():
+            assert segunda[material]["placas"] == data["placas"]
+
+    def test_cambio_de_medidas_no_sale_de_la_cache(self, monkeypatch):
+        optimizar_obra(obra(4), calibrar_estimador=False)
+        llamadas = []
+        original = optimizador.optimizar_corte
+        monkeypatch.setattr(optimizador, "optimizar_corte", lambda *a, **k: llamadas.append(a) or original(*a, **k))
+        optimizar_obra(obra(4, semilla=9), calibrar_estimador=False)
+        assert llamadas
+
+    @pytest.mark.parametrize("algoritmo,tiras", [("maxrects", False), ("guillotina", True)])
+    def test_otra_obra_con_las_mismas_piezas_toma_sus_nombres(self, algoritmo, tiras):
+        modulos = obra(4)
+        optimizar_obra(modulos, calibrar_estimador=False, algoritmo=algoritmo, tiras=tiras)
+        renombrados = []
+        for m in modulos:
+            df = m["df_corte"].copy()
+            df["Pieza"] = df["Pieza"] + " B"
+            renombrados.append({**m, "nombre": m["nombre"] + " B", "df_corte": df})
+        resultado = optimizar_obra(renombrados, calibrar_estimador=False, algoritmo=algoritmo, tiras=tiras)
+        _verificar_resultado(resultado, renombrados)
+        etiquetas = set(optimizador.etiquetas_modulos(renombrados))
+        for data in resultado.values():
+            piezas = piezas_del_layout(data)
+            assert all(p["nombre"].endswith(" B") and p["modulo"] in etiquetas for p in piezas)
+            for arbol in data.get("arboles_corte", []):
+                assert all(h["pieza"].endswith(" B") for h in hojas_con_pieza(arbol))
+            for tira in data.get("tiras", []):
+                assert all(n.endswith(" B") for n in tira["piezas"])
+
+
+class TestReoptimizar:
+    def test_agregar_modulo_conserva_placas_y_ubica_todo(self):
+        modulos = obra(6)
+        previo = _optimizar(modulos, algoritmo="guillotina")
+        nuevos = modulos + [modulo("Alacena", ancho_m=800, alto_m=700, prof_m=350, nombre="Nuevo")]
+        resultado = reoptimizar_obra(previo, nuevos)
+        _verificar_resultado(resultado, nuevos)
+        data, antes = resultado["Roble Kendal"], previo["Roble Kendal"]
+        assert data["cant_placas"] >= antes["cant_placas"]
+        # Las piezas que ya estaban no se mueven
+        ubicadas = {(i, p["x"], p["y"], p["nombre"]) for i, layout in enumerate(data["placas"]) for p in layout}
+        assert all((i, p["x"], p["y"], p["nombre"]) in ubicadas
+                   for i, layout in enumerate(antes["placas"]) for p in layout)
+
+    def test_quitar_modulo_saca_sus_piezas(self):
+        modulos = obra(6)
+        previo = _optimizar(modulos)
+        quedan = modulos[1:]
+        resultado = reoptimizar_obra(previo, quedan)
+        _verificar_resultado(resultado, quedan)
+        etiquetas = set(optimizador.etiquetas_modulos(quedan))
+        for data in resultado.values():
+            assert all(p["modulo"] in etiquetas for p in piezas_del_layout(data))
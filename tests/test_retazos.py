@@ -0,0 +1,38 @@
+from motor.retazos import (es_retazo_util, pieza_entra_en_retazo, rectangulos_disjuntos, rectangulos_libres,
+                           sobrantes_de_placa)
+
+from conftest import verificar_layout
+
+
+def test_retazo_util_en_cualquier_sentido():
+    assert es_retazo_util(400, 150)
+    assert es_retazo_util(150, 400)
+    assert not es_retazo_util(399, 150)
+    assert not es_retazo_util(1000, 149)
+
+
+def test_pieza_entra_girada():
+    assert pieza_entra_en_retazo({"largo": 300, "ancho": 800}, {"L": 700, "A": 250})
+    assert not pieza_entra_en_retazo({"largo": 300, "ancho": 800}, {"L": 900, "A": 250})
+
+
+def test_libres_maximales_de_una_esquina_ocupada():
+    libres = rectangulos_libres([(0, 0, 1000, 500)], 2750, 1830)
+    assert sorted(libres) == [(0, 500, 2750, 1330), (1000, 0, 1750, 1830)]
+
+
+def test_disjuntos_no_se_pisan_ni_pisan_piezas():
+    ocupados = [(0, 0, 1000, 500), (1200, 700, 300, 300)]
+    elegidos = rectangulos_disjuntos(ocupados, 2750, 1830)
+    rects = [{"x": x, "y": y, "w": w, "h": h} for x, y, w, h in elegidos + ocupados]
+    verificar_layout(rects, 2750, 1830)
+    assert sum(w * h for _, _, w, h in elegidos + ocupados) == 2750 * 1830
+
+
+def test_sobrantes_solo_aprovechables():
+    # Queda una franja de 750x130: el ancho no llega al mínimo de un retazo
+    franja = [{"x": 0, "y": 0, "w": 2750, "h": 1700}, {"x": 0, "y": 1700, "w": 2000, "h": 130}]
+    assert sobrantes_de_placa(franja, 2750, 1830) == []
+    sobrantes = sobrantes_de_placa([{"x": 0, "y": 0, "w": 1000, "h": 500}], 2750, 1830)
+    assert sobrantes[0] == {"x": 0, "y": 500, "largo": 2750, "ancho": 1330}
+    assert all(es_retazo_util(s["largo"], s["ancho"]) for s in sobrantes)
@@ -0,0 +1,33 @@
+from motor.secuencia_corte import TIEMPOS_SIERRA_DEFAULT, arbol_desde_layout, secuencia_placa
+
+
+def _pieza(nombre, x, y, w, h):
+    return {"nombre": nombre, "x": x, "y": y, "w": w, "h": h}
+
+
+def test_layout_guillotina_tiene_arbol_y_secuencia():
+    # Una tira de 600 de alto ripeada y trozada en dos piezas
+    layout = [_pieza("a", 0, 0, 1000, 600), _pieza("b", 1000, 0, 800, 600)]
+    arbol = arbol_desde_layout(layout, 2750, 1830)
+    assert arbol is not None
+    sec = secuencia_placa(arbol)
+    tipos = [p["tipo"] for p in sec["pasos"]]
+    assert tipos[:2] == ["refilado", "refilado"]
+    assert tipos.count("ripeo") == 1 and tipos.count("giro") == 1
+    assert sec["cant_cortes"] == 3 and sec["cant_giros"] == 1
+    t = TIEMPOS_SIERRA_DEFAULT
+    assert sec["tiempo_s"] == t["carga_s"] + 2 * t["refilado_s"] + 3 * t["corte_s"] + t["giro_s"]
+    assert [p["paso"] for p in sec["pasos"]] == list(range(1, len(sec["pasos"]) + 1))
+
+
+def test_molinete_no_es_guillotina():
+    layout = [_pieza("a", 0, 0, 2000, 600), _pieza("b", 2000, 0, 750, 1300),
+              _pieza("c", 750, 1300, 2000, 530), _pieza("d", 0, 600, 750, 1230)]
+    assert arbol_desde_layout(layout, 2750, 1830) is None
+
+
+def test_tiempos_propios():
+    arbol = arbol_desde_layout([_pieza("a", 0, 0, 2750, 900)], 2750, 1830)
+    rapido = secuencia_placa(arbol, {"corte_s": 1.0, "carga_s": 0.0, "refilado_s": 0.0})
+    assert rapido["tiempo_s"] == rapido["cant_cortes"] * 1.0
+    assert secuencia_placa(arbol, refilar=False)["pasos"][0]["tipo"] == "ripeo"